@@ -4,6 +4,7 @@ import argparse
 from SimPlacement.helper import Helper
 from SimPlacement.setup import Setup
 
+from SPEED.environment_snapshot import EnvironmentSnapshot
 from SPEED.helpers.zone import ZoneHelper
 from SPEED.simulation import SPEEDSimulation
 
@@ -16,6 +17,9 @@ def main():
     parser.add_argument('--entities', default="./examples/basic/entities.yml", help='Entities config file.')
     parser.add_argument('--zones', default="./examples/basic/zones.yml", help='Entities zone config file.')
     parser.add_argument('--packets',  help='Simulation packets file.')
+    parser.add_argument('--no-snapshot', action='store_true', help='Load the entities and zones without snapshot.')
+    parser.add_argument('--rebuild-snapshot', action='store_true',
+                        help='Build the snapshot of the entities and zones again.')
 
     args = parser.parse_args()
 
@@ -23,12 +27,16 @@ def main():
     config = Helper.load_yml_file(args.config)
 
     # print("Loading entities...")
-    environment = Setup.load_entities(args.entities)
-
-    environment['zones'] = ZoneHelper.load(
-        data_file=args.zones,
-        environment=environment
-    )
+    if args.no_snapshot:
+        environment = Setup.load_entities(args.entities)
+
+        environment['zones'] = ZoneHelper.load(
+            data_file=args.zones,
+            environment=environment
+        )
+    else:
+        snapshot = EnvironmentSnapshot(entities_file=args.entities, zones_file=args.zones)
+        environment = snapshot.load(rebuild=args.rebuild_snapshot)
 
     se = SPEEDSimulation(
         env=simpy.Environment(),
@@ -1,9 +1,15 @@
 import random
-from typing import Dict, List
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
 
 from SPEED.entities.distributed_service import DistributedService
+from SPEED.gateway_delay_matrix import GatewayDelayMatrix
 from SPEED.helpers.zone import ZoneHelper
+from SPEED.registry import NameRegistry
 from SPEED.speed import SPEED
+from SPEED.topology_cache import TopologyCache
 from SPEED.entities.zone import Zone
 from SimPlacement.entities.sfc_request import SFCRequest
 
@@ -21,12 +27,21 @@ class DistributedServiceManager:
     Each zone have one SM that will deal with the services requested.
     """
 
-    def __init__(self, zone: Zone, environment):
+    def __init__(self, zone: Zone, environment, collection_mode: str = SPEED.COLLECTION_DICT,
+                 registry: NameRegistry = None, gateway_delays: GatewayDelayMatrix = None,
+                 topology_cache: TopologyCache = None, summary_mode: str = SPEED.SUMMARY_MIN_DELAY,
+                 pareto_k: int = SPEED.DEFAULT_PARETO_K):
         """
         Create a new Slice Auction Manager.
 
         :param environment: The simulation environment.
         :param zone: The zone where the service manager is associated.
+        :param collection_mode: How the SPEED component collects the infrastructure data.
+        :param registry: The interned ids shared by all the SPEED components.
+        :param gateway_delays: The delay from all the nodes to all the GWs shared by all the SPEED components.
+        :param topology_cache: The cache of the topology data shared by all the SPEED components.
+        :param summary_mode: How the SPEED component summarizes the aggregated data.
+        :param pareto_k: The max amount of records in the Pareto fronts of the SPEED component.
         """
 
         self.environment = environment
@@ -50,7 +65,13 @@ class DistributedServiceManager:
                 name='s_{}'.format(zone.name),
                 domain=domain,
                 zone_name=zone.name,
-                environment=environment
+                environment=environment,
+                collection_mode=collection_mode,
+                registry=registry,
+                gateway_delays=gateway_delays,
+                topology_cache=topology_cache,
+                summary_mode=summary_mode,
+                pareto_k=pareto_k
             )
 
         self.node = ZoneHelper.get_random_node_from_zone(
@@ -120,29 +141,139 @@ class DistributedServiceManager:
 
         return True
 
-    def select_zones_to_vnf_segments(self, segmentation_plan):
+    def select_zones_to_vnf_segments(self, segmentation_plan, zone_capacity: Dict[str, int] = None):
         """
         Select for each VNF Segment in the segmentation plan the zone that will execute the VNF Segment.
 
+        The cost of all the segments in all the child zones is computed at once, and each segment selects the child zone
+        with the min cost. With the capacity of the zones, the segments are assigned by assign_zones_with_capacity. The
+        segments that select the same zone are merged.
+
         :param segmentation_plan: The segmentation plan that will be processed in the zone
-        :return:
+        :param zone_capacity: The max amount of VNFs that each child zone can receive, the zones without capacity
+        have no limit.
+        :return: The VNFs of each selected zone, empty when a segment does not fit in any child zone.
+        """
+        vnf_segments = list(segmentation_plan['segments'].values())
+        zone_names = list(self.zone.child_zone_names)
+
+        aux = dict()
+        if not zone_names:
+            return aux
+
+        zone_cost = self.speed.segments_cost_matrix(
+            vnf_segments=[vnf_segment['vnfs'] for vnf_segment in vnf_segments],
+            zone_names=zone_names
+        )
+
+        if not zone_capacity:
+            selected_zones = zone_cost.argmin(axis=1)
+        else:
+            capacity = np.array([zone_capacity.get(zone_name, np.inf) for zone_name in zone_names], dtype=float)
+            selected_zones = self.assign_zones_with_capacity(
+                amount_vnfs=[len(vnf_segment['vnfs']) for vnf_segment in vnf_segments],
+                zone_cost=zone_cost,
+                capacity=capacity
+            )
+
+            if selected_zones is None:
+                return dict()
+
+        for vnf_segment, zone in zip(vnf_segments, selected_zones):
+            zone_name = zone_names[zone]
+            if zone_name not in aux:
+                aux[zone_name] = dict()
+                aux[zone_name]['vnfs'] = []
+            aux[zone_name]['vnfs'] = aux[zone_name]['vnfs'] + vnf_segment['vnfs']
+
+        return aux
+
+    @staticmethod
+    def assign_zones_with_capacity(amount_vnfs: List[int], zone_cost: np.ndarray,
+                                   capacity: np.ndarray) -> Optional[List[int]]:
+        """
+        Assign a zone to each segment without exceeding the capacity of the zones.
+
+        The segments with the fewest zones that can execute them are assigned first, and each segment tries its zones
+        from the min cost. When a segment does not fit in any zone the previous segments are assigned again, thus a
+        segment only fails when there is no assignment at all.
+
+        :param amount_vnfs: The amount of VNFs of each segment.
+        :param zone_cost: The cost of each segment (rows) in each zone (columns).
+        :param capacity: The amount of VNFs that each zone can receive.
+        :return: The index of the zone of each segment, None when the segments do not fit in the zones.
+        """
+        # a zone without capacity or without the VNFs of a segment can not be selected
+        valid = (zone_cost < float(sys.maxsize)) & (capacity[np.newaxis, :] >= np.array(amount_vnfs)[:, np.newaxis])
+        order = sorted(range(len(amount_vnfs)), key=lambda segment: int(valid[segment].sum()))
+        zones_by_cost = [
+            [int(zone) for zone in np.argsort(zone_cost[segment], kind="stable") if valid[segment, zone]]
+            for segment in range(len(amount_vnfs))
+        ]
+
+        capacity = capacity.copy()
+        selected_zones = [-1] * len(amount_vnfs)
+
+        def assign(position: int) -> bool:
+            if position == len(order):
+                return True
+
+            segment = order[position]
+            for zone in zones_by_cost[segment]:
+                if capacity[zone] < amount_vnfs[segment]:
+                    continue
+
+                capacity[zone] -= amount_vnfs[segment]
+                selected_zones[segment] = zone
+
+                if assign(position + 1):
+                    return True
+
+                capacity[zone] += amount_vnfs[segment]
+
+            return False
+
+        if not assign(0):
+            return None
+
+        return selected_zones
+
+    def select_optimal_zones_to_vnf_segments(self, vnf_names: List[str],
+                                             delay_weight: float = SPEED.DEFAULT_DELAY_WEIGHT) -> dict:
+        """
+        Select the VNF Segments and the zone that will execute each VNF Segment together, with the min cost plus the
+        delay between the segments.
+
+        :param vnf_names: The name of the VNFs of the chain.
+        :param delay_weight: The weight of the delay between the segments.
+        :return: The VNFs of each selected zone, empty when the child zones can not execute the chain.
         """
-        vnf_segments = segmentation_plan['segments']
-        selected_zone: Dict[str, str] = dict()
-        for vnf_segment_name, vnf_segment in vnf_segments.items():
-            zone_cost: Dict[str, float] = dict()
-            for child_zone in self.zone.child_zone_names:
-                zone_cost[child_zone] = self.speed.compute_child_zone_vnf_segment_execution_cost(
-                    vnf_segment=vnf_segment,
-                    zone_name=child_zone
-                )
+        plan = self.speed.optimal_segmentation_plan(
+            vnf_names=vnf_names,
+            delay_weight=delay_weight
+        )
+
+        if not plan:
+            return dict()
 
-            if zone_cost:
-                selected_zone[vnf_segment_name] = min(zone_cost, key=zone_cost.get)
+        return self.merge_zones_of_vnf_segments(plan)
 
+    @staticmethod
+    def merge_zones_of_vnf_segments(segmentation_plan: dict) -> dict:
+        """
+        The VNFs of each zone of a segmentation plan where each VNF Segment has only one zone.
+
+        :param segmentation_plan: The segmentation plan with the zone of each VNF Segment.
+        :return: The VNFs of each selected zone.
+        """
         aux = dict()
-        for vnf_segment, zone in selected_zone.items():
-            aux[zone] = dict()
-            aux[zone]['vnfs'] = vnf_segments[vnf_segment]['vnfs']
+
+        # a zone that executes two segments that are not consecutive receives all its VNFs
+        for vnf_segment in segmentation_plan['segments'].values():
+            zone = vnf_segment['zones'][0]
+            if zone not in aux:
+                aux[zone] = dict()
+                aux[zone]['vnfs'] = []
+            aux[zone]['vnfs'] = aux[zone]['vnfs'] + vnf_segment['vnfs']
 
         return aux
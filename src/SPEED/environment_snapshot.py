@@ -0,0 +1,176 @@
+import glob
+import hashlib
+import importlib
+import os
+import pickle
+
+from SimPlacement.setup import Setup
+
+from SPEED.helpers.zone import ZoneHelper
+
+
+class EnvironmentSnapshot:
+    """
+    Snapshot of the environment and the zones loaded from the config files, saved with pickle next to the entities
+    file.
+
+    The snapshot is keyed by the hash of the content of the entities and zone files and of the source of the modules
+    of the pickled classes, thus when a file or a module changes the snapshot is not used anymore and it is replaced by
+    a new one. Loading the snapshot avoids parsing the YAML files
+    and building the objects again.
+    """
+
+    VERSION = 1
+    """
+    The version of the snapshot format, it is part of the key thus the old snapshots are not loaded.
+    """
+
+    MODULE_PACKAGES = ["SimPlacement", "SPEED.entities"]
+    """
+    The packages of the classes in the snapshot, the source of their modules is part of the key.
+    """
+
+    EXTENSION = "snapshot"
+    """
+    The extension of the snapshot files.
+    """
+
+    def __init__(self, entities_file: str, zones_file: str):
+        """
+        Create the snapshot of the config files.
+
+        :param entities_file: The entities config file.
+        :param zones_file: The zone config file.
+        """
+        self.entities_file = entities_file
+        """
+        The entities config file.
+        """
+
+        self.zones_file = zones_file
+        """
+        The zone config file.
+        """
+
+        self.loaded = False
+        """
+        If the last environment was loaded from the snapshot.
+        """
+
+    def compute_key(self) -> str:
+        """
+        The hash of the content of the config files, the source of the modules and the version of the snapshot format.
+
+        :return:
+        """
+        h = hashlib.sha256("{}".format(self.VERSION).encode())
+
+        for file_name in [self.entities_file, self.zones_file]:
+            with open(file_name, "rb") as f:
+                h.update(hashlib.sha256(f.read()).digest())
+
+        for file_name in self.module_files():
+            h.update(os.path.basename(file_name).encode())
+            with open(file_name, "rb") as f:
+                h.update(hashlib.sha256(f.read()).digest())
+
+        return h.hexdigest()
+
+    def module_files(self) -> list:
+        """
+        The source files of the modules of the packages of the classes in the snapshot.
+
+        :return:
+        """
+        module_files = []
+
+        for package_name in self.MODULE_PACKAGES:
+            package = importlib.import_module(package_name)
+            for path in package.__path__:
+                module_files += sorted(glob.glob(os.path.join(glob.escape(path), "**", "*.py"), recursive=True))
+
+        return module_files
+
+    def prefix(self) -> str:
+        """
+        The prefix of the snapshot files of the config files.
+
+        :return:
+        """
+        return "{}.{}".format(
+            os.path.splitext(self.entities_file)[0],
+            os.path.splitext(os.path.basename(self.zones_file))[0]
+        )
+
+    def file_name(self, key: str) -> str:
+        """
+        The snapshot file of a key.
+
+        :param key: The key of the snapshot.
+        :return:
+        """
+        return "{}.{}.{}".format(self.prefix(), key[:16], self.EXTENSION)
+
+    def load(self, rebuild: bool = False) -> dict:
+        """
+        Return the environment with the zones, loaded from the snapshot if it exists or from the config files.
+
+        :param rebuild: Load the config files and save the snapshot again, even if it exists.
+        :return:
+        """
+        key = self.compute_key()
+        file_name = self.file_name(key)
+
+        if not rebuild and os.path.isfile(file_name):
+            try:
+                with open(file_name, "rb") as f:
+                    data = pickle.load(f)
+
+                if data['key'] == key:
+                    self.loaded = True
+                    return data['environment']
+            except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, KeyError, TypeError):
+                # a broken snapshot is built again
+                pass
+
+        environment = Setup.load_entities(self.entities_file)
+
+        environment['zones'] = ZoneHelper.load(
+            data_file=self.zones_file,
+            environment=environment
+        )
+
+        self.loaded = False
+        self.save(key, environment)
+
+        return environment
+
+    def save(self, key: str, environment: dict):
+        """
+        Save the snapshot of the environment and remove the stale snapshots of the config files.
+
+        :param key: The key of the snapshot.
+        :param environment: The environment with the zones.
+        :return:
+        """
+        file_name = self.file_name(key)
+
+        for stale_file_name in glob.glob("{}.*.{}".format(glob.escape(self.prefix()), self.EXTENSION)):
+            if stale_file_name != file_name:
+                try:
+                    os.remove(stale_file_name)
+                except OSError:
+                    # removed by other simulation or in a read-only path, the stale snapshot is never loaded
+                    pass
+
+        # the file is renamed only after written, thus a broken snapshot is never loaded by other simulation
+        tmp_file_name = "{}.{}.tmp".format(file_name, os.getpid())
+        try:
+            with open(tmp_file_name, "wb") as f:
+                pickle.dump({'key': key, 'environment': environment}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+            os.replace(tmp_file_name, file_name)
+        except (OSError, pickle.PicklingError, AttributeError, TypeError):
+            # the environment is used without snapshot, e.g. the path is read-only
+            if os.path.isfile(tmp_file_name):
+                os.remove(tmp_file_name)
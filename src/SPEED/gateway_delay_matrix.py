@@ -0,0 +1,159 @@
+from typing import Dict, List
+
+import networkx as nx
+import numpy as np
+
+from SimPlacement.entities.node import Node
+from SimPlacement.topology import Topology
+
+from SPEED.helpers.topology import TopologyHelper
+from SPEED.registry import NameRegistry
+
+
+class GatewayDelayMatrix:
+    """
+    The delay from every node to every GW of the topology.
+
+    The matrix is built with one single source Dijkstra for each GW, instead of one shortest path for each (node, GW).
+    The rows are indexed by the node id and the columns by the GW id of the NameRegistry. When a GW is not reachable
+    from a node the delay is infinite in the matrix, and delays_from raises NetworkXNoPath as the shortest path.
+    """
+
+    def __init__(self, topology: Topology, nodes: Dict[str, Node], registry: NameRegistry = None):
+        """
+        Create and build the matrix.
+
+        :param topology: The topology of the environment.
+        :param nodes: All the nodes of the environment.
+        :param registry: The interned ids, the GW ids are the columns of the matrix.
+        """
+        if not registry:
+            registry = NameRegistry()
+
+        self.topology = topology
+        """
+        The topology of the environment.
+        """
+
+        self.nodes = nodes
+        """
+        All the nodes of the environment.
+        """
+
+        self.registry: NameRegistry = registry
+        """
+        The interned ids of the GWs.
+        """
+
+        self.node_ids: Dict[str, int] = dict()
+        """
+        The row of each node.
+        """
+
+        self.gw_names: List[str] = list()
+        """
+        The name of the GWs of the topology.
+        """
+
+        self.delays: np.ndarray = np.empty((0, 0))
+        """
+        The delay from each node (row) to each GW (column).
+        """
+
+        self.fingerprint = ""
+        """
+        The fingerprint of the topology used to build the matrix.
+        """
+
+        self.build()
+
+    def build(self):
+        """
+        Build the matrix using the current topology.
+
+        :return:
+        """
+        g = self.topology.get_graph()
+
+        self.node_ids = dict()
+        self.gw_names = list()
+        for node_name, node in self.nodes.items():
+            self.node_ids[node_name] = len(self.node_ids)
+            if node.is_gateway():
+                self.gw_names.append(node_name)
+
+        gw_ids = [self.registry.gws.intern(gw_name) for gw_name in self.gw_names]
+
+        self.delays = np.full((len(self.node_ids), len(self.registry.gws)), np.inf)
+
+        # The delay is from the node to the GW, thus the links are reversed in directed topologies.
+        if g.is_directed():
+            g = g.reverse(copy=False)
+
+        for gw_name, gw_id in zip(self.gw_names, gw_ids):
+            if gw_name not in g:
+                continue
+
+            lengths = nx.single_source_dijkstra_path_length(g, gw_name, weight="delay")
+
+            for node_name, delay in lengths.items():
+                node_id = self.node_ids.get(node_name)
+                if node_id is not None:
+                    self.delays[node_id, gw_id] = delay
+
+        self.fingerprint = self.compute_fingerprint()
+
+    def compute_fingerprint(self) -> str:
+        """
+        The fingerprint of the current topology and GWs.
+
+        :return:
+        """
+        gws = [node_name for node_name, node in self.nodes.items() if node.is_gateway()]
+
+        return "{}_{}".format(TopologyHelper.fingerprint(self.topology.get_graph()), ",".join(gws))
+
+    def refresh(self) -> bool:
+        """
+        Build the matrix again only if the topology changed.
+
+        :return: True if the matrix was built again.
+        """
+        if self.compute_fingerprint() == self.fingerprint:
+            return False
+
+        self.build()
+
+        return True
+
+    def row(self, node_name: str) -> np.ndarray:
+        """
+        The delay from a node to all the GWs, indexed by the GW id.
+
+        :param node_name: The name of the node.
+        :return:
+        """
+        if node_name not in self.node_ids:
+            raise TypeError("The node {} is not in the gateway delay matrix.".format(node_name))
+
+        return self.delays[self.node_ids[node_name]]
+
+    def delays_from(self, node_name: str) -> Dict[str, float]:
+        """
+        Return the delay from a node to all the GWs of the topology.
+
+        :param node_name: The name of the node.
+        :return: Dict with the name of the GW as key, and the delay as value.
+        """
+        row = self.row(node_name)
+
+        aux: Dict[str, float] = dict()
+        for gw_name in self.gw_names:
+            delay = row[self.registry.gws.ids[gw_name]].item()
+
+            if not np.isfinite(delay):
+                raise nx.NetworkXNoPath("No path between {} and {}.".format(node_name, gw_name))
+
+            aux[gw_name] = delay
+
+        return aux
@@ -247,7 +247,8 @@ class SimulationHelper(Helper):
         return topo
 
     @staticmethod
-    def generate_zone_topology(max_height: int, num_aggregation_zones: int, domains: dict):
+    def generate_zone_topology(max_height: int, num_aggregation_zones: int, domains: dict, seed: int = None,
+                               max_children: int = None):
         """
         Generate a tree with a max_height
 
@@ -256,12 +257,16 @@ class SimulationHelper(Helper):
         :param max_height: Tree max height.
         :param num_aggregation_zones: Amount of aggregation zones.
         :param domains: Dict with the domains generated
+        :param seed: The seed used to generate the tree of the aggregation zones.
+        :param max_children: The max amount of child aggregation zones of each aggregation zone.
         :return:
         """
         # generate the aggregation zones
         aggregation_zones = ZoneHelper.generate_random_tree_with_max_height(
             max_height=max_height,
-            num_aggregation_zones=num_aggregation_zones
+            num_aggregation_zones=num_aggregation_zones,
+            seed=seed,
+            max_children=max_children
         )
 
         # find the aggregation zones that are leafs in the topology
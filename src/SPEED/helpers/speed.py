@@ -1,5 +1,8 @@
 import os
-from typing import List
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
 
 from SimPlacement.helper import Helper
 from beautifultable import BeautifulTable
@@ -7,19 +10,69 @@ from komby.komby import Komby
 
 from SPEED.types import InfrastructureData
 from SPEED.types import AggregatedData
+from SPEED.types import SegmentationTemplate
+from SPEED.types import SegmentationValidity
 
 
 class SPEEDHelper(Helper):
 
+    SEGMENTATION_CONTIGUOUS = "contiguous"
+    """
+    Each segment has consecutive VNFs of the chain, there are 2^(n-1) plans for n VNFs.
+    """
+
+    SEGMENTATION_SET_PARTITION = "set_partition"
+    """
+    Each segment has any VNFs of the chain, the segments are the set partitions of the VNFs (Bell(n) plans). A packet
+    can go back to a zone it already visited.
+    """
+
+    VALID_SEGMENTATION_MODES = [SEGMENTATION_CONTIGUOUS, SEGMENTATION_SET_PARTITION]
+    """
+    Constant used to define the valid segmentation modes.
+    """
+
+    SEARCH_ALL = "all"
+    """
+    Create all the valid segmentation plans.
+    """
+
+    SEARCH_MIN_SEGMENTS = "min_segments"
+    """
+    Create the plans by increasing amount of segments, and stop at the first amount of segments with a valid plan.
+    Only the valid plans with the fewest segments are created, the plans that can be selected by
+    SPEED.select_segmentation_plan.
+    """
+
+    VALID_SEARCH_MODES = [SEARCH_ALL, SEARCH_MIN_SEGMENTS]
+    """
+    Constant used to define the valid search modes.
+    """
+
     @staticmethod
-    def vnf_segmentation(vnf_names: List[str]) -> dict:
+    def vnf_segmentation(vnf_names: List[str], mode: str = SEGMENTATION_CONTIGUOUS) -> dict:
         """
         Create the VNF Segmentations plan
 
         :param vnf_names: List of the vnf names
+        :param mode: How the chain is split in segments.
         :return: :dict
         """
-        segmentation_plans = Komby.partitions(vnf_names)
+        if mode not in SPEEDHelper.VALID_SEGMENTATION_MODES:
+            raise TypeError("The segmentation mode {} is invalid".format(mode))
+
+        # Komby creates the contiguous segments.
+        if mode == SPEEDHelper.SEGMENTATION_CONTIGUOUS:
+            segmentation_plans = Komby.partitions(vnf_names)
+        else:
+            segmentation_plans = [
+                [[vnf_names[i] for i in segment] for segment in segments]
+                for count_plan, segments in SPEEDHelper.iter_segment_positions(
+                    amount_vnfs=len(vnf_names),
+                    mode=mode,
+                    valid_segment=lambda segment: True
+                )
+            ]
 
         plans = dict()
         count_plan = 0
@@ -39,12 +92,7 @@ class SPEEDHelper(Helper):
             plans[plan_name]['segments'] = segments
 
         # Returns only the plan with the biggest segment
-        biggest_segment = False
-        try:
-            if os.environ["BIGGEST_SEGMENT"] == "True":
-                biggest_segment = True
-        except KeyError as ke:
-            pass
+        biggest_segment = SPEEDHelper.biggest_segment()
 
         # Select only the biggest plan.
         if biggest_segment:
@@ -61,6 +109,247 @@ class SPEEDHelper(Helper):
 
         return plans
 
+    @staticmethod
+    def iter_vnf_segmentation(vnf_names: List[str], segment_zones: Callable[[List[str]], List[str]],
+                              mode: str = SEGMENTATION_CONTIGUOUS,
+                              search: str = SEARCH_ALL) -> Iterator[Tuple[str, dict]]:
+        """
+        Yield the VNF Segmentation plans where all the segments can be executed by at least one zone. The plans have
+        the same names and are in the same order of vnf_segmentation.
+
+        The plans are created segment by segment, and when a segment can not be executed by any zone none of the plans
+        with the same partial segments are created.
+
+        :param vnf_names: List of the vnf names
+        :param segment_zones: Function that returns the name of the zones that can execute all the VNFs of a segment.
+        :param mode: How the chain is split in segments.
+        :param search: Which valid plans are created.
+        :return: Iterator of (plan name, plan), the zones of each segment are already defined.
+        """
+        if mode not in SPEEDHelper.VALID_SEGMENTATION_MODES:
+            raise TypeError("The segmentation mode {} is invalid".format(mode))
+
+        if search not in SPEEDHelper.VALID_SEARCH_MODES:
+            raise TypeError("The search mode {} is invalid".format(search))
+
+        # the zones of each segment are computed only once
+        zones_cache: Dict[Tuple[int, ...], List[str]] = dict()
+
+        def zones(segment: Tuple[int, ...]) -> List[str]:
+            if segment not in zones_cache:
+                zones_cache[segment] = segment_zones([vnf_names[i] for i in segment])
+            return zones_cache[segment]
+
+        def valid_segment(segment: Tuple[int, ...]) -> bool:
+            return len(zones(segment)) > 0
+
+        def min_segment_plans():
+            for amount_segments in range(1, amount_vnfs + 1):
+                found = False
+                for aux_plan in SPEEDHelper.iter_segment_positions(
+                    amount_vnfs=amount_vnfs,
+                    mode=mode,
+                    valid_segment=valid_segment,
+                    amount_segments=amount_segments
+                ):
+                    found = True
+                    yield aux_plan
+
+                if found:
+                    return
+
+        amount_vnfs = len(vnf_names)
+        if not amount_vnfs:
+            return
+
+        # The plan with the biggest segment is the first plan.
+        if SPEEDHelper.biggest_segment():
+            segment = tuple(range(amount_vnfs))
+            if valid_segment(segment):
+                plans = [(0, [segment])]
+            else:
+                plans = []
+        elif search == SPEEDHelper.SEARCH_MIN_SEGMENTS:
+            plans = min_segment_plans()
+        else:
+            plans = SPEEDHelper.iter_segment_positions(
+                amount_vnfs=amount_vnfs,
+                mode=mode,
+                valid_segment=valid_segment
+            )
+
+        for count_plan, segments in plans:
+            plan_segments = dict()
+            for count_segments, segment in enumerate(segments):
+                plan_segments["seg_{}".format(count_segments)] = {
+                    "vnfs": [vnf_names[i] for i in segment],
+                    "zones": list(zones(segment))
+                }
+
+            yield "plan_{}".format(count_plan), {'segments': plan_segments}
+
+    @staticmethod
+    def iter_template_segmentation(vnf_names: List[str], template: SegmentationTemplate,
+                                   validity: SegmentationValidity) -> Iterator[Tuple[str, dict]]:
+        """
+        Yield the VNF Segmentation plans of a template where all the segments can be executed by at least one zone, the
+        same plans of iter_vnf_segmentation.
+
+        The template is never changed, the zones of each segment are read from the validity of the template.
+
+        :param vnf_names: List of the vnf names
+        :param template: The segmentation template of the chain.
+        :param validity: The zones that can execute each segment of the template.
+        :return: Iterator of (plan name, plan), the zones of each segment are already defined.
+        """
+        valid_plans = np.flatnonzero(validity.valid)
+
+        # The plan with the biggest segment is the first plan.
+        if SPEEDHelper.biggest_segment():
+            valid_plans = valid_plans[valid_plans == 0]
+
+        for i in valid_plans:
+            count_plan, segments = template.plans[i]
+
+            plan_segments = dict()
+            for count_segments, segment in enumerate(segments):
+                plan_segments["seg_{}".format(count_segments)] = {
+                    "vnfs": [vnf_names[j] for j in segment],
+                    "zones": [validity.zones[z] for z in np.flatnonzero(validity.hosts[i, count_segments])]
+                }
+
+            yield "plan_{}".format(count_plan), {'segments': plan_segments}
+
+    @staticmethod
+    def segmentation_validity(template: SegmentationTemplate, zone_names: List[str],
+                              zone_masks: np.ndarray) -> SegmentationValidity:
+        """
+        Check which zones can execute each segment of all the plans of a template at once. A zone can execute a segment
+        if the segment mask has no bit out of the zone mask.
+
+        :param template: The segmentation template of the chain.
+        :param zone_names: The name of the zones.
+        :param zone_masks: The bitmask of the positions of the chain with a VNF available in each zone.
+        :return:
+        """
+        hosts = (template.masks[:, :, np.newaxis] & ~zone_masks[np.newaxis, np.newaxis, :]) == 0
+        valid = hosts.any(axis=2).all(axis=1)
+
+        return SegmentationValidity(zones=zone_names, hosts=hosts, valid=valid)
+
+    @staticmethod
+    def positions_mask(positions) -> int:
+        """
+        The bitmask of positions of a chain.
+
+        :param positions: The positions.
+        :return:
+        """
+        mask = 0
+        for position in positions:
+            mask |= 1 << position
+
+        return mask
+
+    @staticmethod
+    def iter_segment_positions(amount_vnfs: int, mode: str, valid_segment: Callable[[Tuple[int, ...]], bool],
+                               amount_segments: int = None) -> Iterator[Tuple[int, List]]:
+        """
+        Yield the segmentation plans of a chain as the positions of the VNFs of each segment. The plans are created
+        segment by segment, and a partial plan with an invalid segment is discarded with all its plans. The number of
+        each plan is its position when no plan is discarded.
+
+        * Contiguous: The first segment is as big as possible, the same order of Komby.partitions.
+        * Set partition: Each VNF joins one of the segments already created, or creates a new segment. The first plan
+          has only one segment.
+
+        :param amount_vnfs: The amount of VNFs in the chain.
+        :param mode: How the chain is split in segments.
+        :param valid_segment: Function that returns if a segment, a tuple with the positions of its VNFs, is valid.
+        :param amount_segments: When informed only the plans with this amount of segments are created.
+        :return: Iterator of (plan number, list of segments).
+        """
+        def fits(amount_created: int, amount_next: int) -> bool:
+            # the plan can still have exactly the amount of segments requested
+            if amount_segments is None:
+                return True
+            return amount_created <= amount_segments <= amount_created + amount_next
+
+        def contiguous(start: int, segments: List[Tuple[int, ...]], count_plan: int):
+            if start == amount_vnfs:
+                yield count_plan, segments
+                return
+
+            for end in range(amount_vnfs, start, -1):
+                segment = tuple(range(start, end))
+                if fits(len(segments) + 1, amount_vnfs - end) and valid_segment(segment):
+                    yield from contiguous(end, segments + [segment], count_plan)
+                count_plan += SPEEDHelper.amount_segmentation_plans(amount_vnfs - end)
+
+        # When a VNF joins a segment, the segment can only be executed by the same or less zones than before. Thus
+        # no plan with an invalid partial segment is valid.
+        def set_partition(position: int, segments: List[Tuple[int, ...]], count_plan: int):
+            if position == amount_vnfs:
+                yield count_plan, segments
+                return
+
+            amount_next = amount_vnfs - position - 1
+            for i in range(len(segments)):
+                segment = segments[i] + (position,)
+                if fits(len(segments), amount_next) and valid_segment(segment):
+                    yield from set_partition(position + 1, segments[:i] + [segment] + segments[i + 1:], count_plan)
+                count_plan += SPEEDHelper.amount_set_partition_plans(amount_next, len(segments))
+
+            segment = (position,)
+            if fits(len(segments) + 1, amount_next) and valid_segment(segment):
+                yield from set_partition(position + 1, segments + [segment], count_plan)
+
+        if mode == SPEEDHelper.SEGMENTATION_SET_PARTITION:
+            return set_partition(0, [], 0)
+
+        return contiguous(0, [], 0)
+
+    @staticmethod
+    def amount_segmentation_plans(amount_vnfs: int) -> int:
+        """
+        The amount of VNF Segmentation plans of a chain, each plan splits the chain in segments of consecutive VNFs.
+
+        :param amount_vnfs: The amount of VNFs in the chain.
+        :return:
+        """
+        if amount_vnfs == 0:
+            return 1
+
+        return 2 ** (amount_vnfs - 1)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def amount_set_partition_plans(amount_vnfs: int, amount_segments: int) -> int:
+        """
+        The amount of ways to place the VNFs in the segments already created or in new segments.
+
+        :param amount_vnfs: The amount of VNFs not placed.
+        :param amount_segments: The amount of segments already created.
+        :return:
+        """
+        if amount_vnfs == 0:
+            return 1
+
+        return amount_segments * SPEEDHelper.amount_set_partition_plans(amount_vnfs - 1, amount_segments) + \
+            SPEEDHelper.amount_set_partition_plans(amount_vnfs - 1, amount_segments + 1)
+
+    @staticmethod
+    def biggest_segment() -> bool:
+        """
+        If only the plan with the biggest segment must be used, defined by the environment var BIGGEST_SEGMENT.
+
+        :return:
+        """
+        try:
+            return os.environ["BIGGEST_SEGMENT"] == "True"
+        except KeyError as ke:
+            return False
+
     @staticmethod
     def show_infrastructure_data(infrastructure_data: InfrastructureData):  # pragma: no cover
         """
@@ -69,28 +358,19 @@ class SPEEDHelper(Helper):
         :param infrastructure_data: The Infrastructure Data object.
         :return:
         """
-        if not type(infrastructure_data) == dict:
+        if not type(infrastructure_data) == InfrastructureData:
             raise TypeError("The data must be a InfrastructureData object.")
 
         table = BeautifulTable()
 
-        zone: str
-        vnf: str
-        gw: str
-        delay: int
-        node: str
-        cost: float
-        cpu_available: int
-        mem_available: int
-
-        table.rows.append([infrastructure_data['zone']])
-        table.rows.append([infrastructure_data['node']])
-        table.rows.append([infrastructure_data['vnf']])
-        table.rows.append([infrastructure_data['gw']])
-        table.rows.append([infrastructure_data['delay']])
-        table.rows.append([infrastructure_data['cost']])
-        table.rows.append([infrastructure_data['cpu_available']])
-        table.rows.append([infrastructure_data['mem_available']])
+        table.rows.append([infrastructure_data.zone])
+        table.rows.append([infrastructure_data.node])
+        table.rows.append([infrastructure_data.vnf])
+        table.rows.append([infrastructure_data.gw])
+        table.rows.append([infrastructure_data.delay])
+        table.rows.append([infrastructure_data.cost])
+        table.rows.append([infrastructure_data.cpu_available])
+        table.rows.append([infrastructure_data.mem_available])
 
         table.rows.header = [
             "Zone",
@@ -114,19 +394,17 @@ class SPEEDHelper(Helper):
         :param aggregated_data: The Aggregated data object.
         :return:
         """
-        if not type(aggregated_data) == dict:
+        if not type(aggregated_data) == AggregatedData:
             raise TypeError("The data must be a AggregatedData object.")
 
         table = BeautifulTable()
 
-        table.rows.append([aggregated_data['zone']])
-        table.rows.append([aggregated_data['vnf']])
-        table.rows.append([aggregated_data['gw']])
-        table.rows.append([aggregated_data['delay']])
-        table.rows.append([aggregated_data['cost']])
+        table.rows.append([aggregated_data.vnf])
+        table.rows.append([aggregated_data.gw])
+        table.rows.append([aggregated_data.delay])
+        table.rows.append([aggregated_data.cost])
 
         table.rows.header = [
-            "Zone",
             "VNF",
             "GW",
             "Delay",
@@ -0,0 +1,32 @@
+import hashlib
+
+import networkx as nx
+from SimPlacement.helper import Helper
+
+
+class TopologyHelper(Helper):
+
+    @staticmethod
+    def fingerprint(graph: nx.Graph) -> str:
+        """
+        Return a fingerprint of the topology. Two topologies with the same nodes, links and link delays have the same
+        fingerprint.
+
+        :param graph: The topology graph.
+        :return: The hex digest of the topology.
+        """
+        digest = hashlib.sha1()
+
+        for node_name in sorted(str(node) for node in graph.nodes):
+            digest.update("n;{}\n".format(node_name).encode())
+
+        edges = []
+        for src, dst, data in graph.edges(data=True):
+            if not graph.is_directed():
+                src, dst = sorted([str(src), str(dst)])
+            edges.append("e;{};{};{}\n".format(src, dst, data.get("delay")))
+
+        for edge in sorted(edges):
+            digest.update(edge.encode())
+
+        return digest.hexdigest()
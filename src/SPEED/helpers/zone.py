@@ -9,6 +9,7 @@ from beautifultable import BeautifulTable
 from SimPlacement.helper import Helper
 from SimPlacement.entities.domain import Domain
 from SPEED.entities.zone import Zone
+from SPEED.zone_tree import ZoneTree
 import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
 import networkx as nx
@@ -145,7 +146,7 @@ class ZoneHelper(Helper):
         return graph
 
     @staticmethod
-    def get_random_compute_zone(mother_zone: Zone, zone_tree: nx.Graph) -> str:
+    def get_random_compute_zone(mother_zone: Zone, zone_tree: ZoneTree) -> str:
         """
         Return a random compute zone name that is child of the zone.
 
@@ -153,16 +154,11 @@ class ZoneHelper(Helper):
         :param zone_tree: The zone tree.
         :return:
         """
-        descendants = nx.descendants(zone_tree, mother_zone.name)
-        descendants_compute = []
-
         # if the zone is already a compute zone.
         if mother_zone.zone_type == "compute":
             return mother_zone.name
 
-        for d in descendants:
-            if zone_tree.nodes[d]['zone_type'] == "compute":
-                descendants_compute.append(d)
+        descendants_compute = zone_tree.compute_descendants(mother_zone.name)
 
         if not descendants_compute:
             raise TypeError("There are no compute zones bellow the zone {}.".format(mother_zone.name))
@@ -363,25 +359,74 @@ class ZoneHelper(Helper):
         return digstr
 
     @staticmethod
-    def generate_random_tree_with_max_height(max_height: int, num_aggregation_zones: int):
+    def generate_random_tree_with_max_height(max_height: int, num_aggregation_zones: int, seed: int = None,
+                                             max_children: int = None) -> nx.DiGraph:
         """
         Generate a tree with a max_height
 
         Used to build the aggregation zone topology.
 
+        The tree is built in linear time. First a path with max_height edges is created, then each other zone is added
+        as child of a random zone with depth lower than max_height that can have more child zones, thus the height of
+        the tree is always max_height. The zones are labeled with a random permutation.
+
         :param max_height: Tree max height.
         :param num_aggregation_zones: Amount of aggregation zones.
+        :param seed: The seed of the random generator, if not informed the global random generator is used.
+        :param max_children: The max amount of child zones of each zone, if not informed it is unlimited.
         :return:
         """
+        if max_height < 0 or num_aggregation_zones < max_height + 1:
+            raise TypeError("It is not possible to generate a tree with {} zones and height {}.".format(
+                num_aggregation_zones, max_height))
 
-        tree = nx.DiGraph()
+        if max_children is not None and max_children < 1:
+            raise TypeError("The max amount of child zones must be greater than 0.")
+
+        rng = random.Random(seed) if seed is not None else random
+
+        parents = [-1] * num_aggregation_zones
+        depth = [0] * num_aggregation_zones
+        amount_children = [0] * num_aggregation_zones
+
+        # the zones that can have more child zones without changing the height of the tree
+        candidates = list()
+
+        for zone in range(1, max_height + 1):
+            parents[zone] = zone - 1
+            depth[zone] = zone
+            amount_children[zone - 1] = 1
 
-        height = -1
+        for zone in range(0, max_height):
+            if max_children is None or max_children > 1:
+                candidates.append(zone)
 
-        while height != max_height:
-            tree: nx.DiGraph = nx.random_tree(n=num_aggregation_zones, create_using=nx.DiGraph)
+        for zone in range(max_height + 1, num_aggregation_zones):
+            if not candidates:
+                raise TypeError("It is not possible to generate a tree with {} zones, height {} and {} child zones "
+                                "per zone.".format(num_aggregation_zones, max_height, max_children))
 
-            # Get the longest path length in the DiGraph
-            height = nx.dag_longest_path_length(tree)
+            i = rng.randrange(len(candidates))
+            parent = candidates[i]
+
+            parents[zone] = parent
+            depth[zone] = depth[parent] + 1
+            amount_children[parent] += 1
+
+            if max_children is not None and amount_children[parent] >= max_children:
+                candidates[i] = candidates[-1]
+                candidates.pop()
+
+            if depth[zone] < max_height:
+                candidates.append(zone)
+
+        labels = list(range(num_aggregation_zones))
+        rng.shuffle(labels)
+
+        tree = nx.DiGraph()
+        tree.add_nodes_from(range(num_aggregation_zones))
+        tree.add_edges_from(
+            (labels[parents[zone]], labels[zone]) for zone in range(num_aggregation_zones) if parents[zone] != -1
+        )
 
         return tree
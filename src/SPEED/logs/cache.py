@@ -0,0 +1,71 @@
+import csv
+import os
+
+import pandas as pd
+
+from SimPlacement.logs.log import Log
+
+
+class CacheLog(Log):
+    """
+    This class manages the cache logs.
+    """
+    NAME = "cache"
+
+    COLUMNS = ["Event", "Time", "Cache", "Entries", "Hits", "Misses", "Evictions", "HitRate"]
+    """
+    The column title of the CSV file.
+    """
+
+    FILE_NAME = "cache.csv"
+    """
+    Name of the CSV file.
+    """
+
+    STATS = "STATS"
+    """
+    Caused when the counters of a cache are saved, at the end of the simulation.
+    """
+
+    def __init__(self):
+        """
+        Cache logs.
+        """
+        self.events = list()
+
+    def add_event(self, event: str, time: int, cache_name: str, stats: dict):
+        """
+        Add a new event.
+
+        :param event: The name of the event.
+        :param time: Time of the event.
+        :param cache_name: The name of the cache.
+        :param stats: The counters of the cache.
+
+        :return:
+        """
+
+        log = [
+            event,
+            "{:.2f}".format(time),
+            cache_name,
+            stats['entries'],
+            stats['hits'],
+            stats['misses'],
+            stats['evictions'],
+            "{:.4f}".format(stats['hit_rate'])
+        ]
+        self.events.insert(0, log)
+
+    def save(self, file_path="."):
+        """
+        Save the events.
+
+        :param file_path: The path where the log file will be created.
+        """
+        if not os.path.exists(file_path):
+            os.makedirs(file_path)  # pragma: no cover
+
+        file_name = "{}/{}".format(file_path, self.FILE_NAME)
+        df = self.flush(pd.DataFrame(columns=self.COLUMNS), self.events)
+        df.to_csv(file_name, sep=';', index=False, quoting=csv.QUOTE_NONE)
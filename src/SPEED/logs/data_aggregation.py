@@ -14,7 +14,7 @@ class DataAggregationLog(Log):
     """
     NAME = "data_aggregation"
 
-    COLUMNS = ["Event", "Time", "Zone", "Size", "Data"]
+    COLUMNS = ["Event", "Time", "Zone", "Size", "Delta", "Records", "EncodeTime", "Data"]
     """
     The column title of the CSV file.
     """
@@ -29,21 +29,31 @@ class DataAggregationLog(Log):
     Caused when the data aggregation is computed.
     """
 
+    RECEIVED = "RECEIVED"
+    """
+    Caused when the data sent by a child zone arrives at the parent zone, the data is the name of the child zone.
+    """
+
     def __init__(self):
         """
         Segment logs.
         """
         self.events = list()
 
-    def add_event(self, event: str, time: int, zone_name: str, size: int, data):
+    def add_event(self, event: str, time: int, zone_name: str, size: int, data, delta_size: int = 0,
+                  encode_time: float = 0.0, records: int = 0):
         """
         Add a new event.
 
         :param event: The name of the event.
         :param time: Time of the event.
         :param zone_name: The name of the Zone.
-        :param size: The data aggregation size.
+        :param size: The size in bytes of the encoded message sent to the parent zone.
         :param data: The aggregated data.
+        :param delta_size: The amount of entries in the delta sent to the parent zone.
+        :param encode_time: The time in seconds to encode the message.
+        :param records: The amount of aggregated records sent in the message, in the Pareto summary mode all the
+        records of the fronts are included.
 
         :return:
         """
@@ -53,6 +63,9 @@ class DataAggregationLog(Log):
             "{:.2f}".format(time),
             zone_name,
             size,
+            delta_size,
+            records,
+            "{:.6f}".format(encode_time),
             data
         ]
         self.events.insert(0, log)
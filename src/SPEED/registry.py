@@ -0,0 +1,88 @@
+from typing import Dict, List, Tuple
+
+
+class NameInterner:
+    """
+    Map names to sequential integer ids, the same name always receives the same id.
+    """
+
+    def __init__(self):
+        """
+        Create an empty interner.
+        """
+        self.ids: Dict[str, int] = dict()
+        """
+        The id of each name.
+        """
+
+        self.names: List[str] = list()
+        """
+        The name of each id, the id is the position in the list.
+        """
+
+    def intern(self, name: str) -> int:
+        """
+        Return the id of the name, a new id is created if the name was not interned before.
+
+        :param name: The name.
+        :return: The id of the name.
+        """
+        name_id = self.ids.get(name)
+
+        if name_id is None:
+            name_id = len(self.names)
+            self.ids[name] = name_id
+            self.names.append(name)
+
+        return name_id
+
+    def name(self, name_id: int) -> str:
+        """
+        Return the name of an id.
+
+        :param name_id: The id.
+        :return: The name.
+        """
+        if name_id < 0 or name_id >= len(self.names):
+            raise TypeError("The id {} was not interned.".format(name_id))
+
+        return self.names[name_id]
+
+    def __len__(self):
+        return len(self.names)
+
+
+class NameRegistry:
+    """
+    The interned ids of the zones, VNFs and GWs. All the SPEED components of a simulation share the same registry,
+    thus the ids are the same in all the zones.
+    """
+
+    def __init__(self):
+        """
+        Create an empty registry.
+        """
+        self.zones: NameInterner = NameInterner()
+        """
+        The ids of the zones.
+        """
+
+        self.vnfs: NameInterner = NameInterner()
+        """
+        The ids of the VNFs.
+        """
+
+        self.gws: NameInterner = NameInterner()
+        """
+        The ids of the GW nodes.
+        """
+
+    def aggregated_key(self, gw_name: str, vnf_name: str) -> Tuple[int, int]:
+        """
+        Return the key of the aggregated data of a GW and a VNF.
+
+        :param gw_name: The name of the GW.
+        :param vnf_name: The name of the VNF.
+        :return: The tuple (gw id, vnf id).
+        """
+        return self.gws.intern(gw_name), self.vnfs.intern(vnf_name)
@@ -0,0 +1,204 @@
+from collections import OrderedDict
+from typing import List, Tuple
+
+import numpy as np
+
+from SPEED.helpers.speed import SPEEDHelper
+from SPEED.types import SegmentationTemplate
+
+
+class SegmentationTemplateCache:
+    """
+    Cache of the segmentation templates of the chains, keyed by the ordered names of the VNFs and the segmentation
+    mode.
+
+    A template has only the positions and the bitmasks of the VNFs of each segment, it is immutable and shared by all
+    the zones. The zones that can execute each segment are computed in each lookup and never written in the template.
+    When the cache is full the least recently used template is evicted.
+
+    The template has all the plans of the chain, thus it is only created for short chains. The longer chains must use
+    the generator of the valid plans, that prunes the invalid segments without creating all the plans.
+    """
+
+    DEFAULT_MAX_ENTRIES = 128
+    """
+    The default amount of templates in the cache.
+    """
+
+    MAX_VNFS = 14
+    """
+    The max amount of VNFs of a chain with template, 2^13 contiguous segmentation plans.
+    """
+
+    MAX_PLANS = 2 ** 13
+    """
+    The max amount of plans of a template, the set partitions grow faster than the contiguous segmentation plans.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Create an empty cache.
+
+        :param max_entries: The max amount of templates in the cache.
+        """
+        self.max_entries = max_entries
+
+        self.entries: "OrderedDict[Tuple[Tuple[str, ...], str], SegmentationTemplate]" = OrderedDict()
+        """
+        The cached templates, from the least to the most recently used.
+        """
+
+        self.hits = 0
+        """
+        Amount of lookups that found the template.
+        """
+
+        self.misses = 0
+        """
+        Amount of lookups that created the template.
+        """
+
+        self.evictions = 0
+        """
+        Amount of templates removed to respect the max amount of templates.
+        """
+
+    @property
+    def max_entries(self):
+        """
+        The max amount of templates in the cache.
+        """
+        return self._max_entries
+
+    @max_entries.setter
+    def max_entries(self, value: int):
+        """
+        Set the max amount of templates in the cache.
+        """
+        if not type(value) == int or value <= 0:
+            raise TypeError("The max_entries must be an int greater than 0.")
+
+        self._max_entries = value
+
+        if hasattr(self, 'entries'):
+            while len(self.entries) > self._max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, vnf_names: List[str], mode: str = SPEEDHelper.SEGMENTATION_CONTIGUOUS) -> SegmentationTemplate:
+        """
+        Return the template of a chain, the template is created if it is not cached.
+
+        :param vnf_names: The ordered names of the VNFs of the chain.
+        :param mode: How the chain is split in segments.
+        :return:
+        """
+        key = (tuple(vnf_names), mode)
+        template = self.entries.get(key)
+
+        if template is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return template
+
+        self.misses += 1
+        template = self.create_template(len(vnf_names), mode)
+
+        self.entries[key] = template
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+        return template
+
+    @staticmethod
+    def create_template(amount_vnfs: int, mode: str) -> SegmentationTemplate:
+        """
+        Create the template with all the segmentation plans of a chain.
+
+        :param amount_vnfs: The amount of VNFs in the chain.
+        :param mode: How the chain is split in segments.
+        :return:
+        """
+        if mode not in SPEEDHelper.VALID_SEGMENTATION_MODES:
+            raise TypeError("The segmentation mode {} is invalid".format(mode))
+
+        if not SegmentationTemplateCache.supports(amount_vnfs, mode):
+            raise TypeError("The chain with {} VNFs has too many segmentation plans for a template.".format(
+                amount_vnfs))
+
+        plans = ()
+        if amount_vnfs:
+            plans = tuple(
+                (count_plan, tuple(segments))
+                for count_plan, segments in SPEEDHelper.iter_segment_positions(
+                    amount_vnfs=amount_vnfs,
+                    mode=mode,
+                    valid_segment=lambda segment: True
+                )
+            )
+
+        masks = np.zeros((len(plans), amount_vnfs), dtype=np.int64)
+        for i, (count_plan, segments) in enumerate(plans):
+            for j, segment in enumerate(segments):
+                masks[i, j] = SPEEDHelper.positions_mask(segment)
+
+        # the templates are shared, thus the masks can not be changed
+        masks.setflags(write=False)
+
+        return SegmentationTemplate(plans=plans, masks=masks)
+
+    @staticmethod
+    def supports(amount_vnfs: int, mode: str) -> bool:
+        """
+        Check if the template of a chain can be created, the amount of plans is bounded by MAX_PLANS.
+
+        :param amount_vnfs: The amount of VNFs in the chain.
+        :param mode: How the chain is split in segments.
+        :return:
+        """
+        if amount_vnfs > SegmentationTemplateCache.MAX_VNFS:
+            return False
+
+        if mode == SPEEDHelper.SEGMENTATION_SET_PARTITION:
+            amount_plans = SPEEDHelper.amount_set_partition_plans(amount_vnfs, 0)
+        else:
+            amount_plans = SPEEDHelper.amount_segmentation_plans(amount_vnfs)
+
+        return amount_plans <= SegmentationTemplateCache.MAX_PLANS
+
+    def clear(self):
+        """
+        Remove all the cached templates, the counters are kept.
+
+        :return:
+        """
+        self.entries.clear()
+
+    def hit_rate(self) -> float:
+        """
+        The fraction of the lookups that found the template.
+
+        :return:
+        """
+        total = self.hits + self.misses
+
+        if total == 0:
+            return 0.0
+
+        return self.hits / total
+
+    def stats(self) -> dict:
+        """
+        Return the cache counters.
+
+        :return:
+        """
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate()
+        }
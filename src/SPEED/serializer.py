@@ -0,0 +1,252 @@
+import bz2
+import lzma
+import pickle
+import struct
+import time
+import zlib
+from typing import Dict, List, Tuple
+
+from SPEED.types import AggregatedData
+from SPEED.types import AggregatedKey
+from SPEED.types import AggregatedFront
+from SPEED.types import AggregationDelta
+
+
+class AggregationSerializer:
+    """
+    Encode the aggregated data messages sent from a child zone to its parent zone. It is used to measure the real size
+    of the messages and the time to create them.
+
+    The encoding defines how the message is packed and the compression is applied over the packed message. Only the
+    compressions of the standard library are available.
+    """
+
+    ENCODING_BINARY = "binary"
+    """
+    Pack the message with fixed size little endian records, the ids as uint32 and the delay and cost as float64.
+    """
+
+    ENCODING_PICKLE = "pickle"
+    """
+    Pack the message with pickle, used as reference to compare the encodings.
+    """
+
+    VALID_ENCODINGS = [ENCODING_BINARY, ENCODING_PICKLE]
+    """
+    Constant used to define the valid encodings.
+    """
+
+    COMPRESSION_NONE = "none"
+    COMPRESSION_ZLIB = "zlib"
+    COMPRESSION_BZ2 = "bz2"
+    COMPRESSION_LZMA = "lzma"
+
+    VALID_COMPRESSIONS = [COMPRESSION_NONE, COMPRESSION_ZLIB, COMPRESSION_BZ2, COMPRESSION_LZMA]
+    """
+    Constant used to define the valid compressions.
+    """
+
+    HEADER = struct.Struct("<IIIIII")
+    """
+    The header of the binary message (zone, seq, base_seq, amount of upserts, amount of removed keys, amount of
+    records of the Pareto fronts).
+    """
+
+    RECORD = struct.Struct("<IIdd")
+    """
+    An upserted record of the binary message (vnf, gw, delay, cost). When the message has Pareto fronts, the records
+    of each front are sent one after another, instead of only the upserted records.
+    """
+
+    KEY = struct.Struct("<II")
+    """
+    A removed key of the binary message (gw, vnf).
+    """
+
+    def __init__(self, encoding: str = ENCODING_BINARY, compression: str = COMPRESSION_NONE):
+        """
+        Create the serializer.
+
+        :param encoding: How the message is packed.
+        :param compression: The compression applied over the packed message.
+        """
+        self.encoding = encoding
+        self.compression = compression
+
+    @property
+    def encoding(self):
+        """
+        How the message is packed.
+        """
+        return self._encoding
+
+    @encoding.setter
+    def encoding(self, value: str):
+        """
+        Set the encoding.
+        """
+        if value not in AggregationSerializer.VALID_ENCODINGS:
+            raise TypeError("The encoding must be one of {}.".format(", ".join(AggregationSerializer.VALID_ENCODINGS)))
+
+        self._encoding = value
+
+    @property
+    def compression(self):
+        """
+        The compression applied over the packed message.
+        """
+        return self._compression
+
+    @compression.setter
+    def compression(self, value: str):
+        """
+        Set the compression.
+        """
+        if value not in AggregationSerializer.VALID_COMPRESSIONS:
+            raise TypeError("The compression must be one of {}.".format(
+                ", ".join(AggregationSerializer.VALID_COMPRESSIONS)
+            ))
+
+        self._compression = value
+
+    def encode(self, delta: AggregationDelta) -> bytes:
+        """
+        Encode a message.
+
+        :param delta: The message sent to the parent zone.
+        :return: The encoded message.
+        """
+        if self.encoding == AggregationSerializer.ENCODING_PICKLE:
+            data = pickle.dumps(
+                (delta.zone, delta.seq, delta.base_seq, list(delta.upserts.values()), list(delta.removed),
+                 list(delta.fronts.values())),
+                protocol=pickle.HIGHEST_PROTOCOL
+            )
+        else:
+            parts = [AggregationSerializer.HEADER.pack(
+                delta.zone, delta.seq, delta.base_seq, len(delta.upserts), len(delta.removed),
+                self.amount_front_records(delta)
+            )]
+            pack_record = AggregationSerializer.RECORD.pack
+            if delta.fronts:
+                for front in delta.fronts.values():
+                    for aux_data in front:
+                        parts.append(pack_record(*aux_data))
+            else:
+                for aux_data in delta.upserts.values():
+                    parts.append(pack_record(*aux_data))
+            pack_key = AggregationSerializer.KEY.pack
+            for key in delta.removed:
+                parts.append(pack_key(*key))
+            data = b"".join(parts)
+
+        return self.compress(data)
+
+    def decode(self, data: bytes) -> AggregationDelta:
+        """
+        Decode a message.
+
+        :param data: The encoded message.
+        :return: The message sent to the parent zone.
+        """
+        data = self.decompress(data)
+
+        if self.encoding == AggregationSerializer.ENCODING_PICKLE:
+            zone, seq, base_seq, records, removed, front_records = pickle.loads(data)
+            front_records = [aux_data for front in front_records for aux_data in front]
+        else:
+            zone, seq, base_seq, amount_upserts, amount_removed, amount_front_records = \
+                AggregationSerializer.HEADER.unpack_from(data, 0)
+            offset = AggregationSerializer.HEADER.size
+
+            amount_records = amount_front_records if amount_front_records else amount_upserts
+            size = amount_records * AggregationSerializer.RECORD.size
+            records = list(AggregationSerializer.RECORD.iter_unpack(data[offset:offset + size]))
+            offset += size
+
+            size = amount_removed * AggregationSerializer.KEY.size
+            removed = list(AggregationSerializer.KEY.iter_unpack(data[offset:offset + size]))
+
+            front_records = []
+            if amount_front_records:
+                front_records = records
+
+        # the records of the same key are sent one after another
+        fronts: Dict[AggregatedKey, AggregatedFront] = dict()
+        for aux_data in front_records:
+            aux_data = AggregatedData(*aux_data)
+            key = (aux_data.gw, aux_data.vnf)
+            fronts[key] = fronts.get(key, ()) + (aux_data,)
+
+        upserts: Dict[AggregatedKey, AggregatedData] = dict()
+        if fronts:
+            for key, front in fronts.items():
+                upserts[key] = front[0]
+        else:
+            for aux_data in records:
+                aux_data = AggregatedData(*aux_data)
+                upserts[(aux_data.gw, aux_data.vnf)] = aux_data
+
+        aux_removed: List[AggregatedKey] = [tuple(key) for key in removed]
+
+        return AggregationDelta(zone=zone, seq=seq, base_seq=base_seq, upserts=upserts, removed=aux_removed,
+                                fronts=fronts)
+
+    @staticmethod
+    def amount_front_records(delta: AggregationDelta) -> int:
+        """
+        The amount of records of all the Pareto fronts of a message.
+
+        :param delta: The message sent to the parent zone.
+        :return:
+        """
+        return sum(len(front) for front in delta.fronts.values())
+
+    def measure(self, delta: AggregationDelta) -> Tuple[int, float]:
+        """
+        Encode a message and measure it.
+
+        :param delta: The message sent to the parent zone.
+        :return: The size of the encoded message in bytes and the time in seconds to encode it.
+        """
+        start = time.perf_counter()
+        data = self.encode(delta)
+        encode_time = time.perf_counter() - start
+
+        return len(data), encode_time
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        Apply the compression.
+
+        :param data: The packed message.
+        :return:
+        """
+        if self.compression == AggregationSerializer.COMPRESSION_ZLIB:
+            return zlib.compress(data)
+
+        if self.compression == AggregationSerializer.COMPRESSION_BZ2:
+            return bz2.compress(data)
+
+        if self.compression == AggregationSerializer.COMPRESSION_LZMA:
+            return lzma.compress(data)
+
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        """
+        Revert the compression.
+
+        :param data: The compressed message.
+        :return:
+        """
+        if self.compression == AggregationSerializer.COMPRESSION_ZLIB:
+            return zlib.decompress(data)
+
+        if self.compression == AggregationSerializer.COMPRESSION_BZ2:
+            return bz2.decompress(data)
+
+        if self.compression == AggregationSerializer.COMPRESSION_LZMA:
+            return lzma.decompress(data)
+
+        return data
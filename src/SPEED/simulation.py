@@ -1,12 +1,12 @@
+import math
 import os
 import random
-from sys import getsizeof
+from concurrent.futures import Future, ProcessPoolExecutor
 
-import networkx as nx
 import numpy as np
 import simpy
 
-from typing import Dict, List
+from typing import Dict, List, Optional, Set
 
 from SimPlacement.entities.node import Node
 from SimPlacement.entities.packet import Packet
@@ -18,7 +18,6 @@ from SimPlacement.log import SimLog
 from SimPlacement.logs.sfc_instance import SFCInstanceLog
 from SimPlacement.logs.virtual_link import VirtualLinkLog
 from SimPlacement.sdn_controller import SDNController
-from SimPlacement.topology import Topology
 from SimPlacement.types import SFCPlacementPlan
 from SimPlacement.logs.placement import PlacementLog
 from SimPlacement.logs.packet import PacketLog
@@ -29,14 +28,24 @@ from SimPlacement.entities.sfc_instance import SFCInstance
 from SPEED.entities.distributed_service import DistributedService
 from SPEED.distributed_service_manager import DistributedServiceManager
 from SPEED.entities.zone import Zone
+from SPEED.gateway_delay_matrix import GatewayDelayMatrix
 from SPEED.helpers.zone import ZoneHelper
 from SPEED.helpers.speed import SPEEDHelper
 from SPEED.helpers.distributed_service import DistributedServiceHelper
 from SPEED.logs.distributed_placement import DistributedPlacementLog
 from SPEED.logs.distributed_service import DistributedServiceLog
+from SPEED.logs.cache import CacheLog
 from SPEED.logs.data_aggregation import DataAggregationLog
 from SPEED.logs.vnf_segment import VNFSegmentLog
+from SPEED.registry import NameRegistry
+from SPEED.segmentation_cache import SegmentationTemplateCache
 from SPEED.speed import SPEED
+from SPEED.topology_cache import TopologyCache
+from SPEED.serializer import AggregationSerializer
+from SPEED.types import AggregationDelta
+from SPEED.zone_delay_matrix import ZoneDelayMatrix
+from SPEED.zone_lca import ZoneLCAIndex
+from SPEED.zone_tree import ZoneTree
 
 
 class SPEEDSimulation:
@@ -44,6 +53,22 @@ class SPEEDSimulation:
     The simulation using the SPEED Strategy to execute the distributed SFC Placement.
     """
 
+    AGGREGATION_ON_DEMAND = "on_demand"
+    """
+    All the zones aggregate the data, without delay, before each placement decision.
+    """
+
+    AGGREGATION_PERIODIC = "periodic"
+    """
+    Each zone aggregates the data in its own SimPy process at a fixed interval, and the data arrives at the parent zone
+    after the delay between the distributed service components. The placement uses the data already received.
+    """
+
+    VALID_AGGREGATION_MODES = [AGGREGATION_ON_DEMAND, AGGREGATION_PERIODIC]
+    """
+    Constant used to define the valid data aggregation modes.
+    """
+
     def __init__(self, env: simpy.Environment, config, environment):
         """
         The simulation component.
@@ -160,6 +185,12 @@ class SPEEDSimulation:
         The object for logging the data aggregation events.
         """
 
+        self.cache_log: CacheLog = CacheLog()
+        self.log.register_log(name=CacheLog.NAME, log_obj=self.cache_log)
+        """
+        The object for logging the counters of the caches.
+        """
+
         # self.distributed_service_log = DistributedServiceLog()
         # self.log.register_log(DistributedServiceLog.NAME, self.distributed_service_log)
         # """
@@ -211,9 +242,35 @@ class SPEEDSimulation:
         Dictionary with the zone associated with each sfc requested
         """
 
-        self.graph_zones = ZoneHelper.build_zone_tree(self.zones)
+        self.pending_sfc_requests: Dict[str, Zone] = dict()
+        """
+        The SFC Requests waiting the VNFs be assigned to compute zones, before the placement timeout.
+        """
+
+        self.housekeeping_wakeup: simpy.Event = None
+        """
+        Event used to wake up the housekeeping process when it is waiting for something to do.
+        """
+
+        self.zone_tree: ZoneTree = ZoneTree(self.zones)
+        """
+        Topology of the zones stored in arrays.
+        """
+
+        self.zones_bottom_up: List[str] = self.zone_tree.zone_names_bottom_up()
+        """
+        The zone names ordered from the leafs to the root, the child zones are always before its parent zone.
+        """
+
+        self.zone_lca: ZoneLCAIndex = ZoneLCAIndex(self.zone_tree)
         """
-        Topology of the zones in a networkx Graph
+        Index to find the lowest common ancestor of two zones in constant time.
+        """
+
+        self.dirty_zones: Set[str] = set()
+        """
+        The zones where the domain resources changed since the last data aggregation. Only the dirty zones and its
+        ancestors are aggregated again.
         """
 
         self.default_placement_timeout = 100
@@ -221,6 +278,110 @@ class SPEEDSimulation:
         The default value for the distributed service wait until set the placement as a fail.
         """
 
+        self.aggregation_mode = SPEEDSimulation.AGGREGATION_ON_DEMAND
+        """
+        When the zones aggregate the data.
+        """
+
+        self.aggregation_interval = 10
+        """
+        The interval between two data aggregations of a zone in the periodic aggregation mode.
+        """
+
+        self.aggregation_arrival: Dict[str, float] = dict()
+        """
+        The time the last data sent by each zone arrives at its parent zone, used to keep the order of the data sent
+        in the periodic aggregation mode.
+        """
+
+        self.aggregation_workers = 0
+        """
+        The amount of worker processes used to collect the infrastructure data of the compute zones, when 0 the data
+        is collected in the simulation process.
+        """
+
+        self.aggregation_pool: Optional[ProcessPoolExecutor] = None
+        """
+        The pool of worker processes used to collect the infrastructure data, created in the first collection and
+        released by close().
+        """
+
+        self.collection_mode = SPEED.COLLECTION_DICT
+        """
+        How the SPEED components collect the infrastructure data of the compute zones.
+        """
+
+        self.registry: NameRegistry = NameRegistry()
+        """
+        The interned ids of zones, VNFs and GWs shared by all the SPEED components.
+        """
+
+        self.gateway_delays: GatewayDelayMatrix = None
+        """
+        The delay from all the nodes to all the GWs, built in the setup and shared by all the SPEED components.
+        """
+
+        self.topology_cache: TopologyCache = TopologyCache()
+        """
+        The cache of the topology data of this simulation, shared by all the SPEED components.
+        """
+
+        self.summary_mode = SPEED.SUMMARY_MIN_DELAY
+        """
+        How the SPEED components summarize the aggregated data of each (GW, VNF).
+        """
+
+        self.pareto_k = SPEED.DEFAULT_PARETO_K
+        """
+        The max amount of records in the Pareto fronts, used in the Pareto summary mode.
+        """
+
+        self.aggregation_serializer: AggregationSerializer = AggregationSerializer()
+        """
+        Encode the aggregated data messages to log its real size.
+        """
+
+        self.segmentation_mode = SPEEDHelper.SEGMENTATION_CONTIGUOUS
+        """
+        How the SFC chains are split in VNF segments.
+        """
+
+        self.zone_delays: ZoneDelayMatrix = None
+        """
+        The delay between the distributed service managers of the zones, built in the setup.
+        """
+
+        self.zone_delays_file: str = None
+        """
+        The file where the delays between the distributed service managers are saved.
+        """
+
+        self.segmentation_search = SPEEDHelper.SEARCH_ALL
+        """
+        Which valid segmentation plans are created for the SFC chains.
+        """
+
+        self.segmentation_selection = SPEED.SELECTION_MIN_SEGMENTS
+        """
+        How the segmentation plan and the child zone of each segment are selected.
+        """
+
+        self.segmentation_delay_weight = SPEED.DEFAULT_DELAY_WEIGHT
+        """
+        The weight of the delay between the segments in the optimal selection.
+        """
+
+        self.zone_capacity: Dict[str, int] = dict()
+        """
+        The max amount of VNFs of one SFC Request that each child zone can receive, the zones without capacity have no
+        limit.
+        """
+
+        self.segmentation_cache: SegmentationTemplateCache = SegmentationTemplateCache()
+        """
+        The cache of the segmentation templates of the SFC chains, shared by all the zones.
+        """
+
 
 
         self.setup()
@@ -236,6 +397,114 @@ class SPEEDSimulation:
         if 'placement_timeout' in self.config.keys():
             self.default_placement_timeout = self.config['placement_timeout']
 
+        if 'aggregation' in self.config.keys():
+            aggregation_config = self.config['aggregation']
+
+            if 'mode' in aggregation_config.keys():
+                if aggregation_config['mode'] not in SPEEDSimulation.VALID_AGGREGATION_MODES:
+                    raise TypeError("The aggregation mode {} is invalid".format(aggregation_config['mode']))
+
+                self.aggregation_mode = aggregation_config['mode']
+
+            if 'interval' in aggregation_config.keys():
+                if aggregation_config['interval'] <= 0:
+                    raise TypeError("The aggregation interval must be greater than 0.")
+
+                self.aggregation_interval = aggregation_config['interval']
+
+            if 'collection' in aggregation_config.keys():
+                self.collection_mode = aggregation_config['collection']
+
+            if 'workers' in aggregation_config.keys():
+                if not type(aggregation_config['workers']) == int or aggregation_config['workers'] < 0:
+                    raise TypeError("The aggregation workers must be an int greater or equal to 0.")
+
+                self.aggregation_workers = aggregation_config['workers']
+
+            if 'summary' in aggregation_config.keys():
+                self.summary_mode = aggregation_config['summary']
+
+            if 'pareto_k' in aggregation_config.keys():
+                self.pareto_k = aggregation_config['pareto_k']
+
+            if 'encoding' in aggregation_config.keys():
+                self.aggregation_serializer.encoding = aggregation_config['encoding']
+
+            if 'compression' in aggregation_config.keys():
+                self.aggregation_serializer.compression = aggregation_config['compression']
+
+        if 'segmentation' in self.config.keys():
+            segmentation_config = self.config['segmentation']
+
+            if 'mode' in segmentation_config.keys():
+                if segmentation_config['mode'] not in SPEEDHelper.VALID_SEGMENTATION_MODES:
+                    raise TypeError("The segmentation mode {} is invalid".format(segmentation_config['mode']))
+
+                self.segmentation_mode = segmentation_config['mode']
+
+            if 'search' in segmentation_config.keys():
+                if segmentation_config['search'] not in SPEEDHelper.VALID_SEARCH_MODES:
+                    raise TypeError("The segmentation search {} is invalid".format(segmentation_config['search']))
+
+                self.segmentation_search = segmentation_config['search']
+
+            if 'selection' in segmentation_config.keys():
+                if segmentation_config['selection'] not in SPEED.VALID_SELECTION_MODES:
+                    raise TypeError("The segmentation selection {} is invalid".format(
+                        segmentation_config['selection']
+                    ))
+
+                self.segmentation_selection = segmentation_config['selection']
+
+            if 'delay_weight' in segmentation_config.keys():
+                if segmentation_config['delay_weight'] < 0:
+                    raise TypeError("The segmentation delay weight must be greater or equal to 0.")
+
+                self.segmentation_delay_weight = segmentation_config['delay_weight']
+
+            if 'zone_capacity' in segmentation_config.keys():
+                for zone_name, capacity in segmentation_config['zone_capacity'].items():
+                    if not type(capacity) == int or capacity <= 0:
+                        raise TypeError("The capacity of the zone {} must be an int greater than 0.".format(zone_name))
+
+                self.zone_capacity = dict(segmentation_config['zone_capacity'])
+
+            if 'cache_size' in segmentation_config.keys():
+                self.segmentation_cache.max_entries = segmentation_config['cache_size']
+
+            # the optimal selection only builds contiguous segments and does not limit the VNFs of the zones
+            if self.segmentation_selection == SPEED.SELECTION_OPTIMAL:
+                if self.segmentation_mode != SPEEDHelper.SEGMENTATION_CONTIGUOUS:
+                    raise TypeError("The segmentation mode {} is invalid with the {} selection.".format(
+                        self.segmentation_mode, SPEED.SELECTION_OPTIMAL
+                    ))
+
+                if self.zone_capacity:
+                    raise TypeError("The zone capacity is invalid with the {} selection.".format(
+                        SPEED.SELECTION_OPTIMAL
+                    ))
+
+        if 'zone_delays' in self.config.keys():
+            zone_delays_config = self.config['zone_delays']
+
+            if 'file' in zone_delays_config.keys():
+                self.zone_delays_file = zone_delays_config['file']
+
+        if 'topology_cache' in self.config.keys():
+            topology_cache_config = self.config['topology_cache']
+
+            if 'max_bytes' in topology_cache_config.keys():
+                self.topology_cache.max_bytes = topology_cache_config['max_bytes']
+
+        if self.gateway_delays:
+            self.gateway_delays.refresh()
+        else:
+            self.gateway_delays = GatewayDelayMatrix(
+                topology=self.environment['topology'],
+                nodes=self.environment['nodes'],
+                registry=self.registry
+            )
+
         for zone_name, zone in self.zones.items():
             if zone.zone_type == Zone.TYPE_ACCESS:
                 continue
@@ -246,9 +515,33 @@ class SPEEDSimulation:
             # create one distributed service manager component for each zone.
             self.zdsm[zone_name] = DistributedServiceManager(
                 zone=zone,
-                environment=self.environment
+                environment=self.environment,
+                collection_mode=self.collection_mode,
+                registry=self.registry,
+                gateway_delays=self.gateway_delays,
+                topology_cache=self.topology_cache,
+                summary_mode=self.summary_mode,
+                pareto_k=self.pareto_k
             )
 
+        # The distributed placement and the aggregation use the delay between each zone and its parent zone.
+        pairs = []
+        for zone_name, dsm in self.zdsm.items():
+            parent_zone_name = dsm.zone.parent_zone_name
+            if parent_zone_name in self.zdsm:
+                pairs.append((parent_zone_name, zone_name))
+                pairs.append((zone_name, parent_zone_name))
+
+        self.zone_delays = ZoneDelayMatrix(
+            topology=self.environment['topology'],
+            zone_nodes={zone_name: dsm.node.name for zone_name, dsm in self.zdsm.items()},
+            pairs=pairs,
+            file_name=self.zone_delays_file
+        )
+
+        # All the zones must be aggregated at least once.
+        self.dirty_zones = set(self.zdsm.keys())
+
         for domain_name, domain in self.domains.items():
             self.packet_in_execution[domain_name] = list()
             self.packet_delay_violated[domain_name] = list()
@@ -303,6 +596,9 @@ class SPEEDSimulation:
         Add the main simulation process in the SimPy environment.
         """
 
+        if self.aggregation_mode == SPEEDSimulation.AGGREGATION_PERIODIC:
+            self.start_periodic_aggregation()
+
         self.env.run(until=self.duration)
         """
         Run the simulation until the configured time limit (duration).
@@ -335,92 +631,135 @@ class SPEEDSimulation:
     def simulate(self):
         """
         Execute the simulation main process.
+
+        Each group of SFC Requests that arrives at the same time is processed by its own process, scheduled at the
+        arrival time. The housekeeping executed in each simulation tick only runs while there is something to do.
         """
-        # Compute the total of resources used by the VNF Instances and save it in a file
+        arrivals = self.environment['sfc_requests_arrival']
+
+        # The arrivals are scheduled before the housekeeping, thus in the same tick they are processed first.
+        for arrival in sorted(arrivals.keys()):
+            self.env.process(
+                self.sfc_requests_arrival_process(
+                    arrival=arrival,
+                    sfc_requests=arrivals[arrival]
+                )
+            )
+
+        yield self.env.process(
+            self.housekeeping_process()
+        )
+
+    def sfc_requests_arrival_process(self, arrival: int, sfc_requests: List[SFCRequest]):
+        """
+        Process the SFC Requests that arrive at the same simulation time.
+
+        :param arrival: The simulation time when the SFC Requests arrive.
+        :param sfc_requests: The SFC Requests.
+        :return:
+        """
+        if arrival < self.env.now:
+            return
+
+        yield self.env.timeout(arrival - self.env.now)
 
         algorithm = self.which_algorithm()
 
-        while True:
+        # Execute the SPC Placement in a distributed fashion for each SFC Request.
+        for sfc_request in sfc_requests:
 
-            # Process the SFC Requests that arrived in the simulation time (env.now)
-            if self.env.now in self.environment['sfc_requests_arrival']:
-                sfc_requests = self.environment['sfc_requests_arrival'][self.env.now]
+            # Update all the aggregated data in the simulation
+            self.update_aggregated_data()
 
-                # Execute the SPC Placement in a distributed fashion for each SFC Request.
-                for sfc_request in sfc_requests:
+            try:
 
-                    # Update all the aggregated data in the simulation
-                    self.update_aggregated_data()
+                # Select the zone manager
+                aux = self.select_zone_manager(
+                    sfc_request=sfc_request
+                )
 
-                    try:
+                zone_manager: Zone = aux['zone_manager']
 
-                        # Select the zone manager
-                        aux = self.select_zone_manager(
-                            sfc_request=sfc_request
-                        )
+                vnf_names = DistributedServiceHelper.get_vnf_names_from_sfc_request(
+                    sfc_request=sfc_request
+                )
 
-                        zone_manager: Zone = aux['zone_manager']
+                # The zone that will manage this request
+                self.sfc_request_zone_manager[sfc_request.name] = zone_manager
 
-                        vnf_names = DistributedServiceHelper.get_vnf_names_from_sfc_request(
-                            sfc_request=sfc_request
-                        )
+                placement_timeout = self.default_placement_timeout
 
-                        # The zone that will manage this request
-                        self.sfc_request_zone_manager[sfc_request.name] = zone_manager
+                if sfc_request.extra_parameter_is_defined('placement_timeout'):
+                    placement_timeout = sfc_request.get_extra_parameter('placement_timeout')
 
-                        placement_timeout = self.default_placement_timeout
+                self.zdsm[zone_manager.name].add_sfc_request(
+                    sfc_request=sfc_request,
+                    placement_timeout=placement_timeout
+                )
 
-                        if sfc_request.extra_parameter_is_defined('placement_timeout'):
-                            placement_timeout = sfc_request.get_extra_parameter('placement_timeout')
+                self.pending_sfc_requests[sfc_request.name] = zone_manager
+                self.wake_up_housekeeping()
 
-                        self.zdsm[zone_manager.name].add_sfc_request(
-                            sfc_request=sfc_request,
-                            placement_timeout=placement_timeout
-                        )
+                # Lot the selection zone will manage the SFC Request
+                self.distributed_service_log.add_event(
+                    event=DistributedServiceLog.ZONE_MANAGER_SELECTED,
+                    time=self.env.now,
+                    sfc_request_name=sfc_request.name,
+                    zone_manager_name=zone_manager.name
+                )
 
-                        # Lot the selection zone will manage the SFC Request
-                        self.distributed_service_log.add_event(
-                            event=DistributedServiceLog.ZONE_MANAGER_SELECTED,
-                            time=self.env.now,
-                            sfc_request_name=sfc_request.name,
-                            zone_manager_name=zone_manager.name
-                        )
+            except TypeError:
+                # The requested service cannot be placed, there is no zone to manage this request.
+                self.distributed_service_log.add_event(
+                    event=DistributedServiceLog.FAIL,
+                    time=self.env.now,
+                    sfc_request_name=sfc_request.name,
+                    zone_manager_name="Not Found"
+                )
 
-                    except TypeError:
-                        # The requested service cannot be placed, there is no zone to manage this request.
-                        self.distributed_service_log.add_event(
-                            event=DistributedServiceLog.FAIL,
-                            time=self.env.now,
-                            sfc_request_name=sfc_request.name,
-                            zone_manager_name="Not Found"
-                        )
+                self.distributed_placement_log.add_event(
+                    event=DistributedPlacementLog.FAIL,
+                    time=self.env.now,
+                    sfc_request_name=sfc_request.name
+                )
+                continue
 
-                        self.distributed_placement_log.add_event(
-                            event=DistributedPlacementLog.FAIL,
-                            time=self.env.now,
-                            sfc_request_name=sfc_request.name
-                        )
-                        continue
-
-                    # Zone manager executing the game
-                    try:
-                        if algorithm == "random":
-                            cz = ZoneHelper.get_random_compute_zone(
-                                mother_zone=zone_manager,
-                                zone_tree=self.graph_zones
-                            )
-
-                            zone_manager = self.zones[cz]
-
-                        self.env.process(
-                            self.distributed_sfc_placement_process(
-                                sfc_request=sfc_request,
-                                zone=zone_manager,
-                                vnf_names=vnf_names
-                            )
-                        )
-                    except TypeError:
-                        print("Simulation error")
+            # Zone manager executing the game
+            try:
+                if algorithm == "random":
+                    cz = ZoneHelper.get_random_compute_zone(
+                        mother_zone=zone_manager,
+                        zone_tree=self.zone_tree
+                    )
+
+                    zone_manager = self.zones[cz]
+
+                self.env.process(
+                    self.distributed_sfc_placement_process(
+                        sfc_request=sfc_request,
+                        zone=zone_manager,
+                        vnf_names=vnf_names
+                    )
+                )
+            except TypeError:
+                print("Simulation error")
+
+    def housekeeping_process(self):
+        """
+        Execute the housekeeping in each simulation tick of 1ms: decrement the timeout of the SFC Instances, increment
+        the delay of the packets in execution and check if the VNFs of the SFC Requests were assigned to compute zones.
+
+        When there is nothing to do the process waits until it is woken up, instead of executing empty ticks.
+        """
+        while True:
+            if not self.housekeeping_pending():
+                self.housekeeping_wakeup = self.env.event()
+                next_tick = yield self.housekeeping_wakeup
+                self.housekeeping_wakeup = None
+
+                # keep the housekeeping in the ticks of 1ms
+                if next_tick > self.env.now:
+                    yield self.env.timeout(next_tick - self.env.now)
 
             for i, domain in self.environment['domains'].items():
                 self.dec_sfc_instances_timeout(domain)
@@ -439,6 +778,43 @@ class SPEEDSimulation:
             # Do the simulation tick of 1ms
             yield self.env.timeout(1)
 
+    def housekeeping_pending(self) -> bool:
+        """
+        Check if the housekeeping has something to do in the next tick.
+
+        :return:
+        """
+        if self.pending_sfc_requests:
+            return True
+
+        for domain_name, packets in self.packet_in_execution.items():
+            if packets:
+                return True
+
+        for domain_name, domain in self.environment['domains'].items():
+            for sfc_instance in domain.get_sfc_instances().values():
+                if sfc_instance.get_timeout():
+                    return True
+
+        return False
+
+    def wake_up_housekeeping(self, current_tick: bool = True):
+        """
+        Wake up the housekeeping process if it is waiting.
+
+        :param current_tick: If the housekeeping must be executed in the current tick, otherwise in the next one.
+        :return:
+        """
+        if self.housekeeping_wakeup is None or self.housekeeping_wakeup.triggered:
+            return
+
+        if current_tick:
+            next_tick = math.ceil(self.env.now)
+        else:
+            next_tick = math.floor(self.env.now) + 1
+
+        self.housekeeping_wakeup.succeed(next_tick)
+
     def distributed_sfc_placement_process(self, sfc_request: SFCRequest, zone: Zone, vnf_names: List, timeout: int = 0):
         """
         Execute the game in each zone.
@@ -504,10 +880,17 @@ class SPEEDSimulation:
             # Run the distributed placement to the other zones
             dsm: DistributedServiceManager = self.zdsm[zone.name]
 
-            plans = self.find_valid_vnf_segment_plan(
-                zone=zone,
-                vnf_names=vnf_names
-            )
+            # the optimal plan is also the check of the valid plans, thus they are not enumerated
+            if self.segmentation_selection == SPEED.SELECTION_OPTIMAL:
+                plans = self.find_optimal_vnf_segment_plan(
+                    zone=zone,
+                    vnf_names=vnf_names
+                )
+            else:
+                plans = self.find_valid_vnf_segment_plan(
+                    zone=zone,
+                    vnf_names=vnf_names
+                )
 
             if not plans:
                 self.distributed_service_log.add_event(
@@ -524,9 +907,25 @@ class SPEEDSimulation:
                 )
                 return
 
-            selected_segmentation_plan = dsm.speed.select_segmentation_plan(plans)
+            if self.segmentation_selection == SPEED.SELECTION_OPTIMAL:
+                selected_child_zones = dsm.merge_zones_of_vnf_segments(
+                    segmentation_plan=plans[SPEED.SELECTION_OPTIMAL]
+                )
+            else:
+                selected_segmentation_plan = dsm.speed.select_segmentation_plan(plans)
 
-            selected_child_zones = dsm.select_zones_to_vnf_segments(selected_segmentation_plan)
+                selected_child_zones = dsm.select_zones_to_vnf_segments(
+                    segmentation_plan=selected_segmentation_plan,
+                    zone_capacity=self.zone_capacity
+                )
+
+            if not selected_child_zones:
+                self.distributed_placement_log.add_event(
+                    event=DistributedPlacementLog.FAIL,
+                    time=self.env.now,
+                    sfc_request_name=sfc_request.name
+                )
+                return
 
             # if sfc_request.name == "sr_4":
             #     print(sfc_request.name)
@@ -589,65 +988,309 @@ class SPEEDSimulation:
         :param zone_2: The second zone.
         :return:
         """
-        topo: Topology = self.environment['topology']
+        return self.zone_delays.delay(zone_1.name, zone_2.name)
 
-        sp = topo.shortest_simple_edge_path(
-            src_name=self.zdsm[zone_1.name].node.name,
-            dst_name=self.zdsm[zone_2.name].node.name,
-        )
+    def update_aggregated_data(self):
+        """
+        Update the aggregated data before a placement decision. In the periodic aggregation mode nothing is done, the
+        decision uses the data already received by the zones.
 
-        timeout = topo.path_delay(path=sp)
+        :return:
+        """
+        if self.aggregation_mode == SPEEDSimulation.AGGREGATION_PERIODIC:
+            return
 
-        return timeout
+        self.propagate_aggregated_data()
 
-    def update_aggregated_data(self):
+    def propagate_aggregated_data(self):
         """
-        Update the aggregated data in all the zones. First the child zones will send the data to
-        parent zone recursively.
+        Update the aggregated data in the dirty zones and its ancestors. First the child zones will send the delta of
+        its data to the parent zone recursively. A parent zone is only processed if its data changed with the delta.
 
         :return:
         """
-        zones_to_update = nx.dfs_tree(self.graph_zones)
-        list_zones = list(zones_to_update.nodes())
+        if not self.dirty_zones:
+            return
+
+        dirty_zones = self.dirty_zones
+        self.dirty_zones = set()
+
+        changed_zones: Set[str] = set()
+
+        collected = self.collect_compute_zones_data(dirty_zones)
 
         # execute the update from the bottom to top
-        list_zones.reverse()
+        for zone_name in self.zones_bottom_up:
+            if zone_name not in dirty_zones and zone_name not in changed_zones:
+                continue
+
+            infrastructure_columns = None
+            if zone_name in collected:
+                infrastructure_columns = collected[zone_name].result()
 
-        for zone_name in list_zones:
             zone = self.zones[zone_name]
-            self.update_zone_aggregated_data(
-                zone=zone
+            parent_changed = self.update_zone_aggregated_data(
+                zone=zone,
+                aggregate=zone_name in dirty_zones,
+                infrastructure_columns=infrastructure_columns
             )
 
-    def update_zone_aggregated_data(self, zone: Zone):
+            if parent_changed:
+                changed_zones.add(zone.parent_zone_name)
+
+    def collect_compute_zones_data(self, zone_names: Set[str]) -> Dict[str, Future]:
+        """
+        Send the collection of the infrastructure data of the compute zones to the worker processes. The collection
+        does not depend on the other zones, thus all the compute zones are collected at the same time and the
+        aggregation waits for each result in the bottom up order.
+
+        :param zone_names: The zones that will be aggregated.
+        :return: The future infrastructure data of each compute zone, empty when there are no worker processes.
+        """
+        collected: Dict[str, Future] = dict()
+
+        pool = self.get_aggregation_pool()
+        if not pool:
+            return collected
+
+        for zone_name in self.zones_bottom_up:
+            if zone_name not in zone_names or zone_name not in self.zdsm:
+                continue
+
+            speed: SPEED = self.zdsm[zone_name].speed
+            if not speed.domain:
+                continue
+
+            collected[zone_name] = pool.submit(
+                SPEED.collect_infrastructure_snapshot,
+                speed.infrastructure_snapshot(),
+                speed.summary_mode == SPEED.SUMMARY_MIN_DELAY
+            )
+
+        return collected
+
+    def get_aggregation_pool(self) -> Optional[ProcessPoolExecutor]:
+        """
+        Return the pool of worker processes, it is created in the first use.
+
+        :return: The pool, None when the data is collected in the simulation process.
+        """
+        if self.aggregation_workers and not self.aggregation_pool:
+            self.aggregation_pool = ProcessPoolExecutor(max_workers=self.aggregation_workers)
+
+        return self.aggregation_pool
+
+    def close(self):
+        """
+        Release the worker processes. The simulation can be used again, the pool is created again when needed.
+
+        :return:
+        """
+        if self.aggregation_pool:
+            self.aggregation_pool.shutdown()
+            self.aggregation_pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start_periodic_aggregation(self):
+        """
+        Aggregate the data of all the zones once, then start the aggregation process of each zone.
+
+        :return:
+        """
+        self.propagate_aggregated_data()
+
+        for zone_name in self.zones_bottom_up:
+            if zone_name in self.zdsm:
+                self.env.process(
+                    self.zone_aggregation_process(
+                        zone=self.zones[zone_name]
+                    )
+                )
+
+    def zone_aggregation_process(self, zone: Zone):
+        """
+        Aggregate the data of the zone at each interval and send the changes to the parent zone.
+
+        :param zone: The zone.
+        :return:
+        """
+        speed: SPEED = self.zdsm[zone.name].speed
+
+        while True:
+            yield self.env.timeout(self.aggregation_interval)
+
+            aggregate = zone.name in self.dirty_zones
+
+            # nothing changed since the last interval
+            if not aggregate and not speed.pending_keys:
+                continue
+
+            self.dirty_zones.discard(zone.name)
+
+            delta = self.compute_zone_delta(
+                zone=zone,
+                aggregate=aggregate
+            )
+
+            if delta is not None:
+                self.env.process(
+                    self.send_aggregated_data_process(
+                        zone=zone,
+                        delta=delta
+                    )
+                )
+
+    def send_aggregated_data_process(self, zone: Zone, delta: AggregationDelta):
+        """
+        Deliver the changes of the aggregated data of a zone to its parent zone after the delay between the
+        distributed service components. The data sent by a zone always arrives in the order it was sent.
+
+        :param zone: The zone that sent the data.
+        :param delta: The changes of the aggregated data.
+        :return:
+        """
+        parent_zone = self.zones[zone.parent_zone_name]
+
+        delay = self.delay_between_distributed_service_components(
+            zone_1=zone,
+            zone_2=parent_zone
+        )
+
+        arrival = max(self.env.now + delay, self.aggregation_arrival.get(zone.name, 0))
+        self.aggregation_arrival[zone.name] = arrival
+
+        yield self.env.timeout(arrival - self.env.now)
+
+        self.zdsm[parent_zone.name].speed.apply_child_zone_delta(delta)
+
+        self.data_aggregation_log.add_event(
+            event=DataAggregationLog.RECEIVED,
+            time=self.env.now,
+            zone_name=parent_zone.name,
+            size=0,
+            data=zone.name,
+            delta_size=delta.size()
+        )
+
+    def topology_changed(self):
+        """
+        Must be called when the topology changes (nodes, links or link delays). The delay from the nodes to the GWs is
+        computed again, and if it changed all the zones will be aggregated again.
+
+        :return:
+        """
+        # The cached data is keyed by the topology fingerprint, the old entries will be evicted when unused.
+        if self.gateway_delays.refresh():
+            self.dirty_zones = set(self.zdsm.keys())
+
+        if self.zone_delays:
+            self.zone_delays.refresh()
+
+    def zone_tree_changed(self):
         """
-        Update the aggregated data for a zone.
+        Must be called when zones are added or removed. The zone tree and the index of the lowest common ancestors are
+        only built again if the zones changed.
 
         :return:
         """
+        if self.zone_lca.refresh():
+            self.zones_bottom_up = self.zone_tree.zone_names_bottom_up()
+
+    def mark_zone_dirty(self, zone_name: str):
+        """
+        Mark that the resources of the zone changed, thus its aggregated data must be computed again.
+
+        :param zone_name: The name of the zone.
+        :return:
+        """
+        if zone_name in self.zdsm:
+            self.dirty_zones.add(zone_name)
+
+    def mark_domain_dirty(self, domain_name: str):
+        """
+        Mark that the resources of the domain changed, thus the aggregated data of its compute zone must be computed
+        again.
+
+        :param domain_name: The name of the domain.
+        :return:
+        """
+        if domain_name in self.domain_zone:
+            self.mark_zone_dirty(self.domain_zone[domain_name])
+
+    def update_zone_aggregated_data(self, zone: Zone, aggregate: bool = True,
+                                    infrastructure_columns: Optional[np.ndarray] = None) -> bool:
+        """
+        Update the aggregated data for a zone and send the delta to the parent zone.
+
+        :param zone: The zone.
+        :param aggregate: If the data of the zone must be aggregated again, when false only the changes already
+        applied by the child zones deltas are sent.
+        :param infrastructure_columns: The infrastructure data of the compute zone already collected.
+        :return: True if the aggregated data of the parent zone changed.
+        """
+        delta = self.compute_zone_delta(
+            zone=zone,
+            aggregate=aggregate,
+            infrastructure_columns=infrastructure_columns
+        )
+
+        # Send the delta to the parent zone.
+        if delta is not None:
+            return self.zdsm[zone.parent_zone_name].speed.apply_child_zone_delta(delta)
+
+        return False
+
+    def compute_zone_delta(self, zone: Zone, aggregate: bool = True,
+                           infrastructure_columns: Optional[np.ndarray] = None):
+        """
+        Update the aggregated data for a zone and compute the delta that must be sent to the parent zone.
+
+        :param zone: The zone.
+        :param aggregate: If the data of the zone must be aggregated again, when false only the changes already
+        applied by the child zones deltas are sent.
+        :param infrastructure_columns: The infrastructure data of the compute zone already collected.
+        :return: The delta, or None when nothing must be sent to the parent zone.
+        """
         if zone.zone_type == Zone.TYPE_ACCESS:
-            return
+            return None
 
         dsm = self.zdsm[zone.name]
 
         # Aggregate the data from its own child zone
-        aggregated_data = dsm.speed.aggregate_date()
-        data_size = getsizeof(aggregated_data)
+        if aggregate:
+            dsm.speed.aggregate_date(infrastructure_columns)
+
+        delta = dsm.speed.compute_delta()
+        send = zone.parent_zone_name and delta.size() > 0
+
+        # The size of the message in the wire, nothing is sent when the delta is empty.
+        data_size = 0
+        encode_time = 0.0
+        records = 0
+        if send:
+            data_size, encode_time = self.aggregation_serializer.measure(delta)
+            records = AggregationSerializer.amount_front_records(delta) or len(delta.upserts)
 
         self.data_aggregation_log.add_event(
             event=DataAggregationLog.COMPUTED,
             time=self.env.now,
             zone_name=zone.name,
             size=data_size,
-            data=""
+            data="",
+            delta_size=delta.size(),
+            encode_time=encode_time,
+            records=records
         )
 
-        # Send data to the parent zone.
-        if zone.parent_zone_name:
-            self.zdsm[zone.parent_zone_name].speed.update_child_zone_aggregated_data(
-                zone_name=zone.name,
-                child_zone_aggregated_data=aggregated_data
-            )
+        if send:
+            return delta
+
+        return None
 
     def select_zone_manager(self, sfc_request: SFCRequest) -> dict:
         """
@@ -668,9 +1311,7 @@ class SPEEDSimulation:
         src_domain_name = self.domain_zone[sfc_request.src.domain_name]
         dst_domain_name = self.domain_zone[sfc_request.dst.domain_name]
 
-        graph = self.graph_zones
-
-        zone_manager_name = nx.lowest_common_ancestor(graph, src_domain_name, dst_domain_name)
+        zone_manager_name = self.zone_lca.lowest_common_ancestor(src_domain_name, dst_domain_name)
 
         zone_manager: Zone = self.zones[zone_manager_name]
 
@@ -679,12 +1320,21 @@ class SPEEDSimulation:
             vnf_names.append(vnf.name)
 
         valid_zone_manager = False
+        valid_plans = dict()
 
         while True:
-            valid_plans = self.find_valid_vnf_segment_plan(
-                zone=zone_manager,
-                vnf_names=vnf_names
-            )
+            # The plans are only validated in the zones that cover all the VNFs.
+            if self.zdsm[zone_manager.name].speed.covers_vnfs(vnf_names):
+                if self.segmentation_selection == SPEED.SELECTION_OPTIMAL:
+                    valid_plans = self.find_optimal_vnf_segment_plan(
+                        zone=zone_manager,
+                        vnf_names=vnf_names
+                    )
+                else:
+                    valid_plans = self.find_valid_vnf_segment_plan(
+                        zone=zone_manager,
+                        vnf_names=vnf_names
+                    )
 
             if valid_plans:
                 valid_zone_manager = True
@@ -717,14 +1367,53 @@ class SPEEDSimulation:
         # Update the aggregated data for all the zones.
         self.update_aggregated_data()
 
-        segmentation_plans = SPEEDHelper.vnf_segmentation(
-            vnf_names=vnf_names
+        speed = self.zdsm[zone.name].speed
+
+        # Stop at the fewest segments with a valid plan, without the template of all the plans. The long chains also
+        # use the generator, it prunes the invalid segments instead of validating all the plans of the template.
+        if self.segmentation_search == SPEEDHelper.SEARCH_MIN_SEGMENTS or \
+                not SegmentationTemplateCache.supports(len(vnf_names), self.segmentation_mode):
+            return dict(speed.iter_valid_segmentation_plans(
+                vnf_names=vnf_names,
+                mode=self.segmentation_mode,
+                search=self.segmentation_search
+            ))
+
+        # The template of the chain is shared, only the valid plans are created from it.
+        template = self.segmentation_cache.get(
+            vnf_names=vnf_names,
+            mode=self.segmentation_mode
         )
 
-        valid_plans = self.zdsm[zone.name].speed.valid_segmentation_plans(segmentation_plans)
+        valid_plans = dict(speed.iter_valid_template_plans(
+            vnf_names=vnf_names,
+            template=template
+        ))
 
         return valid_plans
 
+    def find_optimal_vnf_segment_plan(self, zone: Zone, vnf_names: List) -> dict:
+        """
+        Select the optimal VNF Segments and zones of the zone where the game will be played, without enumerating the
+        valid plans.
+
+        :param zone: The zone that will play the game.
+        :param vnf_names: The list with the name of VNFs.
+        :return: The optimal plan keyed by the optimal selection, empty when the child zones can not execute the chain.
+        """
+        # Update the aggregated data for all the zones.
+        self.update_aggregated_data()
+
+        plan = self.zdsm[zone.name].speed.optimal_segmentation_plan(
+            vnf_names=vnf_names,
+            delay_weight=self.segmentation_delay_weight
+        )
+
+        if not plan:
+            return dict()
+
+        return {SPEED.SELECTION_OPTIMAL: plan}
+
     def execute_placement_plan(self, domain: Domain, plan: SFCPlacementPlan):
         """
         Execute the SFC Placement plan. Create the SFC Instance, VNF Instances and Virtual Links.
@@ -743,6 +1432,8 @@ class SPEEDSimulation:
             ru=self.vnf_instance_ru_status
         )
 
+        self.mark_domain_dirty(domain.name)
+
         """
         For each created VNF Instance, a simpy.Resource object will be created. SimPy use this object to control the
         access to the resource. For example, if a packet needs to be processed in the VNF Instance but already
@@ -830,6 +1521,10 @@ class SPEEDSimulation:
                 domain_name=domain.name,
                 sfc_instance=sfc_instance
             )
+
+            # The timeout of the SFC Instance is decremented from the next tick.
+            self.wake_up_housekeeping(current_tick=False)
+
             return sfc_instance
         else:
             # Log the success in the placement plan creation.
@@ -862,22 +1557,23 @@ class SPEEDSimulation:
             time=self.env.now
         )
 
-        # Run the packet workload
-        while True:
-            now = int(self.env.now)
-            if now in packets_time.keys():
-                packets_to_process = packets_time[now]
-                for packet in packets_to_process:
-                    # Packets will not wait to start being processed, thus the yield is unnecessary.
-                    self.env.process(
-                        self.process_packet(
-                            packet=packet,
-                            distributed_service=distributed_service
-                        )
-                    )
+        # The packet times are absolute simulation times, not counted from the start of the workload. The packets of
+        # the times before the start are skipped, the others are processed in the tick of their time.
+        start = self.env.now
+        for packet_time in sorted(packets_time.keys()):
+            if packet_time < int(start):
+                continue
 
-            # Execute the simulation tick of 1ms
-            yield self.env.timeout(1)
+            yield self.env.timeout(start + packet_time - int(start) - self.env.now)
+
+            for packet in packets_time[packet_time]:
+                # Packets will not wait to start being processed, thus the yield is unnecessary.
+                self.env.process(
+                    self.process_packet(
+                        packet=packet,
+                        distributed_service=distributed_service
+                    )
+                )
 
     def process_packet(self, packet: Packet, distributed_service: DistributedService):
         """
@@ -914,6 +1610,9 @@ class SPEEDSimulation:
         Add the packet in the list of packet that are in execution
         """
 
+        # The delay of the packet is incremented from the next tick.
+        self.wake_up_housekeeping(current_tick=False)
+
         # Process the link the inter-domain link
         if distributed_service.ingress_link:
             yield self.env.process(
@@ -1118,6 +1817,8 @@ class SPEEDSimulation:
         )
         domain.destroy_sfc_instance(sfc_instance.sfc_request.name)
 
+        self.mark_domain_dirty(domain.name)
+
         self.del_vnf_instances_not_used()
 
     def del_vnf_instances_not_used(self):
@@ -1148,6 +1849,8 @@ class SPEEDSimulation:
             vnf_node: Node = self.environment['nodes'][vnf_instance.node]
             vnf_node.del_vnf_instance(vnf_instance)
 
+            self.mark_domain_dirty(vnf_node.domain_name)
+
             # Log the VNF Instance delete.
             self.vnf_instance_log.add_event(
                 event=VNFInstanceLog.DESTROYED,
@@ -1158,11 +1861,12 @@ class SPEEDSimulation:
 
     def sfc_requests_vnfs_are_assigned_to_compute_zone(self):
         """
-        Iterate over the SFC Requested and verify if is was placed or not.
+        Iterate over the pending SFC Requested and verify if is was placed or not. The SFC Requests placed or in
+        timeout are not pending anymore.
 
         :return:
         """
-        for sfc_request_name, zone in self.sfc_request_zone_manager.items():
+        for sfc_request_name, zone in list(self.pending_sfc_requests.items()):
             zdm = self.zdsm[zone.name]
 
             # if sfc_request_name not in zdm.distributed_services.keys():
@@ -1179,11 +1883,19 @@ class SPEEDSimulation:
                         zone_manager_name=zone.name
                     )
 
+                    del self.pending_sfc_requests[sfc_request_name]
+
                     # allocate the resources in the compute zones
                     self.execute_placement(ds)
 
                 else:
-                    if ds.dec_placement_timeout() == 0:
+                    placement_timeout = ds.dec_placement_timeout()
+
+                    # After the timeout the compute zones selected are not accepted
+                    if placement_timeout <= 0:
+                        del self.pending_sfc_requests[sfc_request_name]
+
+                    if placement_timeout == 0:
                         # SFC Request timeout
                         self.distributed_service_log.add_event(
                             event=DistributedServiceLog.TIMEOUT,
@@ -1216,6 +1928,9 @@ class SPEEDSimulation:
             zone = self.zones[zone_name]
             domain = self.domains[zone.domain_name]
 
+            # The resources of the zone will change, even if the placement fails the VNF Instances are destroyed.
+            self.mark_zone_dirty(zone_name)
+
             # Sort the VNFs based on the amount of nodes available to execute the VNF.
             sorted_vnfs = []
             vnfs_available = domain.vnfs_nodes_available()
@@ -1349,4 +2064,24 @@ class SPEEDSimulation:
                     )
                     self.packet_delay_violated[domain.name].append(packet)
 
+        self.cache_log.add_event(
+            event=CacheLog.STATS,
+            time=self.duration,
+            cache_name="segmentation",
+            stats=self.segmentation_cache.stats()
+        )
+
+        self.cache_log.add_event(
+            event=CacheLog.STATS,
+            time=self.duration,
+            cache_name="topology",
+            stats=self.topology_cache.stats()
+        )
+
+        # the pairs of zones computed during the simulation are saved only once
+        if self.zone_delays:
+            self.zone_delays.flush()
+
         log.save()
+
+        self.close()
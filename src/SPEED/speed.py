@@ -1,6 +1,6 @@
 import random
-from typing import List, Dict
-import networkx as nx
+from typing import List, Dict, Iterator, Optional, Set, Tuple
+import numpy as np
 import sys
 
 from SimPlacement.entity import Entity
@@ -8,17 +8,86 @@ from SimPlacement.entities.domain import Domain
 from SimPlacement.entities.node import Node
 from SPEED.types import InfrastructureData
 from SPEED.types import AggregatedData
+from SPEED.types import AggregatedKey
+from SPEED.types import AggregatedFront
+from SPEED.types import AggregationDelta
+from SPEED.types import SegmentationTemplate
+from SPEED.types import SegmentationValidity
+from SPEED.types import INFRASTRUCTURE_DTYPE
+from SPEED.gateway_delay_matrix import GatewayDelayMatrix
+from SPEED.helpers.speed import SPEEDHelper
+from SPEED.registry import NameRegistry
+from SPEED.topology_cache import TopologyCache
 from SimPlacement.types import Resource
 
-delay_to_all_gws_aux = {}
 
 class SPEED(Entity):
     """
     This class represent the SPEED component.
     """
 
+    COLLECTION_DICT = "dict"
+    """
+    Collect the infrastructure data as a list of InfrastructureData, one for each (node, VNF, GW).
+    """
+
+    COLLECTION_COLUMNAR = "columnar"
+    """
+    Collect the infrastructure data as one NumPy structured array for the whole compute zone.
+    """
+
+    VALID_COLLECTION_MODES = [COLLECTION_DICT, COLLECTION_COLUMNAR]
+    """
+    Constant used to define the valid infrastructure data collection modes.
+    """
+
+    SUMMARY_MIN_DELAY = "min_delay"
+    """
+    Keep only the record with the min delay of each (GW, VNF).
+    """
+
+    SUMMARY_PARETO = "pareto"
+    """
+    Keep the delay and cost Pareto front of each (GW, VNF), with at most pareto_k records.
+    """
+
+    VALID_SUMMARY_MODES = [SUMMARY_MIN_DELAY, SUMMARY_PARETO]
+    """
+    Constant used to define the valid aggregated data summary modes.
+    """
+
+    DEFAULT_PARETO_K = 4
+    """
+    The default max amount of records in the Pareto front of each (GW, VNF).
+    """
+
+    SELECTION_MIN_SEGMENTS = "min_segments"
+    """
+    Select at random one of the valid plans with the fewest segments, and the child zone with the min cost for each
+    segment.
+    """
+
+    SELECTION_OPTIMAL = "optimal"
+    """
+    Select the contiguous segments and the child zone of each segment together, with the min cost plus the delay
+    between the segments.
+    """
+
+    VALID_SELECTION_MODES = [SELECTION_MIN_SEGMENTS, SELECTION_OPTIMAL]
+    """
+    Constant used to define the valid segmentation plan selection modes.
+    """
+
+    DEFAULT_DELAY_WEIGHT = 1.0
+    """
+    The default weight of the delay between the segments in the optimal selection.
+    """
+
     def __init__(self, name: str, zone_name: str, domain: Domain = None,
-                 environment: dict = None, extra_parameters: dict = None):
+                 environment: dict = None, extra_parameters: dict = None,
+                 collection_mode: str = COLLECTION_DICT, registry: NameRegistry = None,
+                 gateway_delays: GatewayDelayMatrix = None, topology_cache: TopologyCache = None,
+                 summary_mode: str = SUMMARY_MIN_DELAY, pareto_k: int = DEFAULT_PARETO_K):
         """
         Create the SPEED component.
 
@@ -27,25 +96,134 @@ class SPEED(Entity):
         :param domain: The domain where the SPEED is executed.
         :param environment: The environment, its an auxiliar info about the environment where the zone is executed.
         :param extra_parameters: Dict with extra parameters.
+        :param collection_mode: How the infrastructure data is collected in compute zones.
+        :param registry: The interned ids of zones, VNFs and GWs shared by the SPEED components.
+        :param gateway_delays: The delay from all the nodes to all the GWs shared by the SPEED components.
+        :param topology_cache: The cache of the topology data shared by the SPEED components.
+        :param summary_mode: How the records of each (GW, VNF) are summarized in the aggregated data.
+        :param pareto_k: The max amount of records in the Pareto front of each (GW, VNF).
         """
 
         super().__init__(name, extra_parameters)
         self.domain = domain
         self.zone_name = zone_name
         self.environment = environment
+        self.collection_mode = collection_mode
+        self.summary_mode = summary_mode
+        self.pareto_k = pareto_k
+
+        if not registry:
+            registry = NameRegistry()
+
+        self.registry: NameRegistry = registry
+        """
+        The interned ids of zones, VNFs and GWs.
+        """
+
+        self.gateway_delays: GatewayDelayMatrix = gateway_delays
+        """
+        The delay from all the nodes to all the GWs. When it is not defined it is built in the first use.
+        """
+
+        if not topology_cache:
+            topology_cache = TopologyCache()
+
+        self.topology_cache: TopologyCache = topology_cache
+        """
+        The cache of the topology data, for example the delay from each node to all the GWs.
+        """
+
+        self.infrastructure_columns: np.ndarray = np.empty(0, dtype=INFRASTRUCTURE_DTYPE)
+        """
+        The infrastructure data collected in the columnar mode.
+        """
         aux_data = []
         # if self.domain:
         #     aux_data = self.compute_zone_data_collect()
 
         # local domain
         self.infrastructure_data: List[InfrastructureData] = aux_data
-        self.aggregated_infrastructure_data: Dict[str, AggregatedData] = dict()
+        self.aggregated_infrastructure_data: Dict[AggregatedKey, AggregatedData] = dict()
 
-        # The data aggregated of the child zones
-        self.child_zones_aggregated_data: Dict[str, Dict[str, AggregatedData]] = dict()
+        # The data aggregated of the child zones, the key is the child zone id
+        self.child_zones_aggregated_data: Dict[int, Dict[AggregatedKey, AggregatedData]] = dict()
 
         # local + child zones aggregated data
-        self.aggregated_data: Dict[str, AggregatedData] = dict()
+        self.aggregated_data: Dict[AggregatedKey, AggregatedData] = dict()
+
+        self.aggregated_zones: Dict[AggregatedKey, int] = dict()
+        """
+        The id of the zone of each aggregated data, the zone itself for the local data or the child zone that sent it.
+        """
+
+        self.zone_vnf_cost: Dict[int, Dict[int, float]] = dict()
+        """
+        Index of the aggregated data with the min cost of each VNF id in each zone id.
+        """
+
+        self.zone_vnfs: Dict[int, Set[int]] = dict()
+        """
+        Index of the aggregated data with the VNF ids available in each zone id.
+        """
+
+        self.vnf_zones: Dict[int, Set[int]] = dict()
+        """
+        Index of the aggregated data with the zone ids where each VNF id is available. The VNFs are in the order they
+        first appear in the aggregated data.
+        """
+
+        self.vnf_cost: Dict[int, float] = dict()
+        """
+        Index of the aggregated data with the min cost of each VNF id in any zone.
+        """
+
+        self.vnf_coverage: int = 0
+        """
+        Bitset of the VNF ids that can be executed in the zone or in any zone below it, bit i is the VNF id i.
+        """
+
+        self.version: int = 0
+        """
+        Incremented each time the aggregated data changes. Callers can compare it with the version seen before to know
+        if the aggregated data is still current.
+        """
+
+        self.pending_keys: Dict[AggregatedKey, None] = dict()
+        """
+        The keys of the aggregated data changed since the last delta sent to the parent zone, in the order they
+        changed.
+        """
+
+        self.sent_seq: int = 0
+        """
+        The seq of the last delta sent to the parent zone.
+        """
+
+        self.child_zones_seq: Dict[int, int] = dict()
+        """
+        The seq of the last delta applied of each child zone id.
+        """
+
+        self.aggregated_infrastructure_fronts: Dict[AggregatedKey, AggregatedFront] = dict()
+        """
+        The Pareto front of each (GW, VNF) of the local domain, only in the Pareto summary mode.
+        """
+
+        self.child_zones_aggregated_fronts: Dict[int, Dict[AggregatedKey, AggregatedFront]] = dict()
+        """
+        The Pareto fronts received from each child zone id, only in the Pareto summary mode.
+        """
+
+        self.aggregated_fronts: Dict[AggregatedKey, AggregatedFront] = dict()
+        """
+        The Pareto front of each (GW, VNF) of the local and child zones data, only in the Pareto summary mode. The
+        aggregated_data has the first record of each front.
+        """
+
+        self.aggregated_front_zones: Dict[AggregatedKey, Tuple[int, ...]] = dict()
+        """
+        The zone id of each record of the Pareto fronts.
+        """
 
     @property
     def domain(self):
@@ -81,6 +259,57 @@ class SPEED(Entity):
 
         self._zone_name = value
 
+    @property
+    def collection_mode(self):
+        """
+        The infrastructure data collection mode.
+        """
+        return self._collection_mode
+
+    @collection_mode.setter
+    def collection_mode(self, value: str):
+        """
+        Set the infrastructure data collection mode.
+        """
+        if value not in SPEED.VALID_COLLECTION_MODES:
+            raise TypeError("The collection_mode {} is invalid".format(value))
+
+        self._collection_mode = value
+
+    @property
+    def summary_mode(self):
+        """
+        The aggregated data summary mode.
+        """
+        return self._summary_mode
+
+    @summary_mode.setter
+    def summary_mode(self, value: str):
+        """
+        Set the aggregated data summary mode.
+        """
+        if value not in SPEED.VALID_SUMMARY_MODES:
+            raise TypeError("The summary_mode {} is invalid".format(value))
+
+        self._summary_mode = value
+
+    @property
+    def pareto_k(self):
+        """
+        The max amount of records in the Pareto front of each (GW, VNF).
+        """
+        return self._pareto_k
+
+    @pareto_k.setter
+    def pareto_k(self, value: int):
+        """
+        Set the max amount of records in the Pareto fronts.
+        """
+        if not type(value) == int or value < 1:
+            raise TypeError("The pareto_k must be an int greater than 0.")
+
+        self._pareto_k = value
+
     def compute_zone_data_collect(self) -> List[InfrastructureData]:
         """
         Collect network and compute data about all the nodes in the zone domain:
@@ -93,9 +322,12 @@ class SPEED(Entity):
         if not self.domain:
             raise TypeError("The zone {} must be compute zone".format(self.zone_name))
 
+        zone_id = self.registry.zones.intern(self.zone_name)
+
         infrastructure_data = []
         for node_name, node in self.domain.nodes.items():
             delay_to_all_gws = self.delay_to_all_gws(node)
+            gw_ids = [self.registry.gws.intern(gw) for gw in delay_to_all_gws.keys()]
 
             already_allocated: Resource = Resource(cpu=0, mem=0)
 
@@ -110,12 +342,14 @@ class SPEED(Entity):
                     mem_cost = node.get_extra_parameter("mem_cost")
                     cost = vnf.cpu * cpu_cost + vnf.mem * mem_cost
 
+                    vnf_id = self.registry.vnfs.intern(vnf_name)
+
                     resource_available = node.resources_available()
-                    for gw, delay in delay_to_all_gws.items():
+                    for gw_id, delay in zip(gw_ids, delay_to_all_gws.values()):
                         aux_data = InfrastructureData(
-                            zone=self.zone_name,
-                            vnf=vnf_name,
-                            gw=gw,
+                            zone=zone_id,
+                            vnf=vnf_id,
+                            gw=gw_id,
                             delay=delay,
                             node=node.name,
                             cost=cost,
@@ -128,76 +362,702 @@ class SPEED(Entity):
 
         return infrastructure_data
 
-    def aggregate_infrastructure_data(self) -> Dict[str, AggregatedData]:
+    def compute_zone_data_collect_columnar(self) -> np.ndarray:
+        """
+        Collect the same data of compute_zone_data_collect as one NumPy structured array (INFRASTRUCTURE_DTYPE).
+
+        The node costs and resources are read once per node and the rows are built with vectorized operations, instead
+        of one dict for each (node, VNF, GW).
+
+        :return: The structured array with the data of the infrastructure.
+        """
+        infrastructure_columns = self.expand_infrastructure_snapshot(self.infrastructure_snapshot())
+
+        self.infrastructure_columns = infrastructure_columns
+
+        return infrastructure_columns
+
+    def infrastructure_snapshot(self) -> Dict[str, np.ndarray]:
+        """
+        Read the nodes of the domain into a compact snapshot, with only NumPy arrays. The snapshot only has the raw
+        data of the nodes, it can be sent to other process to select the VNFs that each node can execute and build the
+        infrastructure data with expand_infrastructure_snapshot.
+
+        * zone: The zone id.
+        * delays: The delay from each node that reaches a GW to all the GWs (one row for each node).
+        * cpu, mem: The resources available in each node.
+        * cpu_cost, mem_cost: The cost of each unit of the resources of each node.
+        * vnf_offsets: The VNFs of the node i are the entries vnf_offsets[i]:vnf_offsets[i + 1] of the VNF arrays.
+        * vnf_ids, vnf_cpu, vnf_mem: The id and the resources required by the VNFs of the nodes, in the node order.
+
+        :return: The snapshot of the domain.
+        """
+        if not self.domain:
+            raise TypeError("The zone {} must be compute zone".format(self.zone_name))
+
+        gateway_delays = self.get_gateway_delays()
+
+        delay_rows: List[np.ndarray] = []
+        node_cpu: List[float] = []
+        node_mem: List[float] = []
+        node_cpu_cost: List[float] = []
+        node_mem_cost: List[float] = []
+        vnf_offsets: List[int] = [0]
+        vnf_ids: List[int] = []
+        vnf_cpu: List[float] = []
+        vnf_mem: List[float] = []
+
+        for node_name, node in self.domain.nodes.items():
+            delay_row = gateway_delays.row(node.name)
+
+            if not np.isfinite(delay_row).any() or not node.vnfs:
+                continue
+
+            resource_available = node.resources_available()
+            delay_rows.append(delay_row)
+            node_cpu.append(resource_available['cpu'])
+            node_mem.append(resource_available['mem'])
+            node_cpu_cost.append(node.get_extra_parameter("cpu_cost"))
+            node_mem_cost.append(node.get_extra_parameter("mem_cost"))
+
+            for vnf_name, vnf in node.vnfs.items():
+                vnf_ids.append(self.registry.vnfs.intern(vnf_name))
+                vnf_cpu.append(vnf.cpu)
+                vnf_mem.append(vnf.mem)
+
+            vnf_offsets.append(len(vnf_ids))
+
+        delays = np.empty((0, len(self.registry.gws)))
+        if delay_rows:
+            delays = np.vstack(delay_rows)
+
+        return {
+            'zone': np.int32(self.registry.zones.intern(self.zone_name)),
+            'delays': delays,
+            'cpu': np.array(node_cpu, dtype=np.float64),
+            'mem': np.array(node_mem, dtype=np.float64),
+            'cpu_cost': np.array(node_cpu_cost, dtype=np.float64),
+            'mem_cost': np.array(node_mem_cost, dtype=np.float64),
+            'vnf_offsets': np.array(vnf_offsets, dtype=np.int64),
+            'vnf_ids': np.array(vnf_ids, dtype=np.int32),
+            'vnf_cpu': np.array(vnf_cpu, dtype=np.float64),
+            'vnf_mem': np.array(vnf_mem, dtype=np.float64)
+        }
+
+    @staticmethod
+    def executable_vnfs(snapshot: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Select the VNFs that each node of a snapshot can execute, as Node.has_resources_to_execute_vnf. The VNFs of a
+        node are checked in order, and the resources of each VNF selected are allocated before checking the next VNF.
+
+        :param snapshot: The snapshot created by infrastructure_snapshot.
+        :return: The row of the node, the VNF id and the cost to execute the VNF in the node of each selected VNF.
+        """
+        vnf_offsets = snapshot['vnf_offsets'].tolist()
+        vnf_cpu = snapshot['vnf_cpu'].tolist()
+        vnf_mem = snapshot['vnf_mem'].tolist()
+
+        selected: List[int] = []
+        pair_node: List[int] = []
+        for node_row, (cpu, mem) in enumerate(zip(snapshot['cpu'].tolist(), snapshot['mem'].tolist())):
+            allocated_cpu = 0
+            allocated_mem = 0
+
+            for i in range(vnf_offsets[node_row], vnf_offsets[node_row + 1]):
+                if allocated_cpu + vnf_cpu[i] <= cpu and allocated_mem + vnf_mem[i] <= mem:
+                    allocated_cpu += vnf_cpu[i]
+                    allocated_mem += vnf_mem[i]
+
+                    selected.append(i)
+                    pair_node.append(node_row)
+
+        selected = np.array(selected, dtype=np.int64)
+        pair_node = np.array(pair_node, dtype=np.int64)
+
+        pair_cost = snapshot['vnf_cpu'][selected] * snapshot['cpu_cost'][pair_node] + \
+            snapshot['vnf_mem'][selected] * snapshot['mem_cost'][pair_node]
+
+        return pair_node, snapshot['vnf_ids'][selected], pair_cost
+
+    @staticmethod
+    def expand_infrastructure_snapshot(snapshot: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Build the infrastructure data of a snapshot, one row for each (node, VNF, reachable GW). The rows are ordered
+        by node, VNF and GW, as in compute_zone_data_collect.
+
+        :param snapshot: The snapshot created by infrastructure_snapshot.
+        :return: The structured array with the INFRASTRUCTURE_DTYPE.
+        """
+        pair_node, pair_vnf, pair_cost = SPEED.executable_vnfs(snapshot)
+        pair_delays = snapshot['delays'][pair_node]
+
+        pairs, gw_ids = np.nonzero(np.isfinite(pair_delays))
+        rows_node = pair_node[pairs]
+
+        columns = np.empty(len(pairs), dtype=INFRASTRUCTURE_DTYPE)
+        columns['zone'] = snapshot['zone']
+        columns['vnf'] = pair_vnf[pairs]
+        columns['gw'] = gw_ids
+        columns['delay'] = pair_delays[pairs, gw_ids]
+        columns['cost'] = pair_cost[pairs]
+        columns['cpu'] = snapshot['cpu'][rows_node]
+        columns['mem'] = snapshot['mem'][rows_node]
+
+        return columns
+
+    @staticmethod
+    def collect_infrastructure_snapshot(snapshot: Dict[str, np.ndarray], min_delay: bool = True) -> np.ndarray:
+        """
+        Build the infrastructure data of a snapshot in a worker process.
+
+        :param snapshot: The snapshot created by infrastructure_snapshot.
+        :param min_delay: If only the rows with the min delay of each (GW, VNF) are returned.
+        :return: The structured array with the INFRASTRUCTURE_DTYPE.
+        """
+        columns = SPEED.expand_infrastructure_snapshot(snapshot)
+
+        if min_delay:
+            columns = SPEED.min_delay_by_gw_vnf(columns)
+
+        return columns
+
+    @staticmethod
+    def min_delay_by_gw_vnf(columns: np.ndarray) -> np.ndarray:
+        """
+        Group the rows by (GW, VNF) and select the row with the min delay of each group. When two rows have the same
+        delay the first collected is selected. The groups are returned in the order they first appear in the rows.
+
+        :param columns: Structured array with the INFRASTRUCTURE_DTYPE.
+        :return: Structured array with one row for each (GW, VNF).
+        """
+        if columns.size == 0:
+            return columns
+
+        keys = columns['gw'].astype(np.int64) * (int(columns['vnf'].max()) + 1) + columns['vnf']
+
+        # sort by key and then by delay, the sort is stable thus ties keep the collection order.
+        order = np.lexsort((columns['delay'], keys))
+        sorted_keys = keys[order]
+
+        group_start = np.ones(len(order), dtype=bool)
+        group_start[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        starts = np.flatnonzero(group_start)
+
+        selected = order[starts]
+        first_seen = np.minimum.reduceat(order, starts)
+
+        return columns[selected[np.argsort(first_seen)]]
+
+    def aggregate_infrastructure_data(self, infrastructure_columns: Optional[np.ndarray] = None) \
+            -> Dict[AggregatedKey, AggregatedData]:
         """
         Aggregate infrastructure data.
 
         Define the min cost to execute each VNFs to the WGW
+        :param infrastructure_columns: The infrastructure data already collected in the columnar format, for example
+        by a worker process.
         :return:
         """
         if not self.domain:
             raise TypeError("The zone {} must be compute zone".format(self.zone_name))
 
-        aggregated_data: Dict[str, AggregatedData] = dict()
+        if infrastructure_columns is not None or self.collection_mode == SPEED.COLLECTION_COLUMNAR:
+            return self.aggregate_infrastructure_data_columnar(infrastructure_columns)
+
+        aggregated_data: Dict[AggregatedKey, AggregatedData] = dict()
 
         infrastructure_data: List[InfrastructureData] = self.compute_zone_data_collect()
 
         for aux_data in infrastructure_data:
-            key_name = "{}_{}".format(aux_data['gw'], aux_data['vnf'])
-            if key_name not in aggregated_data.keys() or aggregated_data[key_name]['delay'] > aux_data['delay']:
-                aggregated_data[key_name] = AggregatedData(
-                    zone=aux_data['zone'],
-                    vnf=aux_data['vnf'],
-                    gw=aux_data['gw'],
-                    delay=aux_data['delay'],
-                    cost=aux_data['cost']
+            key = (aux_data.gw, aux_data.vnf)
+            if key not in aggregated_data or aggregated_data[key].delay > aux_data.delay:
+                aggregated_data[key] = AggregatedData(
+                    vnf=aux_data.vnf,
+                    gw=aux_data.gw,
+                    delay=aux_data.delay,
+                    cost=aux_data.cost
                 )
 
         self.aggregated_infrastructure_data = aggregated_data
 
         return aggregated_data
 
-    def update_child_zone_aggregated_data(self, zone_name: str, child_zone_aggregated_data: Dict[str, AggregatedData]):
+    def aggregate_infrastructure_data_columnar(self, infrastructure_columns: Optional[np.ndarray] = None) \
+            -> Dict[AggregatedKey, AggregatedData]:
         """
-        Add the aggregated data about a child zone in the parent zone.
+        Aggregate infrastructure data collected in the columnar mode. Only the rows with the min delay for each
+        (GW, VNF) are converted to AggregatedData.
+
+        :param infrastructure_columns: The infrastructure data already collected, when not defined it is collected.
+        :return:
+        """
+        if infrastructure_columns is None:
+            infrastructure_columns = self.compute_zone_data_collect_columnar()
+
+        columns = self.min_delay_by_gw_vnf(infrastructure_columns)
+
+        aggregated_data: Dict[AggregatedKey, AggregatedData] = dict()
+        for vnf_id, gw_id, delay, cost in zip(columns['vnf'].tolist(), columns['gw'].tolist(),
+                                              columns['delay'].tolist(), columns['cost'].tolist()):
+            aggregated_data[(gw_id, vnf_id)] = AggregatedData(
+                vnf=vnf_id,
+                gw=gw_id,
+                delay=delay,
+                cost=cost
+            )
+
+        self.aggregated_infrastructure_data = aggregated_data
+
+        return aggregated_data
+
+    def aggregate_infrastructure_fronts(self, infrastructure_columns: Optional[np.ndarray] = None) \
+            -> Dict[AggregatedKey, AggregatedFront]:
+        """
+        Aggregate infrastructure data in the Pareto summary mode. Each (GW, VNF) keeps the delay and cost Pareto front
+        of the nodes of the domain.
+
+        :param infrastructure_columns: The infrastructure data already collected in the columnar format, for example
+        by a worker process.
+        :return:
+        """
+        if not self.domain:
+            raise TypeError("The zone {} must be compute zone".format(self.zone_name))
+
+        zone_id = self.registry.zones.intern(self.zone_name)
+        entries: Dict[AggregatedKey, List[Tuple[AggregatedData, int]]] = dict()
+
+        if infrastructure_columns is not None or self.collection_mode == SPEED.COLLECTION_COLUMNAR:
+            columns = infrastructure_columns
+            if columns is None:
+                columns = self.compute_zone_data_collect_columnar()
+            records = zip(columns['vnf'].tolist(), columns['gw'].tolist(),
+                          columns['delay'].tolist(), columns['cost'].tolist())
+        else:
+            records = ((aux.vnf, aux.gw, aux.delay, aux.cost) for aux in self.compute_zone_data_collect())
+
+        for vnf_id, gw_id, delay, cost in records:
+            key = (gw_id, vnf_id)
+            if key not in entries:
+                entries[key] = list()
+            entries[key].append((AggregatedData(vnf=vnf_id, gw=gw_id, delay=delay, cost=cost), zone_id))
+
+        fronts: Dict[AggregatedKey, AggregatedFront] = dict()
+        for key, aux_entries in entries.items():
+            fronts[key] = self.pareto_front(aux_entries, self.pareto_k)[0]
+
+        self.aggregated_infrastructure_fronts = fronts
+        self.aggregated_infrastructure_data = {key: front[0] for key, front in fronts.items()}
+
+        return fronts
+
+    @staticmethod
+    def pareto_front(entries: List[Tuple[AggregatedData, int]], k: int) -> Tuple[AggregatedFront, Tuple[int, ...]]:
+        """
+        Select the records that are not dominated in delay and cost. When two records have the same delay and cost the
+        first is selected.
+
+        When the front has more than k records, the record with the min delay, the record with the min cost and
+        records evenly spaced between them are kept.
+
+        :param entries: List with the records and the zone id of each record.
+        :param k: The max amount of records in the front.
+        :return: The front ordered by delay and the zone id of each record.
+        """
+        entries = sorted(entries, key=lambda entry: (entry[0].delay, entry[0].cost))
+
+        front = []
+        zones = []
+        for aux_data, zone_id in entries:
+            if not front or aux_data.cost < front[-1].cost:
+                front.append(aux_data)
+                zones.append(zone_id)
+
+        if len(front) > k:
+            if k == 1:
+                selected = [0]
+            else:
+                selected = [round(i * (len(front) - 1) / (k - 1)) for i in range(k)]
+
+            front = [front[i] for i in selected]
+            zones = [zones[i] for i in selected]
+
+        return tuple(front), tuple(zones)
+
+    def merge_key_front(self, key: AggregatedKey) -> Tuple[AggregatedFront, Tuple[int, ...]]:
+        """
+        Merge the local front and the child zones fronts of one key.
+
+        :param key: The key of the aggregated data.
+        :return: The front and the zone id of each record.
+        """
+        entries: List[Tuple[AggregatedData, int]] = list()
+
+        local_front = self.aggregated_infrastructure_fronts.get(key)
+        if local_front:
+            zone_id = self.registry.zones.intern(self.zone_name)
+            entries.extend((aux_data, zone_id) for aux_data in local_front)
+
+        for child_zone_id, aux_fronts in self.child_zones_aggregated_fronts.items():
+            aux_front = aux_fronts.get(key)
+            if aux_front:
+                entries.extend((aux_data, child_zone_id) for aux_data in aux_front)
+
+        return self.pareto_front(entries, self.pareto_k)
+
+    def update_child_zone_aggregated_data(self, zone_name: str,
+                                          child_zone_aggregated_data: Dict[AggregatedKey, AggregatedData],
+                                          child_zone_aggregated_fronts: Dict[AggregatedKey, AggregatedFront] = None):
+        """
+        Replace all the aggregated data about a child zone in the parent zone. The data is only used in the next
+        aggregation.
+
+        The records are not copied, only the dict, because the deltas of the child zone are applied to it.
 
         :param zone_name: The name of the child zone that send the data.
         :param child_zone_aggregated_data: The aggregated data in the child zone.
+        :param child_zone_aggregated_fronts: The Pareto fronts in the child zone, when not defined each front has only
+        the aggregated data record.
         :return:
         """
-        # create a copy of each aggregated data and change the zone name to the child zone that send the data
-        new_aggregated_data: Dict[str, AggregatedData] = dict()
-        for aux_key, aux_data in child_zone_aggregated_data.items():
-            new_aggregated_data[aux_key] = AggregatedData(
-                zone=zone_name,
-                vnf=aux_data['vnf'],
-                gw=aux_data['gw'],
-                delay=aux_data['delay'],
-                cost=aux_data['cost']
-            )
+        zone_id = self.registry.zones.intern(zone_name)
+
+        self.child_zones_aggregated_data[zone_id] = dict(child_zone_aggregated_data)
 
-        self.child_zones_aggregated_data[zone_name] = new_aggregated_data
+        if self.summary_mode == SPEED.SUMMARY_PARETO:
+            if child_zone_aggregated_fronts is None:
+                child_zone_aggregated_fronts = {
+                    key: (aux_data,) for key, aux_data in child_zone_aggregated_data.items()
+                }
 
-    def aggregate_date(self):
+            self.child_zones_aggregated_fronts[zone_id] = dict(child_zone_aggregated_fronts)
+
+    def apply_child_zone_delta(self, delta: AggregationDelta) -> bool:
+        """
+        Apply the delta sent by a child zone, only the changed keys are aggregated again.
+
+        :param delta: The delta sent by the child zone.
+        :return: True if the aggregated data of this zone changed.
+        """
+        last_seq = self.child_zones_seq.get(delta.zone, 0)
+
+        # stale or duplicated delta
+        if delta.seq <= last_seq:
+            return False
+
+        if delta.base_seq != last_seq:
+            raise TypeError("The delta {} of the zone {} is based on {}, but the last delta applied is {}.".format(
+                delta.seq, self.registry.zones.name(delta.zone), delta.base_seq, last_seq
+            ))
+
+        self.child_zones_seq[delta.zone] = delta.seq
+
+        if delta.zone not in self.child_zones_aggregated_data:
+            self.child_zones_aggregated_data[delta.zone] = dict()
+
+        child_data = self.child_zones_aggregated_data[delta.zone]
+        child_data.update(delta.upserts)
+        for key in delta.removed:
+            child_data.pop(key, None)
+
+        if self.summary_mode == SPEED.SUMMARY_PARETO:
+            if delta.zone not in self.child_zones_aggregated_fronts:
+                self.child_zones_aggregated_fronts[delta.zone] = dict()
+
+            child_fronts = self.child_zones_aggregated_fronts[delta.zone]
+            for key, aux_data in delta.upserts.items():
+                child_fronts[key] = delta.fronts.get(key, (aux_data,))
+            for key in delta.removed:
+                child_fronts.pop(key, None)
+
+        changed = False
+        for key in delta.upserts:
+            changed = self.aggregate_key(key) or changed
+        for key in delta.removed:
+            changed = self.aggregate_key(key) or changed
+
+        if changed:
+            self.index_aggregated_data()
+            self.version += 1
+
+        return changed
+
+    def aggregate_key(self, key: AggregatedKey) -> bool:
+        """
+        Aggregate again the local data and the child zones data of one key.
+
+        :param key: The key of the aggregated data.
+        :return: True if the aggregated data or its zone changed.
+        """
+        if self.summary_mode == SPEED.SUMMARY_PARETO:
+            return self.aggregate_key_front(key)
+
+        best = self.aggregated_infrastructure_data.get(key)
+        best_zone = None
+        if best is not None:
+            best_zone = self.registry.zones.intern(self.zone_name)
+
+        for child_zone_id, aux_aggregated_data in self.child_zones_aggregated_data.items():
+            aux_data = aux_aggregated_data.get(key)
+            if aux_data is not None and (best is None or best.delay > aux_data.delay):
+                best = aux_data
+                best_zone = child_zone_id
+
+        current = self.aggregated_data.get(key)
+
+        if best is None:
+            if current is None:
+                return False
+
+            del self.aggregated_data[key]
+            del self.aggregated_zones[key]
+            self.pending_keys[key] = None
+            return True
+
+        if current != best:
+            self.pending_keys[key] = None
+        elif self.aggregated_zones[key] == best_zone:
+            return False
+
+        self.aggregated_data[key] = best
+        self.aggregated_zones[key] = best_zone
+
+        return True
+
+    def aggregate_key_front(self, key: AggregatedKey) -> bool:
+        """
+        Aggregate again the Pareto front of one key.
+
+        :param key: The key of the aggregated data.
+        :return: True if the front or the zones of its records changed.
+        """
+        front, zones = self.merge_key_front(key)
+        current = self.aggregated_fronts.get(key)
+
+        if not front:
+            if current is None:
+                return False
+
+            del self.aggregated_fronts[key]
+            del self.aggregated_front_zones[key]
+            del self.aggregated_data[key]
+            del self.aggregated_zones[key]
+            self.pending_keys[key] = None
+            return True
+
+        if current != front:
+            self.pending_keys[key] = None
+        elif self.aggregated_front_zones[key] == zones:
+            return False
+
+        self.aggregated_fronts[key] = front
+        self.aggregated_front_zones[key] = zones
+        self.aggregated_data[key] = front[0]
+        self.aggregated_zones[key] = zones[0]
+
+        return True
+
+    def aggregate_date(self, infrastructure_columns: Optional[np.ndarray] = None):
         """
         Process the local aggregated data, and the child received aggregated data and return to the parent zone.
 
+        :param infrastructure_columns: The infrastructure data of the local domain already collected in the columnar
+        format, when not defined it is collected.
         :return:
         """
-        aggregated_data: Dict[str, AggregatedData] = dict()
+        if self.summary_mode == SPEED.SUMMARY_PARETO:
+            return self.aggregate_date_fronts(infrastructure_columns)
 
-        if self.domain:
-            aggregated_data = self.aggregate_infrastructure_data()
+        aggregated_data: Dict[AggregatedKey, AggregatedData] = dict()
+        aggregated_zones: Dict[AggregatedKey, int] = dict()
 
-        for aux_aggregated_data in self.child_zones_aggregated_data.values():
-            for key_name, aux_data in aux_aggregated_data.items():
-                if key_name not in aggregated_data.keys() or aggregated_data[key_name]['delay'] > aux_data['delay']:
-                    aggregated_data[key_name] = aux_data
+        if self.domain:
+            aggregated_data.update(self.aggregate_infrastructure_data(infrastructure_columns))
+            aggregated_zones = dict.fromkeys(aggregated_data, self.registry.zones.intern(self.zone_name))
+
+        for child_zone_id, aux_aggregated_data in self.child_zones_aggregated_data.items():
+            for key, aux_data in aux_aggregated_data.items():
+                current = aggregated_data.get(key)
+                if current is None or current.delay > aux_data.delay:
+                    aggregated_data[key] = aux_data
+                    aggregated_zones[key] = child_zone_id
+
+        # keep the keys changed since the last aggregation to the next delta
+        old_aggregated_data = self.aggregated_data
+        for key, aux_data in aggregated_data.items():
+            if old_aggregated_data.get(key) != aux_data:
+                self.pending_keys[key] = None
+        for key in old_aggregated_data:
+            if key not in aggregated_data:
+                self.pending_keys[key] = None
+
+        changed = aggregated_data != old_aggregated_data or aggregated_zones != self.aggregated_zones
 
         self.aggregated_data = aggregated_data
+        self.aggregated_zones = aggregated_zones
+
+        if changed:
+            self.index_aggregated_data()
+            self.version += 1
 
         return aggregated_data
 
+    def aggregate_date_fronts(self, infrastructure_columns: Optional[np.ndarray] = None):
+        """
+        Process the local and the child zones Pareto fronts, the aggregated data has the first record of each front.
+
+        :param infrastructure_columns: The infrastructure data of the local domain already collected in the columnar
+        format, when not defined it is collected.
+        :return:
+        """
+        keys: Dict[AggregatedKey, None] = dict()
+
+        if self.domain:
+            keys.update(dict.fromkeys(self.aggregate_infrastructure_fronts(infrastructure_columns)))
+
+        for aux_fronts in self.child_zones_aggregated_fronts.values():
+            keys.update(dict.fromkeys(aux_fronts))
+
+        aggregated_fronts: Dict[AggregatedKey, AggregatedFront] = dict()
+        aggregated_front_zones: Dict[AggregatedKey, Tuple[int, ...]] = dict()
+        for key in keys:
+            front, zones = self.merge_key_front(key)
+            if front:
+                aggregated_fronts[key] = front
+                aggregated_front_zones[key] = zones
+
+        # keep the keys changed since the last aggregation to the next delta
+        old_aggregated_fronts = self.aggregated_fronts
+        for key, front in aggregated_fronts.items():
+            if old_aggregated_fronts.get(key) != front:
+                self.pending_keys[key] = None
+        for key in old_aggregated_fronts:
+            if key not in aggregated_fronts:
+                self.pending_keys[key] = None
+
+        changed = aggregated_fronts != old_aggregated_fronts or aggregated_front_zones != self.aggregated_front_zones
+
+        self.aggregated_fronts = aggregated_fronts
+        self.aggregated_front_zones = aggregated_front_zones
+        self.aggregated_data = {key: front[0] for key, front in aggregated_fronts.items()}
+        self.aggregated_zones = {key: zones[0] for key, zones in aggregated_front_zones.items()}
+
+        if changed:
+            self.index_aggregated_data()
+            self.version += 1
+
+        return self.aggregated_data
+
+    def compute_delta(self) -> AggregationDelta:
+        """
+        Create the delta with the aggregated data changed since the last delta sent to the parent zone.
+
+        :return: The delta, when nothing changed the delta is empty and must not be sent.
+        """
+        upserts: Dict[AggregatedKey, AggregatedData] = dict()
+        removed: List[AggregatedKey] = list()
+
+        for key in self.pending_keys:
+            aux_data = self.aggregated_data.get(key)
+            if aux_data is None:
+                removed.append(key)
+            else:
+                upserts[key] = aux_data
+
+        self.pending_keys = dict()
+
+        fronts: Dict[AggregatedKey, AggregatedFront] = dict()
+        if self.summary_mode == SPEED.SUMMARY_PARETO:
+            for key in upserts:
+                fronts[key] = self.aggregated_fronts[key]
+
+        base_seq = self.sent_seq
+        if upserts or removed:
+            self.sent_seq = self.version
+
+        return AggregationDelta(
+            zone=self.registry.zones.intern(self.zone_name),
+            seq=self.sent_seq,
+            base_seq=base_seq,
+            upserts=upserts,
+            removed=removed,
+            fronts=fronts
+        )
+
+    def aggregated_entries(self):
+        """
+        Iterate over all the aggregated records and its zone id, in the Pareto summary mode all the records of the
+        fronts are included.
+
+        :return:
+        """
+        if self.summary_mode == SPEED.SUMMARY_PARETO:
+            for key, front in self.aggregated_fronts.items():
+                yield from zip(self.aggregated_front_zones[key], front)
+        else:
+            aggregated_zones = self.aggregated_zones
+            for key, data in self.aggregated_data.items():
+                yield aggregated_zones[key], data
+
+    def index_aggregated_data(self):
+        """
+        Build the indexes used to query the aggregated data without scanning all the entries.
+
+        :return:
+        """
+        zone_vnf_cost: Dict[int, Dict[int, float]] = dict()
+        zone_vnfs: Dict[int, Set[int]] = dict()
+        vnf_zones: Dict[int, Set[int]] = dict()
+        vnf_cost: Dict[int, float] = dict()
+
+        for zone_id, data in self.aggregated_entries():
+            vnf_id = data.vnf
+            cost = data.cost
+
+            if zone_id not in zone_vnf_cost:
+                zone_vnf_cost[zone_id] = dict()
+                zone_vnfs[zone_id] = set()
+
+            if vnf_id not in vnf_zones:
+                vnf_zones[vnf_id] = set()
+
+            if vnf_id not in zone_vnf_cost[zone_id] or zone_vnf_cost[zone_id][vnf_id] > cost:
+                zone_vnf_cost[zone_id][vnf_id] = cost
+
+            if vnf_id not in vnf_cost or vnf_cost[vnf_id] > cost:
+                vnf_cost[vnf_id] = cost
+
+            zone_vnfs[zone_id].add(vnf_id)
+            vnf_zones[vnf_id].add(zone_id)
+
+        self.zone_vnf_cost = zone_vnf_cost
+        self.zone_vnfs = zone_vnfs
+        self.vnf_zones = vnf_zones
+        self.vnf_cost = vnf_cost
+
+        vnf_coverage = 0
+        for vnf_id in vnf_zones.keys():
+            vnf_coverage |= 1 << vnf_id
+        self.vnf_coverage = vnf_coverage
+
+    def covers_vnfs(self, vnf_names: List[str]) -> bool:
+        """
+        Check if all the VNFs can be executed in the zone or in the zones below it. Each VNF of a chain covered by the
+        zone can be executed by a child zone, thus the plan with one segment for each VNF is valid.
+
+        :param vnf_names: The name of the VNFs.
+        :return:
+        """
+        vnf_ids = self.registry.vnfs.ids
+
+        vnfs_mask = 0
+        for vnf in vnf_names:
+            # the VNFs never aggregated are not covered by any zone
+            if vnf not in vnf_ids:
+                return False
+            vnfs_mask |= 1 << vnf_ids[vnf]
+
+        return vnfs_mask & ~self.vnf_coverage == 0
+
     def valid_segmentation_plans(self, plans: Dict) -> Dict:
         """
         Check the valid segmentation plan based on the zone data
@@ -206,36 +1066,115 @@ class SPEED(Entity):
         :return:
         """
         aux_plans = dict()
-        vnf_in_zone: Dict[str, List[str]] = dict()
-
-        for data in self.aggregated_data.values():
-            if data['zone'] not in vnf_in_zone.keys():
-                vnf_in_zone[data['zone']] = []
-
-            if data['vnf'] not in vnf_in_zone[data['zone']]:
-                vnf_in_zone[data['zone']].append(data['vnf'])
-
-        for plan_name, aux_plan in plans.items():
-            for zone_name, vnfs in vnf_in_zone.items():
-                for segment_name, aux_segment in aux_plan['segments'].items():
-                    valid = True
-                    for vnf in aux_segment['vnfs']:
-                        if vnf not in vnfs:
-                            valid = False
-                    if valid:
-                        if zone_name not in aux_segment['zones']:
-                            aux_segment['zones'].append(zone_name)
 
         for plan_name, aux_plan in plans.items():
             valid_plan = True
             for segment_name, aux_segment in aux_plan['segments'].items():
+                for zone_name in self.segment_zones(aux_segment['vnfs']):
+                    if zone_name not in aux_segment['zones']:
+                        aux_segment['zones'].append(zone_name)
+
                 if len(aux_segment['zones']) == 0:
                     valid_plan = False
+
             if valid_plan:
                 aux_plans[plan_name] = aux_plan
 
         return aux_plans
 
+    def iter_valid_segmentation_plans(self, vnf_names: List[str], mode: str = SPEEDHelper.SEGMENTATION_CONTIGUOUS,
+                                      search: str = SPEEDHelper.SEARCH_ALL) -> Iterator[Tuple[str, dict]]:
+        """
+        Yield the valid segmentation plans of the VNFs based on the zone data, the same plans of
+        valid_segmentation_plans but the invalid plans are never created.
+
+        :param vnf_names: The name of the VNFs.
+        :param mode: How the chain is split in segments.
+        :param search: Which valid plans are created, all or only the plans with the fewest segments.
+        :return: Iterator of (plan name, plan).
+        """
+        return SPEEDHelper.iter_vnf_segmentation(
+            vnf_names=vnf_names,
+            segment_zones=self.segment_zones,
+            mode=mode,
+            search=search
+        )
+
+    def iter_valid_template_plans(self, vnf_names: List[str], template: SegmentationTemplate,
+                                  validity: SegmentationValidity = None) -> Iterator[Tuple[str, dict]]:
+        """
+        Yield the valid segmentation plans of a segmentation template based on the zone data, the template is not
+        changed.
+
+        :param vnf_names: The name of the VNFs.
+        :param template: The segmentation template of the VNFs.
+        :param validity: The validity of the template, computed when it is not informed.
+        :return: Iterator of (plan name, plan).
+        """
+        if validity is None:
+            validity = self.segmentation_validity(vnf_names, template)
+
+        return SPEEDHelper.iter_template_segmentation(
+            vnf_names=vnf_names,
+            template=template,
+            validity=validity
+        )
+
+    def segmentation_validity(self, vnf_names: List[str], template: SegmentationTemplate) -> SegmentationValidity:
+        """
+        Return the zones that can execute each segment of all the plans of a segmentation template.
+
+        :param vnf_names: The name of the VNFs.
+        :param template: The segmentation template of the VNFs.
+        :return:
+        """
+        zone_names, zone_masks = self.zone_masks(vnf_names)
+
+        return SPEEDHelper.segmentation_validity(
+            template=template,
+            zone_names=zone_names,
+            zone_masks=zone_masks
+        )
+
+    def zone_masks(self, vnf_names: List[str]) -> Tuple[List[str], np.ndarray]:
+        """
+        Return the bitmask of the positions of the chain with a VNF available in each zone, bit i is the VNF i of the
+        chain.
+
+        :param vnf_names: The name of the VNFs of the chain.
+        :return: The name of the zones and its masks.
+        """
+        vnf_ids = self.registry.vnfs.ids
+        zone_names = self.registry.zones.names
+
+        # the VNFs never aggregated receive the id -1, thus they are not in any mask
+        chain = [vnf_ids.get(vnf, -1) for vnf in vnf_names]
+
+        aux_zone_names = []
+        zone_masks = np.zeros(len(self.zone_vnfs), dtype=np.int64)
+        for i, (zone_id, vnfs) in enumerate(self.zone_vnfs.items()):
+            aux_zone_names.append(zone_names[zone_id])
+            zone_masks[i] = SPEEDHelper.positions_mask(
+                position for position, vnf_id in enumerate(chain) if vnf_id in vnfs
+            )
+
+        return aux_zone_names, zone_masks
+
+    def segment_zones(self, vnf_names: List[str]) -> List[str]:
+        """
+        Return the zones that can execute all the VNFs of a segment.
+
+        :param vnf_names: The name of the VNFs of the segment.
+        :return: The name of the zones.
+        """
+        vnf_ids = self.registry.vnfs.ids
+        zone_names = self.registry.zones.names
+
+        # the VNFs never aggregated receive the id -1, thus no zone can execute them
+        segment_vnfs = set(vnf_ids.get(vnf, -1) for vnf in vnf_names)
+
+        return [zone_names[zone_id] for zone_id, vnfs in self.zone_vnfs.items() if segment_vnfs <= vnfs]
+
     def delay_to_all_gws(self, node: Node) -> Dict[str, int]:
         """
         Return the delay from a node to all the GWs of the environment.
@@ -243,21 +1182,32 @@ class SPEED(Entity):
         :param node: The node.
         :return: Dict with the name of the GW as key, and the delay as value.
         """
-        if node.name in delay_to_all_gws_aux:
-            return delay_to_all_gws_aux[node.name]
+        gateway_delays = self.get_gateway_delays()
 
-        g = self.environment['topology'].get_graph()
-        aux: Dict[str, int] = dict()
-        nodes: Dict[str, Node] = self.environment['nodes']
-        for node_name, aux_node in nodes.items():
-            if aux_node.is_gateway():
-                delay = nx.shortest_path_length(g, node.name, node_name, weight="delay")
-                aux[node_name] = delay
+        aux = self.topology_cache.get(gateway_delays.fingerprint, node.name)
 
-        delay_to_all_gws_aux[node.name] = aux
+        if aux is None:
+            aux = gateway_delays.delays_from(node.name)
+            self.topology_cache.put(gateway_delays.fingerprint, node.name, aux)
 
         return aux
 
+    def get_gateway_delays(self) -> GatewayDelayMatrix:
+        """
+        Return the delay matrix from all the nodes to all the GWs. If the SPEED component was created without the
+        matrix, it is built using the environment topology.
+
+        :return:
+        """
+        if not self.gateway_delays:
+            self.gateway_delays = GatewayDelayMatrix(
+                topology=self.environment['topology'],
+                nodes=self.environment['nodes'],
+                registry=self.registry
+            )
+
+        return self.gateway_delays
+
     @staticmethod
     def select_segmentation_plan(segmentation_plan: dict) -> dict:
         """
@@ -291,6 +1241,137 @@ class SPEED(Entity):
 
         return selected_plan
 
+    def child_zones_chain_data(self, vnf_names: List[str]) -> Tuple[List[int], np.ndarray, np.ndarray]:
+        """
+        Return the aggregated data of the child zones for each VNF of a chain.
+
+        :param vnf_names: The name of the VNFs of the chain.
+        :return: The child zone ids, the min cost of each VNF in each child zone (zones x VNFs) and the min delay from
+        each VNF in each child zone to each GW (zones x VNFs x GWs). The VNFs that a child zone can not execute have
+        infinite cost and delay.
+        """
+        vnf_ids = self.registry.vnfs.ids
+        chain = [vnf_ids.get(vnf, -1) for vnf in vnf_names]
+
+        zone_ids = list(self.child_zones_aggregated_data.keys())
+        gw_index: Dict[int, int] = dict()
+        records = []
+
+        for i, zone_id in enumerate(zone_ids):
+            if self.summary_mode == SPEED.SUMMARY_PARETO and zone_id in self.child_zones_aggregated_fronts:
+                zone_records = [
+                    aux_data for front in self.child_zones_aggregated_fronts[zone_id].values() for aux_data in front
+                ]
+            else:
+                zone_records = self.child_zones_aggregated_data[zone_id].values()
+
+            for aux_data in zone_records:
+                if aux_data.gw not in gw_index:
+                    gw_index[aux_data.gw] = len(gw_index)
+                records.append((i, aux_data))
+
+        positions: Dict[int, List[int]] = dict()
+        for position, vnf_id in enumerate(chain):
+            positions.setdefault(vnf_id, []).append(position)
+
+        cost = np.full((len(zone_ids), len(chain)), np.inf)
+        delay = np.full((len(zone_ids), len(chain), len(gw_index)), np.inf)
+
+        for i, aux_data in records:
+            for position in positions.get(aux_data.vnf, []):
+                gw = gw_index[aux_data.gw]
+                cost[i, position] = min(cost[i, position], aux_data.cost)
+                delay[i, position, gw] = min(delay[i, position, gw], aux_data.delay)
+
+        return zone_ids, cost, delay
+
+    def optimal_segmentation_plan(self, vnf_names: List[str], delay_weight: float = DEFAULT_DELAY_WEIGHT) -> dict:
+        """
+        Select the contiguous segments of a chain and the child zone of each segment together, with a dynamic
+        programming over the chain.
+
+        The cost of a segment is the sum of the min cost of its VNFs in the child zone. The delay between two segments
+        is the min delay from the last VNF of a segment to a GW plus the delay from this GW to the first VNF of the next
+        segment. Two consecutive segments are never executed by the same child zone.
+
+        :param vnf_names: The name of the VNFs of the chain.
+        :param delay_weight: The weight of the delay between the segments.
+        :return: The plan with the zone of each segment and its total cost, or an empty dict when the child zones can
+        not execute the chain.
+        """
+        amount_vnfs = len(vnf_names)
+        zone_ids, cost, delay = self.child_zones_chain_data(vnf_names)
+        amount_zones = len(zone_ids)
+
+        # without GWs no child zone has aggregated data
+        if not amount_vnfs or not amount_zones or not delay.shape[2]:
+            return dict()
+
+        # best[i][z] is the min value to execute the first i VNFs with the last segment in the child zone z
+        best = np.full((amount_vnfs + 1, amount_zones), np.inf)
+        best_start = np.zeros((amount_vnfs + 1, amount_zones), dtype=int)
+        best_previous = np.full((amount_vnfs + 1, amount_zones), -1)
+
+        same_zone = np.eye(amount_zones, dtype=bool)
+
+        for start in range(amount_vnfs):
+            # the value to start a segment in each child zone, after the segments of the first VNFs
+            if start == 0:
+                entry = np.zeros(amount_zones)
+                previous = np.full(amount_zones, -1)
+            else:
+                transition = best[start][:, np.newaxis].repeat(amount_zones, axis=1)
+                if delay_weight:
+                    transition = transition + delay_weight * (
+                        delay[:, start - 1, np.newaxis, :] + delay[np.newaxis, :, start, :]
+                    ).min(axis=2)
+                transition[same_zone] = np.inf
+                previous = transition.argmin(axis=0)
+                entry = transition[previous, np.arange(amount_zones)]
+
+            if np.isinf(entry).all():
+                continue
+
+            segment_cost = np.zeros(amount_zones)
+            segment_vnfs = set()
+            for end in range(start + 1, amount_vnfs + 1):
+                # each VNF is counted once, even if it appears more than once in the segment
+                if vnf_names[end - 1] not in segment_vnfs:
+                    segment_vnfs.add(vnf_names[end - 1])
+                    segment_cost = segment_cost + cost[:, end - 1]
+
+                value = entry + segment_cost
+                improved = value < best[end]
+                best[end][improved] = value[improved]
+                best_start[end][improved] = start
+                best_previous[end][improved] = previous[improved]
+
+        zone = int(best[amount_vnfs].argmin())
+        total = float(best[amount_vnfs][zone])
+
+        if np.isinf(total):
+            return dict()
+
+        zone_names = self.registry.zones.names
+        segments = []
+        end = amount_vnfs
+        while end > 0:
+            start = int(best_start[end][zone])
+            segments.append((vnf_names[start:end], zone_names[zone_ids[zone]]))
+            zone, end = int(best_previous[end][zone]), start
+
+        plan_segments = dict()
+        for count_segments, (segment_vnfs, zone_name) in enumerate(reversed(segments)):
+            plan_segments["seg_{}".format(count_segments)] = {
+                "vnfs": segment_vnfs,
+                "zones": [zone_name]
+            }
+
+        return {
+            'segments': plan_segments,
+            'cost': total
+        }
+
     def compute_child_zone_vnf_segment_execution_cost(self, vnf_segment: dict, zone_name: str) -> float:
         """
         Compute the cost for execute the segment in a child zone. The cost is computed based on the aggregated data
@@ -301,42 +1382,69 @@ class SPEED(Entity):
         :return:
         """
         cost = 0.0
-        min_cost = dict()
-        for vnf in vnf_segment['vnfs']:
-            min_cost[vnf] = sys.maxsize
-            for aggregated_data in self.aggregated_data.values():
-                if aggregated_data['vnf'] == vnf and aggregated_data['zone'] == zone_name:
-                    if min_cost[vnf] > aggregated_data['cost']:
-                        min_cost[vnf] = aggregated_data['cost']
+        vnf_ids = self.registry.vnfs.ids
+        vnf_cost = self.zone_vnf_cost.get(self.registry.zones.ids.get(zone_name), dict())
 
-        for value in min_cost.values():
-            cost = cost + float(value)
+        # each VNF is counted once, even if it appears more than once in the segment
+        for vnf in dict.fromkeys(vnf_segment['vnfs']):
+            cost = cost + float(vnf_cost.get(vnf_ids.get(vnf), sys.maxsize))
 
         return cost
 
+    def segments_cost_matrix(self, vnf_segments: List[List[str]], zone_names: List[str]) -> np.ndarray:
+        """
+        Compute the cost to execute each segment in each child zone at once, the same cost of
+        compute_child_zone_vnf_segment_execution_cost.
+
+        :param vnf_segments: The VNFs of each segment.
+        :param zone_names: The name of the child zones.
+        :return: The cost matrix (segments x zones).
+        """
+        vnf_ids = self.registry.vnfs.ids
+        zone_ids = self.registry.zones.ids
+
+        # the columns are the VNFs of all the segments, each VNF only once
+        vnf_columns: Dict[str, int] = dict()
+        for vnf_segment in vnf_segments:
+            for vnf in vnf_segment:
+                if vnf not in vnf_columns:
+                    vnf_columns[vnf] = len(vnf_columns)
+
+        cost = np.full((len(zone_names), len(vnf_columns)), float(sys.maxsize))
+        for i, zone_name in enumerate(zone_names):
+            vnf_cost = self.zone_vnf_cost.get(zone_ids.get(zone_name), dict())
+            for vnf, j in vnf_columns.items():
+                vnf_id = vnf_ids.get(vnf)
+                if vnf_id in vnf_cost:
+                    cost[i, j] = vnf_cost[vnf_id]
+
+        # each VNF is counted once, even if it appears more than once in the segment
+        segments = np.zeros((len(vnf_segments), len(vnf_columns)))
+        for i, vnf_segment in enumerate(vnf_segments):
+            for vnf in vnf_segment:
+                segments[i, vnf_columns[vnf]] = 1
+
+        return segments @ cost.T
+
     def vnfs_available(self):
         """
         Return a list with the VNFs available in the zone
         :return:
         """
-        vnfs = dict()
-        for data in self.aggregated_data.values():
-            vnfs[data['vnf']] = 1
+        vnfs = dict.fromkeys(self.vnf_zones)
 
         for data in self.aggregated_infrastructure_data.values():
-            vnfs[data['vnf']] = 1
+            vnfs[data.vnf] = None
 
-        return list(vnfs.keys())
+        vnf_names = self.registry.vnfs.names
+
+        return [vnf_names[vnf_id] for vnf_id in vnfs.keys()]
 
     def min_cost(self, vnf_name):
         """
-        """
-        costs = []
-        for d in self.aggregated_data.values():
-            if d['vnf'] == vnf_name:
-                costs.append(d['cost'])
-
-        if len(costs) == 0:
-            return 0
+        Return the min cost to execute the VNF in any zone, 0 if the VNF is not available.
 
-        return min(costs)
\ No newline at end of file
+        :param vnf_name: The name of the VNF.
+        :return:
+        """
+        return self.vnf_cost.get(self.registry.vnfs.ids.get(vnf_name), 0)
@@ -0,0 +1,176 @@
+from collections import OrderedDict
+from copy import copy
+from sys import getsizeof
+from typing import Any, Hashable, Tuple
+
+
+class TopologyCache:
+    """
+    Cache of values computed from the topology, for example the delay from a node to all the GWs.
+
+    Each entry is keyed by the fingerprint of the topology used to compute it, thus a value computed for other
+    topology is never returned. The cache has a memory budget, when it is exceeded the least recently used entries are
+    evicted.
+
+    The cache keeps a copy of the values, and each lookup returns a copy, thus the cached values are never changed by
+    the callers.
+    """
+
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+    """
+    The default memory budget of the cache (64 MiB).
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Create an empty cache.
+
+        :param max_bytes: The memory budget of the cache in bytes.
+        """
+        self.max_bytes = max_bytes
+
+        self.entries: "OrderedDict[Tuple[str, Hashable], Tuple[Any, int]]" = OrderedDict()
+        """
+        The cached values and its estimated size, from the least to the most recently used.
+        """
+
+        self.used_bytes = 0
+        """
+        The estimated size of all the cached values.
+        """
+
+        self.hits = 0
+        """
+        Amount of lookups that found the value.
+        """
+
+        self.misses = 0
+        """
+        Amount of lookups that did not find the value.
+        """
+
+        self.evictions = 0
+        """
+        Amount of entries removed to respect the memory budget.
+        """
+
+    @property
+    def max_bytes(self):
+        """
+        The memory budget of the cache in bytes.
+        """
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value: int):
+        """
+        Set the memory budget of the cache.
+        """
+        if not type(value) == int or value <= 0:
+            raise TypeError("The max_bytes must be an int greater than 0.")
+
+        self._max_bytes = value
+
+    def get(self, fingerprint: str, key: Hashable):
+        """
+        Return the cached value.
+
+        :param fingerprint: The fingerprint of the topology.
+        :param key: The key of the value.
+        :return: A copy of the value or None if it is not cached.
+        """
+        entry = self.entries.get((fingerprint, key))
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end((fingerprint, key))
+
+        return copy(entry[0])
+
+    def put(self, fingerprint: str, key: Hashable, value):
+        """
+        Cache a value, evicting the least recently used values if the memory budget is exceeded.
+
+        :param fingerprint: The fingerprint of the topology.
+        :param key: The key of the value.
+        :param value: The value.
+        :return:
+        """
+        size = self.estimate_size(value)
+
+        old_entry = self.entries.pop((fingerprint, key), None)
+        if old_entry is not None:
+            self.used_bytes -= old_entry[1]
+
+        # a value bigger than the whole budget is not cached
+        if size > self.max_bytes:
+            return
+
+        self.entries[(fingerprint, key)] = (copy(value), size)
+        self.used_bytes += size
+
+        while self.used_bytes > self.max_bytes:
+            aux_key, (aux_value, aux_size) = self.entries.popitem(last=False)
+            self.used_bytes -= aux_size
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Remove all the cached values, the counters are kept.
+
+        :return:
+        """
+        self.entries.clear()
+        self.used_bytes = 0
+
+    def hit_rate(self) -> float:
+        """
+        The fraction of the lookups that found the value.
+
+        :return:
+        """
+        total = self.hits + self.misses
+
+        if total == 0:
+            return 0.0
+
+        return self.hits / total
+
+    def stats(self) -> dict:
+        """
+        Return the cache counters.
+
+        :return:
+        """
+        return {
+            'entries': len(self.entries),
+            'used_bytes': self.used_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate()
+        }
+
+    @staticmethod
+    def estimate_size(value) -> int:
+        """
+        Estimate the memory used by a value, the items of dicts, lists and tuples are included.
+
+        :param value: The value.
+        :return: The size in bytes.
+        """
+        size = getsizeof(value)
+
+        if isinstance(value, dict):
+            for aux_key, aux_value in value.items():
+                size += getsizeof(aux_key) + getsizeof(aux_value)
+
+        if isinstance(value, (list, tuple)):
+            for aux_value in value:
+                size += getsizeof(aux_value)
+
+        return size
@@ -1,26 +1,107 @@
-from typing import TypedDict
+from typing import Dict, List, NamedTuple, Tuple
 
+import numpy as np
 
-class InfrastructureData(TypedDict):
+
+class InfrastructureData(NamedTuple):
     """
-    The data about the nodes in compute zones.
+    The data about the nodes in compute zones. The zone, vnf and gw are the interned ids of the NameRegistry.
     """
-    zone: str
-    vnf: str
-    gw: str
-    delay: int
+    zone: int
+    vnf: int
+    gw: int
+    delay: float
     node: str
     cost: float
     cpu_available: int
     mem_available: int
 
 
-class AggregatedData(TypedDict):
+class AggregatedData(NamedTuple):
+    """
+    The data aggregated in aggregation zones. The vnf and gw are the interned ids of the NameRegistry.
+
+    The record does not have the zone, the zone that holds the data keeps the child zone of each record. Thus, the
+    same record is shared by all the zones above it without any copy.
+    """
+    vnf: int
+    gw: int
+    delay: float
+    cost: float
+
+
+AggregatedKey = Tuple[int, int]
+"""
+The key of the aggregated data, the interned ids (gw, vnf).
+"""
+
+
+AggregatedFront = Tuple[AggregatedData, ...]
+"""
+The delay and cost Pareto front of a key, ordered by delay. The first record has the min delay and each next record
+has a greater delay and a lower cost.
+"""
+
+
+class AggregationDelta(NamedTuple):
     """
-    The data aggregated in aggregation zones.
+    The changes in the aggregated data of a zone since the last delta sent to its parent zone.
+
+    The seq is the version of the zone when the delta was created, and base_seq the seq of the previous delta. The
+    parent zone only applies a delta if its base_seq is the last seq received from the child zone.
+
+    In the Pareto summary mode the fronts has the front of each upserted key, and the upserts has its first record.
     """
-    zone: str
-    vnf: str
-    gw: str
-    delay: int
-    cost: float
\ No newline at end of file
+    zone: int
+    seq: int
+    base_seq: int
+    upserts: Dict[AggregatedKey, AggregatedData]
+    removed: List[AggregatedKey]
+    fronts: Dict[AggregatedKey, AggregatedFront] = {}
+
+    def size(self) -> int:
+        """
+        The amount of changed entries.
+
+        :return:
+        """
+        return len(self.upserts) + len(self.removed)
+
+
+class SegmentationTemplate(NamedTuple):
+    """
+    All the segmentation plans of a chain. The plans has the plan number and the positions in the chain of the VNFs of
+    each segment.
+
+    The masks has one row for each plan and one column for each segment, each segment is the bitmask of the positions
+    of its VNFs (bit i is the VNF i of the chain). The plans with less segments are completed with 0.
+    """
+    plans: Tuple[Tuple[int, Tuple[Tuple[int, ...], ...]], ...]
+    masks: np.ndarray
+
+
+class SegmentationValidity(NamedTuple):
+    """
+    The zones that can execute each segment of all the plans of a segmentation template.
+
+    The hosts has one row for each plan, one column for each segment and one layer for each zone, the columns used to
+    complete the plans are hosted by all the zones. The valid has if each plan can be executed.
+    """
+    zones: List[str]
+    hosts: np.ndarray
+    valid: np.ndarray
+
+
+INFRASTRUCTURE_DTYPE = np.dtype([
+    ('zone', np.int32),
+    ('vnf', np.int32),
+    ('gw', np.int32),
+    ('delay', np.float64),
+    ('cost', np.float64),
+    ('cpu', np.float64),
+    ('mem', np.float64)
+])
+"""
+The columns of the infrastructure data collected in the columnar mode. The zone, vnf and gw are the interned ids of
+the NameRegistry.
+"""
@@ -0,0 +1,219 @@
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from SimPlacement.topology import Topology
+
+from SPEED.helpers.topology import TopologyHelper
+
+
+class ZoneDelayMatrix:
+    """
+    The delay between the nodes where the distributed service managers of each pair of zones are executed.
+
+    The delays between each zone and its parent zone are computed when the matrix is built, the other pairs when they
+    are used the first time. The delay of a pair is the delay of the same path used by the simulation, thus each hop of
+    the distributed placement is one lookup in the matrix. Only the pairs computed are stored, thus the memory grows
+    with the pairs used and not with the square of the number of zones.
+
+    When a file is informed the matrix is saved in it when it is built, and loaded from it in the next simulation with
+    the same topology and nodes of the zones. The pairs computed lazily are saved by flush, thus the file is not written
+    during the simulation.
+    """
+
+    def __init__(self, topology: Topology, zone_nodes: Dict[str, str], pairs: List[Tuple[str, str]] = None,
+                 file_name: str = None):
+        """
+        Create and build the matrix, or load it from the file.
+
+        :param topology: The topology of the environment.
+        :param zone_nodes: The node of the distributed service manager of each zone.
+        :param pairs: The pairs of zones computed when the matrix is built.
+        :param file_name: The file where the matrix is saved.
+        """
+        self.topology = topology
+        """
+        The topology of the environment.
+        """
+
+        self.zone_nodes: Dict[str, str] = dict(zone_nodes)
+        """
+        The node of the distributed service manager of each zone.
+        """
+
+        self.pairs: List[Tuple[str, str]] = list(pairs) if pairs else list()
+        """
+        The pairs of zones computed when the matrix is built.
+        """
+
+        self.zone_ids: Dict[str, int] = {zone_name: i for i, zone_name in enumerate(self.zone_nodes.keys())}
+        """
+        The row and column of each zone.
+        """
+
+        self.delays: Dict[Tuple[int, int], float] = dict()
+        """
+        The delay of each pair of zones (row, column) computed.
+        """
+
+        self.changed = False
+        """
+        If pairs were computed after the matrix was saved.
+        """
+
+        self.file_name = file_name
+        """
+        The file where the matrix is saved.
+        """
+
+        self.fingerprint = ""
+        """
+        The fingerprint of the topology and the nodes used to build the matrix.
+        """
+
+        if not self.file_name or not self.load(self.file_name):
+            self.build()
+
+    def build(self):
+        """
+        Build the matrix using the current topology.
+
+        :return:
+        """
+        self.delays = dict()
+
+        for zone_name_1, zone_name_2 in self.pairs:
+            i = self.zone_id(zone_name_1)
+            j = self.zone_id(zone_name_2)
+            self.delays[(i, j)] = self.compute_delay(zone_name_1, zone_name_2)
+
+        self.fingerprint = self.compute_fingerprint()
+        self.changed = True
+
+        if self.file_name:
+            self.flush()
+
+    def compute_fingerprint(self) -> str:
+        """
+        The fingerprint of the current topology and nodes of the zones.
+
+        :return:
+        """
+        nodes = ",".join("{}={}".format(zone_name, node_name) for zone_name, node_name in self.zone_nodes.items())
+
+        return "{}_{}".format(TopologyHelper.fingerprint(self.topology.get_graph()), nodes)
+
+    def refresh(self) -> bool:
+        """
+        Build the matrix again only if the topology changed, used as invalidation hook when the topology changes.
+
+        :return: True if the matrix was built again.
+        """
+        if self.compute_fingerprint() == self.fingerprint:
+            return False
+
+        self.build()
+
+        return True
+
+    def compute_delay(self, zone_name_1: str, zone_name_2: str) -> float:
+        """
+        Compute the delay of the path between the nodes of two zones.
+
+        :param zone_name_1: The name of the first zone.
+        :param zone_name_2: The name of the second zone.
+        :return:
+        """
+        sp = self.topology.shortest_simple_edge_path(
+            src_name=self.zone_nodes[zone_name_1],
+            dst_name=self.zone_nodes[zone_name_2],
+        )
+
+        return self.topology.path_delay(path=sp)
+
+    def delay(self, zone_name_1: str, zone_name_2: str) -> float:
+        """
+        Return the delay between the nodes of two zones, it is computed if the pair was not used before.
+
+        :param zone_name_1: The name of the first zone.
+        :param zone_name_2: The name of the second zone.
+        :return:
+        """
+        key = (self.zone_id(zone_name_1), self.zone_id(zone_name_2))
+
+        if key not in self.delays:
+            self.delays[key] = self.compute_delay(zone_name_1, zone_name_2)
+            self.changed = True
+
+        return self.delays[key]
+
+    def zone_id(self, zone_name: str) -> int:
+        """
+        Return the row and column of a zone.
+
+        :param zone_name: The name of the zone.
+        :return:
+        """
+        if zone_name not in self.zone_ids:
+            raise TypeError("The zone {} is not in the zone delay matrix.".format(zone_name))
+
+        return self.zone_ids[zone_name]
+
+    def flush(self):
+        """
+        Save the matrix in its file, only if pairs were computed after it was saved.
+
+        :return:
+        """
+        if not self.file_name or not self.changed:
+            return
+
+        self.save(self.file_name)
+
+    def save(self, file_name: str):
+        """
+        Save the pairs of the matrix in a file, with the fingerprint used to build it.
+
+        :param file_name: The name of the file.
+        :return:
+        """
+        pairs = np.array(list(self.delays.keys()), dtype=np.int64).reshape((-1, 2))
+
+        # np.savez adds the .npz extension to other names
+        with open(file_name, "wb") as f:
+            np.savez(
+                f,
+                fingerprint=np.array(self.fingerprint),
+                zone_names=np.array(list(self.zone_ids.keys())),
+                pairs=pairs,
+                delays=np.array(list(self.delays.values()), dtype=float)
+            )
+
+        self.changed = False
+
+    def load(self, file_name: str) -> bool:
+        """
+        Load the matrix saved in a file, only if it was built with the same topology and nodes of the zones.
+
+        :param file_name: The name of the file.
+        :return: True if the matrix was loaded.
+        """
+        if not os.path.isfile(file_name):
+            return False
+
+        with np.load(file_name) as data:
+            if str(data['fingerprint']) != self.compute_fingerprint():
+                return False
+
+            if data['zone_names'].tolist() != list(self.zone_ids.keys()) or 'pairs' not in data.files:
+                return False
+
+            self.delays = {
+                (i, j): delay for (i, j), delay in zip(data['pairs'].tolist(), data['delays'].tolist())
+            }
+
+        self.fingerprint = self.compute_fingerprint()
+        self.changed = False
+
+        return True
@@ -0,0 +1,156 @@
+from typing import List
+
+import numpy as np
+
+from SPEED.zone_tree import ZoneTree
+
+
+class ZoneLCAIndex:
+    """
+    Index to find the lowest common ancestor of two zones of the zone tree in constant time.
+
+    The index has the Euler tour of the tree, the depth of each visit and a sparse table with the visit of min depth of
+    each range of the tour with size power of 2. The lowest common ancestor of two zones is the visit with min depth
+    between the first visits of the zones, found with two lookups in the sparse table.
+
+    The index is built once and only built again when the zones of the tree change.
+    """
+
+    def __init__(self, zone_tree: ZoneTree):
+        """
+        Create and build the index.
+
+        :param zone_tree: The zone tree.
+        """
+        self.zone_tree: ZoneTree = zone_tree
+        """
+        The zone tree.
+        """
+
+        self.visits: np.ndarray = np.empty(0, dtype=np.int64)
+        """
+        The zone id of each visit of the Euler tour.
+        """
+
+        self.depths: np.ndarray = np.empty(0, dtype=np.int64)
+        """
+        The depth of each visit of the Euler tour.
+        """
+
+        self.first_visit: np.ndarray = np.empty(0, dtype=np.int64)
+        """
+        The first visit of each zone id in the Euler tour.
+        """
+
+        self.roots: np.ndarray = np.empty(0, dtype=np.int64)
+        """
+        The root zone id of the tree of each zone id.
+        """
+
+        self.sparse_table: List[np.ndarray] = list()
+        """
+        The level k has the visit with min depth of the range of size 2^k that starts at each visit.
+        """
+
+        self.fingerprint = ""
+        """
+        The fingerprint of the zone tree used to build the index.
+        """
+
+        self.build()
+
+    def build(self):
+        """
+        Build the index using the current zone tree.
+
+        :return:
+        """
+        zone_tree = self.zone_tree
+        amount_zones = len(zone_tree.names)
+
+        visits: List[int] = list()
+        first_visit = np.zeros(amount_zones, dtype=np.int64)
+        roots = np.zeros(amount_zones, dtype=np.int64)
+
+        for root in np.flatnonzero(zone_tree.parent == -1).tolist():
+            # iterative depth-first search, the zone is visited again after each child zone
+            stack = [(root, iter(zone_tree.child_zone_ids(root).tolist()))]
+            first_visit[root] = len(visits)
+            roots[root] = root
+            visits.append(root)
+
+            while stack:
+                zone_id, children = stack[-1]
+                child_zone_id = next(children, None)
+
+                if child_zone_id is None:
+                    stack.pop()
+                    if stack:
+                        visits.append(stack[-1][0])
+                    continue
+
+                first_visit[child_zone_id] = len(visits)
+                roots[child_zone_id] = root
+                visits.append(child_zone_id)
+                stack.append((child_zone_id, iter(zone_tree.child_zone_ids(child_zone_id).tolist())))
+
+        self.visits = np.array(visits, dtype=np.int64)
+        self.depths = zone_tree.depth[self.visits]
+        self.first_visit = first_visit
+        self.roots = roots
+
+        sparse_table = [np.arange(len(visits))]
+        size = 1
+        while 2 * size <= len(visits):
+            previous = sparse_table[-1]
+            left = previous[:len(previous) - size]
+            right = previous[size:]
+            sparse_table.append(np.where(self.depths[left] <= self.depths[right], left, right))
+            size = 2 * size
+
+        self.sparse_table = sparse_table
+        self.fingerprint = zone_tree.fingerprint
+
+    def refresh(self) -> bool:
+        """
+        Build the index again only if the zones of the tree changed.
+
+        :return: True if the index was built again.
+        """
+        self.zone_tree.refresh()
+
+        if self.zone_tree.fingerprint == self.fingerprint:
+            return False
+
+        self.build()
+
+        return True
+
+    def lowest_common_ancestor(self, zone_name_1: str, zone_name_2: str) -> str:
+        """
+        Return the lowest common ancestor of two zones.
+
+        :param zone_name_1: The name of the first zone.
+        :param zone_name_2: The name of the second zone.
+        :return: The name of the zone, None if the zones are in different trees.
+        """
+        zone_tree = self.zone_tree
+        zone_id_1 = zone_tree.zone_id(zone_name_1)
+        zone_id_2 = zone_tree.zone_id(zone_name_2)
+
+        if self.roots[zone_id_1] != self.roots[zone_id_2]:
+            return None
+
+        left = int(self.first_visit[zone_id_1])
+        right = int(self.first_visit[zone_id_2])
+        if left > right:
+            left, right = right, left
+
+        level = (right - left + 1).bit_length() - 1
+        visit_1 = self.sparse_table[level][left]
+        visit_2 = self.sparse_table[level][right - (1 << level) + 1]
+
+        if self.depths[visit_1] <= self.depths[visit_2]:
+            return zone_tree.names[self.visits[visit_1]]
+
+        return zone_tree.names[self.visits[visit_2]]
@@ -0,0 +1,265 @@
+from typing import Dict, List
+
+import numpy as np
+
+from SPEED.entities.zone import Zone
+
+
+class ZoneTree:
+    """
+    The zone tree stored in arrays, built once from the zones loaded by ZoneHelper.load.
+
+    Each zone has an id, the position of its name in names. The tree has the parent of each zone (-1 for the root
+    zones), the child zones in CSR format (the child zones of the zone i are children[child_offsets[i]:
+    child_offsets[i + 1]]), the depth and the pre-order interval of each zone. A zone is a descendant of other zone if
+    its pre-order position is inside the interval of the other zone, thus the test is constant time.
+
+    The compute zones are kept in pre-order, thus the compute zones below a zone are one slice of this array.
+    """
+
+    def __init__(self, zones: Dict[str, Zone]):
+        """
+        Create and build the tree.
+
+        :param zones: The zone topology.
+        """
+        self.zones = zones
+        """
+        The zone topology.
+        """
+
+        self.names: List[str] = list()
+        """
+        The name of each zone id.
+        """
+
+        self.ids: Dict[str, int] = dict()
+        """
+        The id of each zone name.
+        """
+
+        self.parent: np.ndarray = np.empty(0, dtype=np.int64)
+        """
+        The parent zone id of each zone, -1 for the root zones.
+        """
+
+        self.child_offsets: np.ndarray = np.zeros(1, dtype=np.int64)
+        """
+        The position of the first child zone of each zone in children.
+        """
+
+        self.children: np.ndarray = np.empty(0, dtype=np.int64)
+        """
+        The child zone ids of all the zones.
+        """
+
+        self.depth: np.ndarray = np.empty(0, dtype=np.int64)
+        """
+        The depth of each zone, 0 for the root zones.
+        """
+
+        self.pre_order: np.ndarray = np.empty(0, dtype=np.int64)
+        """
+        The zone ids in pre-order, each zone before its child zones.
+        """
+
+        self.post_order: np.ndarray = np.empty(0, dtype=np.int64)
+        """
+        The zone ids in post-order, the child zones before its parent zone.
+        """
+
+        self.interval_start: np.ndarray = np.empty(0, dtype=np.int64)
+        """
+        The position of each zone in the pre-order.
+        """
+
+        self.interval_end: np.ndarray = np.empty(0, dtype=np.int64)
+        """
+        The position after the last zone below each zone in the pre-order.
+        """
+
+        self.compute_zones: np.ndarray = np.empty(0, dtype=np.int64)
+        """
+        The compute zone ids in pre-order.
+        """
+
+        self.compute_start: np.ndarray = np.empty(0, dtype=np.int64)
+        """
+        The position in compute_zones of the first compute zone below each zone.
+        """
+
+        self.compute_end: np.ndarray = np.empty(0, dtype=np.int64)
+        """
+        The position in compute_zones after the last compute zone below each zone.
+        """
+
+        self.fingerprint = ""
+        """
+        The fingerprint of the zones used to build the tree.
+        """
+
+        self.build()
+
+    def build(self):
+        """
+        Build the tree using the current zones.
+
+        :return:
+        """
+        names = list(self.zones.keys())
+        ids = {zone_name: i for i, zone_name in enumerate(names)}
+        amount_zones = len(names)
+
+        parent = np.full(amount_zones, -1, dtype=np.int64)
+        child_offsets = np.zeros(amount_zones + 1, dtype=np.int64)
+        children: List[int] = list()
+
+        for i, zone_name in enumerate(names):
+            zone = self.zones[zone_name]
+
+            if zone.parent_zone_name:
+                if zone.parent_zone_name not in ids:
+                    raise TypeError("The parent zone {} does not exist.".format(zone.parent_zone_name))
+                parent[i] = ids[zone.parent_zone_name]
+
+            for child_zone_name in zone.child_zone_names:
+                children.append(ids[child_zone_name])
+            child_offsets[i + 1] = len(children)
+
+        children = np.array(children, dtype=np.int64)
+
+        depth = np.zeros(amount_zones, dtype=np.int64)
+        pre_order: List[int] = list()
+        post_order: List[int] = list()
+        interval_start = np.zeros(amount_zones, dtype=np.int64)
+        interval_end = np.zeros(amount_zones, dtype=np.int64)
+
+        for root in np.flatnonzero(parent == -1).tolist():
+            # iterative depth-first search, the zone is closed after all its child zones
+            stack = [(root, False)]
+            while stack:
+                zone_id, closed = stack.pop()
+
+                if closed:
+                    interval_end[zone_id] = len(pre_order)
+                    post_order.append(zone_id)
+                    continue
+
+                interval_start[zone_id] = len(pre_order)
+                pre_order.append(zone_id)
+                stack.append((zone_id, True))
+
+                zone_children = children[child_offsets[zone_id]:child_offsets[zone_id + 1]]
+                depth[zone_children] = depth[zone_id] + 1
+                for child_zone_id in reversed(zone_children.tolist()):
+                    stack.append((child_zone_id, False))
+
+        if len(pre_order) != amount_zones:
+            raise TypeError("The zones do not form a tree.")
+
+        pre_order = np.array(pre_order, dtype=np.int64)
+
+        is_compute = np.array([self.zones[names[i]].zone_type == Zone.TYPE_COMPUTE for i in pre_order.tolist()],
+                              dtype=bool)
+        compute_zones = pre_order[is_compute]
+        compute_positions = interval_start[compute_zones]
+
+        # the zone itself is not below it
+        compute_start = np.searchsorted(compute_positions, interval_start + 1)
+        compute_end = np.searchsorted(compute_positions, interval_end)
+
+        self.names = names
+        self.ids = ids
+        self.parent = parent
+        self.child_offsets = child_offsets
+        self.children = children
+        self.depth = depth
+        self.pre_order = pre_order
+        self.post_order = np.array(post_order, dtype=np.int64)
+        self.interval_start = interval_start
+        self.interval_end = interval_end
+        self.compute_zones = compute_zones
+        self.compute_start = compute_start
+        self.compute_end = compute_end
+        self.fingerprint = self.compute_fingerprint()
+
+    def compute_fingerprint(self) -> str:
+        """
+        The fingerprint of the current zones.
+
+        :return:
+        """
+        return ",".join(
+            "{}>{}".format(zone.parent_zone_name, zone_name) for zone_name, zone in self.zones.items()
+        )
+
+    def refresh(self) -> bool:
+        """
+        Build the tree again only if the zones changed.
+
+        :return: True if the tree was built again.
+        """
+        if self.compute_fingerprint() == self.fingerprint:
+            return False
+
+        self.build()
+
+        return True
+
+    def zone_id(self, zone_name: str) -> int:
+        """
+        Return the id of a zone.
+
+        :param zone_name: The name of the zone.
+        :return:
+        """
+        if zone_name not in self.ids:
+            raise TypeError("The zone {} is not in the zone tree.".format(zone_name))
+
+        return self.ids[zone_name]
+
+    def child_zone_ids(self, zone_id: int) -> np.ndarray:
+        """
+        Return the ids of the child zones of a zone.
+
+        :param zone_id: The id of the zone.
+        :return:
+        """
+        return self.children[self.child_offsets[zone_id]:self.child_offsets[zone_id + 1]]
+
+    def is_descendant(self, zone_name: str, ancestor_zone_name: str) -> bool:
+        """
+        Check if a zone is below other zone.
+
+        :param zone_name: The name of the zone.
+        :param ancestor_zone_name: The name of the zone above it.
+        :return:
+        """
+        zone_id = self.zone_id(zone_name)
+        ancestor_zone_id = self.zone_id(ancestor_zone_name)
+
+        start = self.interval_start[ancestor_zone_id]
+        end = self.interval_end[ancestor_zone_id]
+
+        return bool(start < self.interval_start[zone_id] < end)
+
+    def compute_descendants(self, zone_name: str) -> List[str]:
+        """
+        Return the name of the compute zones below a zone, in pre-order.
+
+        :param zone_name: The name of the zone.
+        :return:
+        """
+        zone_id = self.zone_id(zone_name)
+
+        compute_zones = self.compute_zones[self.compute_start[zone_id]:self.compute_end[zone_id]]
+
+        return [self.names[compute_zone_id] for compute_zone_id in compute_zones.tolist()]
+
+    def zone_names_bottom_up(self) -> List[str]:
+        """
+        Return the zone names ordered from the leafs to the roots, the child zones are always before its parent zone.
+
+        :return:
+        """
+        return [self.names[zone_id] for zone_id in self.post_order.tolist()]
@@ -78,3 +78,73 @@ class DistributedServiceManagerTest(unittest.TestCase):
         dsm = simulation.zdsm
 
         self.assertEqual("n_2", dsm['z_0'].node.name)
+
+    def test_select_zones_to_vnf_segments(self):
+        """
+        The segments that select the same child zone are merged, and the capacity of the child zones is respected.
+        """
+        env = simpy.Environment()
+
+        entities_file = "{}/config/entities_2_sfc_request.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        zone_file = "{}/config/zone_topology_4.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        simulation_file = "{}/config/simulation_config.yml".format(os.path.dirname(os.path.abspath(__file__)))
+
+        environment = Setup.load_entities(
+            entities_file=entities_file
+        )
+
+        environment['zones'] = ZoneHelper.load(
+            data_file=zone_file,
+            environment=environment
+        )
+
+        config = Helper.load_yml_file(
+            data_file=simulation_file
+        )
+
+        simulation = SPEEDSimulation(
+            env=env,
+            config=config["simulation"],
+            environment=environment
+        )
+
+        dsm = simulation.zdsm['z_2']
+        registry = dsm.speed.registry
+        vnf_ids = [registry.vnfs.intern(vnf_name) for vnf_name in ['vnf_1', 'vnf_2', 'vnf_3']]
+
+        dsm.speed.zone_vnf_cost = {
+            registry.zones.intern('z_5'): {vnf_id: 1.0 for vnf_id in vnf_ids},
+            registry.zones.intern('z_6'): {vnf_id: 5.0 for vnf_id in vnf_ids}
+        }
+
+        segmentation_plan = {
+            'segments': {
+                'seg_0': {'vnfs': ['vnf_1'], 'zones': ['z_5', 'z_6']},
+                'seg_1': {'vnfs': ['vnf_2', 'vnf_3'], 'zones': ['z_5', 'z_6']}
+            }
+        }
+
+        cost = dsm.speed.segments_cost_matrix(
+            vnf_segments=[['vnf_1'], ['vnf_2', 'vnf_3']],
+            zone_names=['z_5', 'z_6']
+        )
+        self.assertEqual([[1.0, 5.0], [2.0, 10.0]], cost.tolist())
+
+        selected_child_zones = dsm.select_zones_to_vnf_segments(segmentation_plan)
+        self.assertEqual({'z_5': {'vnfs': ['vnf_1', 'vnf_2', 'vnf_3']}}, selected_child_zones)
+
+        selected_child_zones = dsm.select_zones_to_vnf_segments(segmentation_plan, zone_capacity={'z_5': 2})
+        self.assertEqual({'z_5': {'vnfs': ['vnf_1']}, 'z_6': {'vnfs': ['vnf_2', 'vnf_3']}}, selected_child_zones)
+
+        # the seg_1 does not fit in any zone that can execute it
+        selected_child_zones = dsm.select_zones_to_vnf_segments(segmentation_plan, zone_capacity={'z_5': 1, 'z_6': 1})
+        self.assertEqual(dict(), selected_child_zones)
+
+        # the seg_0 is cheaper in the z_5, but the seg_1 only fits in the z_5
+        dsm.speed.zone_vnf_cost = {
+            registry.zones.intern('z_5'): {vnf_id: 1.0 for vnf_id in vnf_ids},
+            registry.zones.intern('z_6'): {vnf_ids[0]: 5.0}
+        }
+
+        selected_child_zones = dsm.select_zones_to_vnf_segments(segmentation_plan, zone_capacity={'z_5': 2})
+        self.assertEqual({'z_6': {'vnfs': ['vnf_1']}, 'z_5': {'vnfs': ['vnf_2', 'vnf_3']}}, selected_child_zones)
@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from SPEED.environment_snapshot import EnvironmentSnapshot
+
+
+class EnvironmentSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Copy the config files to a temporary directory, the snapshots are saved next to them.
+        """
+        config_path = "{}/config".format(os.path.dirname(os.path.abspath(__file__)))
+
+        self.path = tempfile.mkdtemp()
+        self.entities_file = shutil.copy("{}/entities_topology_build.yml".format(config_path), self.path)
+        self.zones_file = shutil.copy("{}/zone_topology_3.yml".format(config_path), self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def snapshot_files(self):
+        return [file_name for file_name in os.listdir(self.path) if file_name.endswith(EnvironmentSnapshot.EXTENSION)]
+
+    def test_load(self):
+        snapshot = EnvironmentSnapshot(entities_file=self.entities_file, zones_file=self.zones_file)
+
+        environment = snapshot.load()
+        self.assertFalse(snapshot.loaded)
+        self.assertEqual(1, len(self.snapshot_files()))
+
+        loaded_environment = snapshot.load()
+        self.assertTrue(snapshot.loaded)
+        self.assertEqual(list(environment['zones'].keys()), list(loaded_environment['zones'].keys()))
+        self.assertEqual(list(environment['nodes'].keys()), list(loaded_environment['nodes'].keys()))
+
+        snapshot.load(rebuild=True)
+        self.assertFalse(snapshot.loaded)
+
+    def test_stale_snapshot(self):
+        """
+        When a config file changes the old snapshot is not loaded and it is removed.
+        """
+        snapshot = EnvironmentSnapshot(entities_file=self.entities_file, zones_file=self.zones_file)
+        snapshot.load()
+        old_files = self.snapshot_files()
+
+        with open(self.zones_file, "a") as f:
+            f.write("\n# changed\n")
+
+        snapshot.load()
+        self.assertFalse(snapshot.loaded)
+        self.assertEqual(1, len(self.snapshot_files()))
+        self.assertNotEqual(old_files, self.snapshot_files())
+
+    def test_module_changed(self):
+        """
+        When the source of a module of the pickled classes changes the key changes.
+        """
+        snapshot = EnvironmentSnapshot(entities_file=self.entities_file, zones_file=self.zones_file)
+        module_file = "{}/module.py".format(self.path)
+
+        with open(module_file, "w") as f:
+            f.write("class A:\n    pass\n")
+
+        snapshot.module_files = lambda: [module_file]
+        key = snapshot.compute_key()
+
+        with open(module_file, "a") as f:
+            f.write("\nclass B:\n    pass\n")
+
+        self.assertNotEqual(key, snapshot.compute_key())
+
+    def test_save_error(self):
+        """
+        When the snapshot can not be written the environment is loaded without snapshot.
+        """
+        snapshot = EnvironmentSnapshot(entities_file=self.entities_file, zones_file=self.zones_file)
+
+        # a directory with the name of the snapshot file can not be replaced
+        os.mkdir(snapshot.file_name(snapshot.compute_key()))
+
+        environment = snapshot.load()
+        self.assertFalse(snapshot.loaded)
+        self.assertIn('zones', environment)
+        self.assertEqual([], [file_name for file_name in os.listdir(self.path) if file_name.endswith(".tmp")])
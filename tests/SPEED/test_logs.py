@@ -4,6 +4,7 @@ import os
 import unittest
 
 from SimPlacement.setup import Setup
+from SPEED.logs.cache import CacheLog
 from SPEED.logs.vnf_segment import VNFSegmentLog
 
 
@@ -39,3 +40,20 @@ class SPEEDLogTest(unittest.TestCase):
         f = "{}/{}".format(self.log_path, VNFSegmentLog.FILE_NAME)
         df = pd.read_csv(f)
         self.assertEqual(2, df.size)
+
+    def test_cache_stats(self):
+        cache_log: CacheLog = CacheLog()
+
+        cache_log.add_event(
+            event=CacheLog.STATS,
+            time=100,
+            cache_name="segmentation",
+            stats={'entries': 2, 'hits': 3, 'misses': 1, 'evictions': 0, 'hit_rate': 0.75}
+        )
+
+        cache_log.save(file_path=self.log_path)
+
+        f = "{}/{}".format(self.log_path, CacheLog.FILE_NAME)
+        df = pd.read_csv(f, sep=";")
+        self.assertEqual(1, len(df))
+        self.assertEqual(0.75, df['HitRate'][0])
@@ -0,0 +1,120 @@
+import unittest
+
+from SPEED.helpers.speed import SPEEDHelper
+from SPEED.registry import NameRegistry
+from SPEED.segmentation_cache import SegmentationTemplateCache
+from SPEED.speed import SPEED
+
+
+class SegmentationTemplateCacheTest(unittest.TestCase):
+
+    def test_get(self):
+        """
+        The templates are created once for each chain and mode.
+        """
+        cache = SegmentationTemplateCache()
+
+        template = cache.get(['vnf_1', 'vnf_2', 'vnf_3'])
+        self.assertEqual(4, len(template.plans))
+        self.assertEqual([[7, 0, 0], [3, 4, 0], [1, 6, 0], [1, 2, 4]], template.masks.tolist())
+        self.assertIs(template, cache.get(['vnf_1', 'vnf_2', 'vnf_3']))
+
+        set_partition = cache.get(['vnf_1', 'vnf_2', 'vnf_3'], mode=SPEEDHelper.SEGMENTATION_SET_PARTITION)
+        self.assertEqual(5, len(set_partition.plans))
+        self.assertEqual([5, 2, 0], set_partition.masks[2].tolist())
+
+        # the same positions for other VNFs is other chain
+        cache.get(['vnf_3', 'vnf_2', 'vnf_1'])
+
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(3, cache.misses)
+        self.assertEqual(0.25, cache.hit_rate())
+
+    def test_evict_least_recently_used(self):
+        cache = SegmentationTemplateCache(max_entries=2)
+
+        cache.get(['vnf_1'])
+        cache.get(['vnf_2'])
+        cache.get(['vnf_1'])
+        cache.get(['vnf_3'])
+
+        self.assertEqual(1, cache.evictions)
+        self.assertIn((('vnf_1',), SPEEDHelper.SEGMENTATION_CONTIGUOUS), cache.entries)
+        self.assertNotIn((('vnf_2',), SPEEDHelper.SEGMENTATION_CONTIGUOUS), cache.entries)
+
+        with self.assertRaises(TypeError):
+            cache.max_entries = 0
+
+    def test_template_plans(self):
+        """
+        The plans of the template are the valid segmentation plans, and the template is not changed.
+        """
+        registry = NameRegistry()
+        speed = SPEED(name="speed_z_0", zone_name="z_0", registry=registry)
+
+        vnf_names = ['vnf_1', 'vnf_2', 'vnf_3', 'vnf_4', 'vnf_5']
+        vnf_ids = [registry.vnfs.intern(vnf_name) for vnf_name in vnf_names]
+
+        speed.zone_vnfs = {
+            registry.zones.intern('z_1'): set(vnf_ids[:3]),
+            registry.zones.intern('z_2'): set(vnf_ids[2:])
+        }
+
+        cache = SegmentationTemplateCache()
+
+        for mode in SPEEDHelper.VALID_SEGMENTATION_MODES:
+            template = cache.get(vnf_names, mode=mode)
+            expected = dict(speed.iter_valid_segmentation_plans(vnf_names, mode=mode))
+
+            plans = dict(speed.iter_valid_template_plans(vnf_names, template))
+            self.assertEqual(expected, plans)
+
+            # the zones of the plans are not shared with the template
+            for plan in plans.values():
+                for segment in plan['segments'].values():
+                    segment['zones'].append('z_3')
+
+            self.assertEqual(expected, dict(speed.iter_valid_template_plans(vnf_names, template)))
+            self.assertIs(template, cache.get(vnf_names, mode=mode))
+
+    def test_segmentation_validity(self):
+        """
+        The validity matrix has the zones that can execute each segment of each plan.
+        """
+        registry = NameRegistry()
+        speed = SPEED(name="speed_z_0", zone_name="z_0", registry=registry)
+
+        vnf_names = ['vnf_1', 'vnf_2', 'vnf_3']
+        vnf_ids = [registry.vnfs.intern(vnf_name) for vnf_name in vnf_names]
+
+        speed.zone_vnfs = {
+            registry.zones.intern('z_1'): {vnf_ids[0], vnf_ids[1]},
+            registry.zones.intern('z_2'): {vnf_ids[1], vnf_ids[2]}
+        }
+
+        zone_names, zone_masks = speed.zone_masks(vnf_names)
+        self.assertEqual(['z_1', 'z_2'], zone_names)
+        self.assertEqual([3, 6], zone_masks.tolist())
+
+        template = SegmentationTemplateCache().get(vnf_names)
+        validity = speed.segmentation_validity(vnf_names, template)
+
+        self.assertEqual([False, True, True, True], validity.valid.tolist())
+        self.assertEqual([[True, False], [False, True], [True, True]], validity.hosts[1].tolist())
+
+        with self.assertRaises(ValueError):
+            template.masks[0, 0] = 1
+
+    def test_supports(self):
+        """
+        The templates are only created for the chains with a bounded amount of plans.
+        """
+        self.assertTrue(SegmentationTemplateCache.supports(14, SPEEDHelper.SEGMENTATION_CONTIGUOUS))
+        self.assertFalse(SegmentationTemplateCache.supports(15, SPEEDHelper.SEGMENTATION_CONTIGUOUS))
+
+        # 4140 and 21147 set partitions
+        self.assertTrue(SegmentationTemplateCache.supports(8, SPEEDHelper.SEGMENTATION_SET_PARTITION))
+        self.assertFalse(SegmentationTemplateCache.supports(9, SPEEDHelper.SEGMENTATION_SET_PARTITION))
+
+        with self.assertRaises(TypeError):
+            SegmentationTemplateCache.create_template(30, SPEEDHelper.SEGMENTATION_CONTIGUOUS)
@@ -0,0 +1,73 @@
+import unittest
+
+from SPEED.serializer import AggregationSerializer
+from SPEED.types import AggregatedData
+from SPEED.types import AggregationDelta
+
+
+class AggregationSerializerTest(unittest.TestCase):
+
+    def delta(self) -> AggregationDelta:
+        upserts = dict()
+        for gw_id in range(10):
+            for vnf_id in range(5):
+                upserts[(gw_id, vnf_id)] = AggregatedData(vnf=vnf_id, gw=gw_id, delay=10.5 + gw_id, cost=3.0 + vnf_id)
+
+        return AggregationDelta(zone=2, seq=5, base_seq=3, upserts=upserts, removed=[(11, 1), (12, 4)])
+
+    def test_encode_decode(self):
+        """
+        The decoded message is equal to the encoded message with all the encodings and compressions.
+        """
+        delta = self.delta()
+
+        for encoding in AggregationSerializer.VALID_ENCODINGS:
+            for compression in AggregationSerializer.VALID_COMPRESSIONS:
+                serializer = AggregationSerializer(encoding=encoding, compression=compression)
+
+                self.assertEqual(delta, serializer.decode(serializer.encode(delta)))
+
+    def test_encode_decode_fronts(self):
+        """
+        The records of the Pareto fronts are encoded.
+        """
+        upserts = dict()
+        fronts = dict()
+        for gw_id in range(3):
+            front = tuple(AggregatedData(vnf=1, gw=gw_id, delay=10.0 + i, cost=5.0 - i) for i in range(gw_id + 1))
+            upserts[(gw_id, 1)] = front[0]
+            fronts[(gw_id, 1)] = front
+
+        delta = AggregationDelta(zone=2, seq=5, base_seq=3, upserts=upserts, removed=[(11, 1)], fronts=fronts)
+
+        for encoding in AggregationSerializer.VALID_ENCODINGS:
+            serializer = AggregationSerializer(encoding=encoding)
+            self.assertEqual(delta, serializer.decode(serializer.encode(delta)))
+
+        size, _ = AggregationSerializer().measure(delta)
+        expected = AggregationSerializer.HEADER.size + 6 * AggregationSerializer.RECORD.size + \
+            AggregationSerializer.KEY.size
+        self.assertEqual(expected, size)
+
+    def test_measure(self):
+        """
+        The binary encoding has fixed size records and is smaller than pickle.
+        """
+        delta = self.delta()
+
+        size, encode_time = AggregationSerializer().measure(delta)
+
+        expected = AggregationSerializer.HEADER.size + 50 * AggregationSerializer.RECORD.size + \
+            2 * AggregationSerializer.KEY.size
+        self.assertEqual(expected, size)
+        self.assertGreaterEqual(encode_time, 0)
+
+        pickle_size, _ = AggregationSerializer(encoding=AggregationSerializer.ENCODING_PICKLE).measure(delta)
+        self.assertLess(size, pickle_size)
+
+        zlib_size, _ = AggregationSerializer(compression=AggregationSerializer.COMPRESSION_ZLIB).measure(delta)
+        self.assertLess(zlib_size, size)
+
+    def test_invalid_compression(self):
+        with self.assertRaises(TypeError):
+            AggregationSerializer(compression="lz4")
@@ -5,13 +5,18 @@ import networkx as nx
 import simpy
 import pandas as pd
 import json
+import shutil
+import tempfile
 from SimPlacement.setup import Setup
 from SimPlacement.helpers.topology_generator import TopologyGeneratorHelper
 from SPEED.entities.zone import Zone
 from SPEED.helpers.simulation import SimulationHelper
+from SPEED.helpers.speed import SPEEDHelper
 from SPEED.helpers.zone import ZoneHelper
 from SPEED.logs.vnf_segment import VNFSegmentLog
 from SPEED.simulation import SPEEDSimulation
+from SPEED.speed import SPEED
+from SPEED.zone_delay_matrix import ZoneDelayMatrix
 from SimPlacement.helper import Helper
 
 from SPEED.distributed_service_manager import DistributedServiceManager
@@ -170,9 +175,232 @@ class SPEEDTest(unittest.TestCase):
 
         simulation.update_aggregated_data()
 
-        data = simulation.zdsm['z_0'].speed.aggregate_date()
+        speed = simulation.zdsm['z_0'].speed
+        data = speed.aggregate_date()
 
-        self.assertEqual(375.0, data['n_3_vnf_1']['cost'])
+        self.assertEqual(375.0, data[speed.registry.aggregated_key('n_3', 'vnf_1')].cost)
+
+    def test_update_aggregated_data_dirty_zones(self):
+        """
+        Only the dirty zones and its ancestors are aggregated again.
+        """
+        entities_file = "{}/config/entities_topology_build.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        zone_file = "{}/config/zone_topology_3.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        simulation_file = "{}/config/simulation_config.yml".format(os.path.dirname(os.path.abspath(__file__)))
+
+        environment = Setup.load_entities(
+            entities_file=entities_file
+        )
+
+        environment['zones'] = ZoneHelper.load(
+            data_file=zone_file,
+            environment=environment
+        )
+
+        config = Helper.load_yml_file(
+            data_file=simulation_file
+        )
+
+        simulation = SPEEDSimulation(
+            env=simpy.Environment(),
+            config=config["simulation"],
+            environment=environment
+        )
+
+        simulation.update_aggregated_data()
+
+        # nothing changed, thus nothing is aggregated again
+        simulation.update_aggregated_data()
+        self.assertEqual(1, simulation.zdsm['z_0'].speed.version)
+
+        # z_5 -> z_2 -> z_1 -> z_0, the resources did not change thus the delta is empty and z_2 is not processed
+        simulation.mark_domain_dirty("dom_2")
+        simulation.update_aggregated_data()
+
+        def zone_events(zone_name):
+            return [event for event in simulation.data_aggregation_log.events if event[2] == zone_name]
+
+        self.assertEqual(2, len(zone_events('z_5')))
+        self.assertEqual(0, zone_events('z_5')[0][4])
+        self.assertEqual(1, len(zone_events('z_2')))
+        self.assertEqual(1, simulation.zdsm['z_5'].speed.version)
+        self.assertEqual(1, simulation.zdsm['z_0'].speed.version)
+
+    def test_zone_delays(self):
+        """
+        The delay between the distributed service managers is the delay of the path between its nodes.
+        """
+        entities_file = "{}/config/entities_topology_build.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        zone_file = "{}/config/zone_topology_3.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        simulation_file = "{}/config/simulation_config.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        delays_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, delays_path)
+        delays_file = "{}/zone_delays.npz".format(delays_path)
+
+        environment = Setup.load_entities(
+            entities_file=entities_file
+        )
+
+        environment['zones'] = ZoneHelper.load(
+            data_file=zone_file,
+            environment=environment
+        )
+
+        config = Helper.load_yml_file(
+            data_file=simulation_file
+        )
+
+        config["simulation"]["zone_delays"] = {"file": delays_file}
+
+        simulation = SPEEDSimulation(
+            env=simpy.Environment(),
+            config=config["simulation"],
+            environment=environment
+        )
+
+        topo = environment['topology']
+        sp = topo.shortest_simple_edge_path(
+            src_name=simulation.zdsm['z_2'].node.name,
+            dst_name=simulation.zdsm['z_5'].node.name,
+        )
+
+        delay = simulation.delay_between_distributed_service_components(
+            environment['zones']['z_2'],
+            environment['zones']['z_5']
+        )
+
+        self.assertEqual(topo.path_delay(path=sp), delay)
+        self.assertTrue(os.path.isfile(delays_file))
+
+        # the matrix saved is loaded, and the topology did not change thus it is not built again
+        loaded = ZoneDelayMatrix(
+            topology=topo,
+            zone_nodes=simulation.zone_delays.zone_nodes,
+            file_name=delays_file
+        )
+
+        self.assertEqual(delay, loaded.delay('z_2', 'z_5'))
+        self.assertFalse(loaded.refresh())
+
+        # the pairs computed lazily are only stored, the file is not saved again until the flush
+        delay = loaded.delay('z_5', 'z_0')
+        pair = (loaded.zone_id('z_5'), loaded.zone_id('z_0'))
+        self.assertTrue(loaded.changed)
+
+        reloaded = ZoneDelayMatrix(
+            topology=topo,
+            zone_nodes=simulation.zone_delays.zone_nodes,
+            file_name=delays_file
+        )
+
+        self.assertNotIn(pair, reloaded.delays)
+
+        loaded.flush()
+        reloaded = ZoneDelayMatrix(
+            topology=topo,
+            zone_nodes=simulation.zone_delays.zone_nodes,
+            file_name=delays_file
+        )
+
+        self.assertIn(pair, reloaded.delays)
+        self.assertEqual(delay, reloaded.delay('z_5', 'z_0'))
+
+    def test_parallel_aggregation(self):
+        """
+        The data aggregated with worker processes is the same of the data aggregated in the simulation process.
+        """
+        entities_file = "{}/config/entities_topology_build.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        zone_file = "{}/config/zone_topology_3.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        simulation_file = "{}/config/simulation_config.yml".format(os.path.dirname(os.path.abspath(__file__)))
+
+        aggregated_data = []
+        for workers in [0, 2]:
+            environment = Setup.load_entities(
+                entities_file=entities_file
+            )
+
+            environment['zones'] = ZoneHelper.load(
+                data_file=zone_file,
+                environment=environment
+            )
+
+            config = Helper.load_yml_file(
+                data_file=simulation_file
+            )
+
+            config["simulation"]["aggregation"] = {
+                "workers": workers
+            }
+
+            with SPEEDSimulation(
+                env=simpy.Environment(),
+                config=config["simulation"],
+                environment=environment
+            ) as simulation:
+                simulation.update_aggregated_data()
+                aggregated_data.append(simulation.zdsm['z_0'].speed.aggregated_data)
+
+            self.assertIsNone(simulation.aggregation_pool)
+
+        self.assertEqual(aggregated_data[0], aggregated_data[1])
+
+    def test_periodic_aggregation(self):
+        """
+        In the periodic mode the zones aggregate the data in its own process, not before each placement decision.
+        """
+        entities_file = "{}/config/entities_topology_build.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        zone_file = "{}/config/zone_topology_3.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        simulation_file = "{}/config/simulation_config.yml".format(os.path.dirname(os.path.abspath(__file__)))
+
+        environment = Setup.load_entities(
+            entities_file=entities_file
+        )
+
+        environment['zones'] = ZoneHelper.load(
+            data_file=zone_file,
+            environment=environment
+        )
+
+        config = Helper.load_yml_file(
+            data_file=simulation_file
+        )
+
+        config["simulation"]["aggregation"] = {
+            "mode": SPEEDSimulation.AGGREGATION_PERIODIC,
+            "interval": 5
+        }
+
+        env = simpy.Environment()
+        simulation = SPEEDSimulation(
+            env=env,
+            config=config["simulation"],
+            environment=environment
+        )
+
+        # the data is aggregated once when the processes start
+        simulation.start_periodic_aggregation()
+        self.assertEqual(1, simulation.zdsm['z_0'].speed.version)
+
+        def zone_events(zone_name):
+            return [event for event in simulation.data_aggregation_log.events if event[2] == zone_name]
+
+        # the dirty zone waits for its process
+        simulation.mark_domain_dirty("dom_2")
+        simulation.update_aggregated_data()
+        self.assertEqual(1, len(zone_events('z_5')))
+
+        env.run(until=6)
+        self.assertEqual(2, len(zone_events('z_5')))
+        self.assertFalse(simulation.dirty_zones)
+
+        with self.assertRaises(TypeError):
+            config["simulation"]["aggregation"]["mode"] = "invalid"
+            SPEEDSimulation(
+                env=simpy.Environment(),
+                config=config["simulation"],
+                environment=environment
+            )
+        self.assertEqual(1, simulation.zdsm['z_3'].speed.version)
 
     def test_setup(self):
         """
@@ -288,6 +516,88 @@ class SPEEDTest(unittest.TestCase):
 
         self.assertEqual(1, len(selected_segmentation_plan['segments']))
 
+    def test_select_zone_manager_optimal(self):
+        """
+        Select the zone manager with the optimal plan, without enumerating the valid plans.
+        """
+        entities_file = "{}/config/entities_topology_build.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        zone_file = "{}/config/zone_topology_3.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        simulation_file = "{}/config/simulation_config.yml".format(os.path.dirname(os.path.abspath(__file__)))
+
+        environment = Setup.load_entities(
+            entities_file=entities_file
+        )
+
+        environment['zones'] = ZoneHelper.load(
+            data_file=zone_file,
+            environment=environment
+        )
+
+        config = Helper.load_yml_file(
+            data_file=simulation_file
+        )
+        config["simulation"]['segmentation'] = {'selection': SPEED.SELECTION_OPTIMAL}
+
+        simulation = SPEEDSimulation(
+            env=simpy.Environment(),
+            config=config["simulation"],
+            environment=environment
+        )
+
+        simulation.setup()
+
+        def find_valid_vnf_segment_plan(zone, vnf_names):
+            raise AssertionError("The valid plans are enumerated in the optimal selection.")
+
+        simulation.find_valid_vnf_segment_plan = find_valid_vnf_segment_plan
+
+        sr_1 = environment['sfc_requests']['sr_1']
+        z_sr1 = simulation.select_zone_manager(sr_1)
+        zone_manager: Zone = z_sr1['zone_manager']
+        dsm: DistributedServiceManager = simulation.zdsm[zone_manager.name]
+
+        self.assertEqual("z_1", zone_manager.name)
+        self.assertEqual([SPEED.SELECTION_OPTIMAL], list(z_sr1['plans'].keys()))
+        self.assertEqual(
+            dsm.select_optimal_zones_to_vnf_segments([vnf.name for vnf in sr_1.sfc.vnfs]),
+            dsm.merge_zones_of_vnf_segments(z_sr1['plans'][SPEED.SELECTION_OPTIMAL])
+        )
+
+    def test_optimal_selection_invalid_config(self):
+        """
+        The optimal selection does not support the set partition mode and the zone capacity.
+        """
+        entities_file = "{}/config/entities_topology_build.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        zone_file = "{}/config/zone_topology_3.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        simulation_file = "{}/config/simulation_config.yml".format(os.path.dirname(os.path.abspath(__file__)))
+
+        environment = Setup.load_entities(
+            entities_file=entities_file
+        )
+
+        environment['zones'] = ZoneHelper.load(
+            data_file=zone_file,
+            environment=environment
+        )
+
+        for segmentation_config in [
+            {'selection': SPEED.SELECTION_OPTIMAL, 'mode': SPEEDHelper.SEGMENTATION_SET_PARTITION},
+            {'selection': SPEED.SELECTION_OPTIMAL, 'zone_capacity': {'z_1': 1}}
+        ]:
+            config = Helper.load_yml_file(
+                data_file=simulation_file
+            )
+            config["simulation"]['segmentation'] = segmentation_config
+
+            simulation = SPEEDSimulation(
+                env=simpy.Environment(),
+                config=config["simulation"],
+                environment=environment
+            )
+
+            with self.assertRaises(TypeError):
+                simulation.setup()
+
     def test_select_zones_for_the_segmentation_plan(self):
         """
         Select the child zones of the manager zone for each segment VNF Segment in the plan.
@@ -504,6 +814,70 @@ class SPEEDTest(unittest.TestCase):
         log_file = "{}/{}".format(new_log_path, VNFSegmentLog.FILE_NAME)
         df = pd.read_csv(log_file, sep=";")
 
+    def test_sfc_requests_arrival(self):
+        """
+        All the SFC Requests are processed at the arrival time, and after the placement they are not pending in the
+        housekeeping anymore. The housekeeping does not tick while there is nothing to do, before the first arrival.
+        """
+        entities_file = "{}/config/entities_1_sfc_request_placement.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        zone_file = "{}/config/zone_topology_4.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        simulation_file = "{}/config/simulation_config.yml".format(os.path.dirname(os.path.abspath(__file__)))
+
+        environment = Setup.load_entities(
+            entities_file=entities_file
+        )
+
+        environment['zones'] = ZoneHelper.load(
+            data_file=zone_file,
+            environment=environment
+        )
+
+        config = Helper.load_yml_file(
+            data_file=simulation_file
+        )
+
+        simulation = SPEEDSimulation(
+            env=simpy.Environment(),
+            config=config["simulation"],
+            environment=environment
+        )
+
+        new_log_path = "{}/logs/housekeeping_idle/".format(os.path.dirname(os.path.abspath(__file__)))
+        simulation.log.set_log_path(new_log_path)
+
+        # each housekeeping tick checks the SFC Requests once, thus the ticks are counted by this check
+        housekeeping_ticks = []
+        sfc_requests_vnfs_are_assigned_to_compute_zone = simulation.sfc_requests_vnfs_are_assigned_to_compute_zone
+
+        def count_housekeeping_tick():
+            housekeeping_ticks.append(simulation.env.now)
+            sfc_requests_vnfs_are_assigned_to_compute_zone()
+
+        simulation.sfc_requests_vnfs_are_assigned_to_compute_zone = count_housekeeping_tick
+
+        simulation.run()
+
+        arrivals = environment['sfc_requests_arrival']
+        first_arrival = min(arrivals.keys())
+        events = [event for event in simulation.distributed_service_log.events
+                  if event[0] == DistributedServiceLog.ZONE_MANAGER_SELECTED]
+
+        self.assertEqual(sum(len(sfc_requests) for sfc_requests in arrivals.values()), len(events))
+        self.assertEqual({}, simulation.pending_sfc_requests)
+
+        # the SFC Request that arrives after the idle gap is processed at its arrival time
+        self.assertLess(0, first_arrival)
+        arrival_times = {
+            sfc_request.name: arrival for arrival, sfc_requests in arrivals.items() for sfc_request in sfc_requests
+        }
+        for event in events:
+            self.assertEqual("{:.2f}".format(arrival_times[event[2]]), event[1])
+
+        # the housekeeping is idle until the first arrival, and it does not execute a tick for each ms
+        self.assertTrue(housekeeping_ticks)
+        self.assertLessEqual(first_arrival, min(housekeeping_ticks))
+        self.assertLess(len(housekeeping_ticks), simulation.duration)
+
     def test_entities_2_sfc_request_placement_only_one(self):
         """
         Allocate the resource in the compute zone after the zone selection to execute the VNFs.
@@ -741,6 +1115,33 @@ class SPEEDTest(unittest.TestCase):
         # print(nx.write_network_text(G))
 
 
+    def test_generate_random_tree_with_max_height_seed(self):
+        """
+        The tree has always the height informed, the same seed generates the same tree and the max amount of child
+        zones is respected.
+        :return:
+        """
+        for seed in range(0, 20):
+            G = ZoneHelper.generate_random_tree_with_max_height(
+                max_height=3,
+                num_aggregation_zones=12,
+                seed=seed,
+                max_children=2
+            )
+
+            self.assertEqual(12, len(G))
+            self.assertTrue(nx.is_arborescence(G))
+            self.assertEqual(3, nx.dag_longest_path_length(G))
+            self.assertTrue(max(degree for _, degree in G.out_degree()) <= 2)
+
+        G1 = ZoneHelper.generate_random_tree_with_max_height(max_height=6, num_aggregation_zones=1000, seed=7)
+        G2 = ZoneHelper.generate_random_tree_with_max_height(max_height=6, num_aggregation_zones=1000, seed=7)
+        self.assertEqual(list(G1.edges), list(G2.edges))
+
+        # a binary tree with height 2 has at most 7 zones
+        with self.assertRaises(TypeError):
+            ZoneHelper.generate_random_tree_with_max_height(max_height=2, num_aggregation_zones=8, max_children=2)
+
     def test_simulation_helper_zone_topology_generation(self):
 
         random.seed(1)
@@ -1,7 +1,10 @@
 import os
+import pickle
 import unittest
 from typing import Dict, List
 
+import networkx as nx
+import numpy as np
 import simpy
 from SimPlacement.entities.node import Node
 from SimPlacement.entities.vnf_instance import VNFInstance
@@ -13,8 +16,11 @@ from SPEED.helpers.zone import ZoneHelper
 from SPEED.simulation import SPEEDSimulation
 from SPEED.speed import SPEED
 from SPEED.types import InfrastructureData
+from SPEED.types import AggregatedData
+from SPEED.registry import NameRegistry
 from SPEED.helpers.speed import SPEEDHelper
 from SPEED.distributed_service_manager import DistributedServiceManager
+from SPEED.gateway_delay_matrix import GatewayDelayMatrix
 
 
 class SPEEDTest(unittest.TestCase):
@@ -50,8 +56,8 @@ class SPEEDTest(unittest.TestCase):
 
         dc_0: InfrastructureData = data_collected[0]
 
-        self.assertEqual('z_5', dc_0['zone'])
-        self.assertEqual('z_5', dc_0['zone'])
+        self.assertEqual('z_5', speed.registry.zones.name(dc_0.zone))
+        self.assertEqual('z_5', speed.registry.zones.name(dc_0.zone))
 
     def test_compute_zone_data_collect_creating_vnf_instance(self):
         """
@@ -89,8 +95,8 @@ class SPEEDTest(unittest.TestCase):
         data_collected = speed.compute_zone_data_collect()
 
         dc_0: InfrastructureData = data_collected[0]
-        self.assertEqual('z_5', dc_0['zone'])
-        self.assertEqual(375, dc_0['cost'])
+        self.assertEqual('z_5', speed.registry.zones.name(dc_0.zone))
+        self.assertEqual(375, dc_0.cost)
 
     def test_aggregate_infrastructure_data(self):
         """
@@ -129,6 +135,122 @@ class SPEEDTest(unittest.TestCase):
 
         self.assertEqual(18, len(data_aggregate.keys()))
 
+    def test_aggregate_infrastructure_data_columnar(self):
+        """
+        The columnar collection aggregates the same data as the dict collection.
+        """
+        entities_file = "{}/config/entities_topology_build.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        zone_file = "{}/config/zone_topology.yml".format(os.path.dirname(os.path.abspath(__file__)))
+
+        environment = Setup.load_entities(entities_file)
+
+        zones: Dict[str, Zone] = ZoneHelper.load(
+            data_file=zone_file,
+            environment=environment
+        )
+
+        speed = DistributedServiceManager(
+            zone=zones['z_5'],
+            environment=environment
+        ).speed
+
+        speed_columnar = DistributedServiceManager(
+            zone=zones['z_5'],
+            environment=environment,
+            collection_mode=SPEED.COLLECTION_COLUMNAR
+        ).speed
+
+        data_aggregate = speed.aggregate_infrastructure_data()
+        data_aggregate_columnar = speed_columnar.aggregate_infrastructure_data()
+
+        self.assertEqual(list(data_aggregate.keys()), list(data_aggregate_columnar.keys()))
+
+        for key_name, aux_data in data_aggregate.items():
+            self.assertEqual(aux_data.delay, data_aggregate_columnar[key_name].delay)
+            self.assertEqual(aux_data.cost, data_aggregate_columnar[key_name].cost)
+
+        self.assertEqual(len(speed.infrastructure_data), len(speed_columnar.infrastructure_columns))
+
+    def test_collect_infrastructure_snapshot(self):
+        """
+        The snapshot sent to the worker processes builds the same data of the collection in the simulation process.
+        """
+        entities_file = "{}/config/entities_topology_build.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        zone_file = "{}/config/zone_topology.yml".format(os.path.dirname(os.path.abspath(__file__)))
+
+        environment = Setup.load_entities(entities_file)
+
+        zones: Dict[str, Zone] = ZoneHelper.load(
+            data_file=zone_file,
+            environment=environment
+        )
+
+        speed = DistributedServiceManager(
+            zone=zones['z_5'],
+            environment=environment
+        ).speed
+
+        snapshot = pickle.loads(pickle.dumps(speed.infrastructure_snapshot()))
+
+        columns = SPEED.collect_infrastructure_snapshot(snapshot, min_delay=False)
+        infrastructure_data = speed.compute_zone_data_collect()
+
+        self.assertEqual(len(infrastructure_data), len(columns))
+        for aux_data, row in zip(infrastructure_data, columns):
+            self.assertEqual((aux_data.vnf, aux_data.gw, aux_data.delay), (row['vnf'], row['gw'], row['delay']))
+
+        columns = SPEED.collect_infrastructure_snapshot(snapshot)
+        self.assertEqual(speed.aggregate_infrastructure_data(), speed.aggregate_infrastructure_data(columns))
+
+    def test_gateway_delay_matrix(self):
+        """
+        The delay matrix has the same delay of the shortest path between each node and each GW.
+        """
+        entities_file = "{}/config/entities_topology_build.yml".format(os.path.dirname(os.path.abspath(__file__)))
+
+        environment = Setup.load_entities(entities_file)
+
+        gateway_delays = GatewayDelayMatrix(
+            topology=environment['topology'],
+            nodes=environment['nodes']
+        )
+
+        g = environment['topology'].get_graph()
+        for node_name, node in environment['nodes'].items():
+            delays = gateway_delays.delays_from(node_name)
+            for gw_name, gw in environment['nodes'].items():
+                if gw.is_gateway():
+                    self.assertEqual(nx.shortest_path_length(g, node_name, gw_name, weight="delay"), delays[gw_name])
+
+        # the topology did not change
+        self.assertFalse(gateway_delays.refresh())
+
+    def test_gateway_delay_matrix_unreachable_gw(self):
+        """
+        The delay to a GW that is not reachable is infinite in the matrix, and the shortest path error is raised.
+        """
+        entities_file = "{}/config/entities_topology_build.yml".format(os.path.dirname(os.path.abspath(__file__)))
+
+        environment = Setup.load_entities(entities_file)
+
+        # disconnect one node that is not a GW
+        g = environment['topology'].get_graph()
+        node_name = [name for name, node in environment['nodes'].items() if not node.is_gateway()][0]
+        if g.is_directed():
+            g.remove_edges_from(list(g.in_edges(node_name)) + list(g.out_edges(node_name)))
+        else:
+            g.remove_edges_from(list(g.edges(node_name)))
+
+        gateway_delays = GatewayDelayMatrix(
+            topology=environment['topology'],
+            nodes=environment['nodes']
+        )
+
+        self.assertTrue(np.isinf(gateway_delays.row(node_name)).all())
+
+        with self.assertRaises(nx.NetworkXNoPath):
+            gateway_delays.delays_from(node_name)
+
     def test_vnf_segmentation(self):
         """
         Create the valid VNF Segments
@@ -225,6 +347,154 @@ class SPEEDTest(unittest.TestCase):
 
         self.assertEqual(['plan_0', 'plan_1'], list(valid_plans_2.keys()))
 
+    def test_iter_valid_segmentation_plans(self):
+        """
+        The plans created segment by segment are the valid plans of all the segmentation plans.
+        """
+        registry = NameRegistry()
+        speed = SPEED(name="speed_z_0", zone_name="z_0", registry=registry)
+
+        vnf_names = ['vnf_1', 'vnf_2', 'vnf_3', 'vnf_4', 'vnf_5']
+        vnf_ids = [registry.vnfs.intern(vnf_name) for vnf_name in vnf_names]
+
+        speed.zone_vnfs = {
+            registry.zones.intern('z_1'): set(vnf_ids[:3]),
+            registry.zones.intern('z_2'): set(vnf_ids[2:])
+        }
+
+        plans = speed.valid_segmentation_plans(SPEEDHelper.vnf_segmentation(vnf_names))
+        iter_plans = dict(speed.iter_valid_segmentation_plans(vnf_names))
+
+        self.assertEqual(plans, iter_plans)
+        self.assertEqual(['z_1', 'z_2'], iter_plans['plan_6']['segments']['seg_0']['zones'])
+
+        # no zone can execute the vnf_6
+        self.assertFalse(dict(speed.iter_valid_segmentation_plans(vnf_names + ['vnf_6'])))
+
+    def test_segmentation_modes(self):
+        """
+        The contiguous segments keep the order of the chain, the set partitions can join any VNFs.
+        """
+        vnf_names = ['vnf_1', 'vnf_2', 'vnf_3']
+
+        contiguous = SPEEDHelper.vnf_segmentation(vnf_names)
+        set_partition = SPEEDHelper.vnf_segmentation(vnf_names, mode=SPEEDHelper.SEGMENTATION_SET_PARTITION)
+
+        self.assertEqual(4, len(contiguous))
+        self.assertEqual(5, len(set_partition))
+        self.assertEqual(15, len(SPEEDHelper.vnf_segmentation(vnf_names + ['vnf_4'],
+                                                              mode=SPEEDHelper.SEGMENTATION_SET_PARTITION)))
+        self.assertEqual(['vnf_1', 'vnf_3'], set_partition['plan_2']['segments']['seg_0']['vnfs'])
+
+        for plan in contiguous.values():
+            self.assertNotEqual(['vnf_1', 'vnf_3'], plan['segments']['seg_0']['vnfs'])
+
+        registry = NameRegistry()
+        speed = SPEED(name="speed_z_0", zone_name="z_0", registry=registry)
+
+        vnf_ids = [registry.vnfs.intern(vnf_name) for vnf_name in vnf_names]
+        speed.zone_vnfs = {
+            registry.zones.intern('z_1'): {vnf_ids[0], vnf_ids[2]},
+            registry.zones.intern('z_2'): {vnf_ids[1]}
+        }
+
+        for mode in SPEEDHelper.VALID_SEGMENTATION_MODES:
+            plans = speed.valid_segmentation_plans(SPEEDHelper.vnf_segmentation(vnf_names, mode=mode))
+            self.assertEqual(plans, dict(speed.iter_valid_segmentation_plans(vnf_names, mode=mode)))
+
+        # only the set partition creates a segment with the vnf_1 and vnf_3
+        iter_plans = dict(speed.iter_valid_segmentation_plans(vnf_names, mode=SPEEDHelper.SEGMENTATION_SET_PARTITION))
+        self.assertEqual(['plan_2', 'plan_4'], list(iter_plans.keys()))
+        self.assertEqual(['z_1'], iter_plans['plan_2']['segments']['seg_0']['zones'])
+
+        with self.assertRaises(TypeError):
+            SPEEDHelper.vnf_segmentation(vnf_names, mode="random")
+
+    def test_optimal_segmentation_plan(self):
+        """
+        The segments and its zones are selected together, with the min cost plus the delay between the segments.
+        """
+        registry = NameRegistry()
+        speed = SPEED(name="speed_z_0", zone_name="z_0", registry=registry)
+
+        gw_id = registry.gws.intern('gw_1')
+        vnf_ids = [registry.vnfs.intern(vnf_name) for vnf_name in ['vnf_1', 'vnf_2', 'vnf_3']]
+
+        speed.update_child_zone_aggregated_data('z_1', {
+            (gw_id, vnf_ids[0]): AggregatedData(vnf=vnf_ids[0], gw=gw_id, delay=1.0, cost=1.0),
+            (gw_id, vnf_ids[1]): AggregatedData(vnf=vnf_ids[1], gw=gw_id, delay=1.0, cost=1.0)
+        })
+        speed.update_child_zone_aggregated_data('z_2', {
+            (gw_id, vnf_ids[0]): AggregatedData(vnf=vnf_ids[0], gw=gw_id, delay=2.0, cost=5.0),
+            (gw_id, vnf_ids[1]): AggregatedData(vnf=vnf_ids[1], gw=gw_id, delay=2.0, cost=5.0),
+            (gw_id, vnf_ids[2]): AggregatedData(vnf=vnf_ids[2], gw=gw_id, delay=2.0, cost=1.0)
+        })
+
+        vnf_names = ['vnf_1', 'vnf_2', 'vnf_3']
+
+        plan = speed.optimal_segmentation_plan(vnf_names)
+        self.assertEqual(6.0, plan['cost'])
+        self.assertEqual({'vnfs': ['vnf_1', 'vnf_2'], 'zones': ['z_1']}, plan['segments']['seg_0'])
+        self.assertEqual({'vnfs': ['vnf_3'], 'zones': ['z_2']}, plan['segments']['seg_1'])
+
+        # the delay between the zones is greater than the extra cost of one segment
+        plan = speed.optimal_segmentation_plan(vnf_names, delay_weight=3.0)
+        self.assertEqual(11.0, plan['cost'])
+        self.assertEqual({'seg_0': {'vnfs': vnf_names, 'zones': ['z_2']}}, plan['segments'])
+
+        # no child zone can execute the vnf_4
+        self.assertEqual(dict(), speed.optimal_segmentation_plan(vnf_names + ['vnf_4']))
+
+    def test_covers_vnfs(self):
+        """
+        The coverage bitset has all the VNFs of the aggregated data.
+        """
+        registry = NameRegistry()
+        speed = SPEED(name="speed_z_0", zone_name="z_0", registry=registry)
+
+        gw_id = registry.gws.intern('gw_1')
+        zone_id = registry.zones.intern('z_1')
+        vnf_ids = [registry.vnfs.intern(vnf_name) for vnf_name in ['vnf_1', 'vnf_2', 'vnf_3']]
+
+        for vnf_id in vnf_ids[:2]:
+            speed.aggregated_data[(gw_id, vnf_id)] = AggregatedData(vnf=vnf_id, gw=gw_id, delay=1.0, cost=1.0)
+            speed.aggregated_zones[(gw_id, vnf_id)] = zone_id
+
+        speed.index_aggregated_data()
+
+        self.assertEqual(0b11 << vnf_ids[0], speed.vnf_coverage)
+        self.assertTrue(speed.covers_vnfs(['vnf_2', 'vnf_1', 'vnf_2']))
+        self.assertFalse(speed.covers_vnfs(['vnf_1', 'vnf_3']))
+        self.assertFalse(speed.covers_vnfs(['vnf_1', 'vnf_4']))
+
+    def test_min_segments_search(self):
+        """
+        The search stops at the fewest segments with a valid plan.
+        """
+        registry = NameRegistry()
+        speed = SPEED(name="speed_z_0", zone_name="z_0", registry=registry)
+
+        vnf_names = ['vnf_1', 'vnf_2', 'vnf_3', 'vnf_4']
+        vnf_ids = [registry.vnfs.intern(vnf_name) for vnf_name in vnf_names]
+
+        speed.zone_vnfs = {
+            registry.zones.intern('z_1'): set(vnf_ids[:2]),
+            registry.zones.intern('z_2'): set(vnf_ids[1:])
+        }
+
+        plans = dict(speed.iter_valid_segmentation_plans(vnf_names, search=SPEEDHelper.SEARCH_MIN_SEGMENTS))
+
+        self.assertEqual(['plan_2', 'plan_4'], list(plans.keys()))
+        self.assertEqual(['vnf_1'], plans['plan_4']['segments']['seg_0']['vnfs'])
+        self.assertEqual(plans['plan_2'], dict(speed.iter_valid_segmentation_plans(vnf_names))['plan_2'])
+
+        # one zone can execute the whole chain
+        speed.zone_vnfs[registry.zones.intern('z_3')] = set(vnf_ids)
+        plans = dict(speed.iter_valid_segmentation_plans(vnf_names, search=SPEEDHelper.SEARCH_MIN_SEGMENTS))
+
+        self.assertEqual(['plan_0'], list(plans.keys()))
+        self.assertEqual(['z_3'], plans['plan_0']['segments']['seg_0']['zones'])
+
     def test_vnfs_available(self):
         """
         Test the vnfs_available function.
@@ -266,6 +536,157 @@ class SPEEDTest(unittest.TestCase):
         self.assertEqual(['vnf_1', 'vnf_3', 'vnf_2'], vnfs)
         self.assertEqual(['vnf_1', 'vnf_3', 'vnf_2'], vnfs_5)
 
+    def test_apply_child_zone_delta(self):
+        """
+        The parent zone applies the deltas in order and ignores the stale ones.
+        """
+        registry = NameRegistry()
+        parent = SPEED(name="speed_z_0", zone_name="z_0", registry=registry)
+        child = SPEED(name="speed_z_1", zone_name="z_1", registry=registry)
+
+        key_1 = registry.aggregated_key('n_1', 'vnf_1')
+        key_2 = registry.aggregated_key('n_1', 'vnf_2')
+
+        child.update_child_zone_aggregated_data('z_2', {
+            key_1: AggregatedData(vnf=key_1[1], gw=key_1[0], delay=10, cost=5),
+            key_2: AggregatedData(vnf=key_2[1], gw=key_2[0], delay=20, cost=7)
+        })
+        child.aggregate_date()
+
+        delta_1 = child.compute_delta()
+        self.assertEqual(2, delta_1.size())
+        self.assertTrue(parent.apply_child_zone_delta(delta_1))
+        self.assertEqual(child.aggregated_data, parent.aggregated_data)
+
+        # nothing changed
+        child.aggregate_date()
+        self.assertEqual(0, child.compute_delta().size())
+
+        child.update_child_zone_aggregated_data('z_2', {
+            key_1: AggregatedData(vnf=key_1[1], gw=key_1[0], delay=5, cost=9)
+        })
+        child.aggregate_date()
+
+        delta_2 = child.compute_delta()
+        self.assertEqual([key_1], list(delta_2.upserts))
+        self.assertEqual([key_2], delta_2.removed)
+        self.assertTrue(parent.apply_child_zone_delta(delta_2))
+        self.assertEqual(child.aggregated_data, parent.aggregated_data)
+        self.assertEqual(9, parent.min_cost('vnf_1'))
+
+        # stale delta
+        self.assertFalse(parent.apply_child_zone_delta(delta_1))
+
+        with self.assertRaises(TypeError):
+            parent.apply_child_zone_delta(delta_2._replace(seq=delta_2.seq + 2, base_seq=delta_2.seq + 1))
+
+    def test_pareto_front(self):
+        """
+        The front keeps only the records not dominated in delay and cost, capped at k records.
+        """
+        entries = [
+            (AggregatedData(vnf=0, gw=0, delay=10, cost=9), 1),
+            (AggregatedData(vnf=0, gw=0, delay=12, cost=9), 2),
+            (AggregatedData(vnf=0, gw=0, delay=20, cost=5), 2),
+            (AggregatedData(vnf=0, gw=0, delay=30, cost=4), 1),
+            (AggregatedData(vnf=0, gw=0, delay=40, cost=1), 3),
+        ]
+
+        front, zones = SPEED.pareto_front(entries, 10)
+        self.assertEqual([10, 20, 30, 40], [aux_data.delay for aux_data in front])
+        self.assertEqual((1, 2, 1, 3), zones)
+
+        # the min delay and the min cost are always kept
+        front, zones = SPEED.pareto_front(entries, 2)
+        self.assertEqual([10, 40], [aux_data.delay for aux_data in front])
+
+        front, zones = SPEED.pareto_front(entries, 1)
+        self.assertEqual([10], [aux_data.delay for aux_data in front])
+
+    def test_aggregate_date_pareto(self):
+        """
+        In the Pareto summary mode the parent zone keeps the cheaper records of the child zones.
+        """
+        registry = NameRegistry()
+        parent = SPEED(name="speed_z_0", zone_name="z_0", registry=registry, summary_mode=SPEED.SUMMARY_PARETO,
+                       pareto_k=2)
+        child = SPEED(name="speed_z_1", zone_name="z_1", registry=registry, summary_mode=SPEED.SUMMARY_PARETO,
+                      pareto_k=2)
+
+        key = registry.aggregated_key('n_1', 'vnf_1')
+
+        child.update_child_zone_aggregated_data('z_2', {
+            key: AggregatedData(vnf=key[1], gw=key[0], delay=10, cost=8)
+        })
+        child.update_child_zone_aggregated_data('z_3', {
+            key: AggregatedData(vnf=key[1], gw=key[0], delay=15, cost=2)
+        })
+        child.aggregate_date()
+
+        self.assertEqual([8, 2], [aux_data.cost for aux_data in child.aggregated_fronts[key]])
+        self.assertEqual(10, child.aggregated_data[key].delay)
+
+        delta = child.compute_delta()
+        self.assertEqual(2, len(delta.fronts[key]))
+        self.assertTrue(parent.apply_child_zone_delta(delta))
+
+        # the parent knows the cheaper record, even if it is not the record with the min delay
+        self.assertEqual(child.aggregated_fronts, parent.aggregated_fronts)
+        self.assertEqual(2, parent.min_cost('vnf_1'))
+
+    def test_aggregated_data_indexes(self):
+        """
+        The indexes have the same values of a scan over all the aggregated data.
+        """
+        env = simpy.Environment()
+        entities_file = "{}/config/entities_topology_build.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        zone_file = "{}/config/zone_topology_3.yml".format(os.path.dirname(os.path.abspath(__file__)))
+        simulation_file = "{}/config/simulation_config.yml".format(os.path.dirname(os.path.abspath(__file__)))
+
+        environment = Setup.load_entities(
+            entities_file=entities_file
+        )
+
+        environment['zones'] = ZoneHelper.load(
+            data_file=zone_file,
+            environment=environment
+        )
+
+        config = Helper.load_yml_file(
+            data_file=simulation_file
+        )
+
+        simulation = SPEEDSimulation(
+            env=env,
+            config=config["simulation"],
+            environment=environment
+        )
+
+        simulation.update_aggregated_data()
+
+        speed = simulation.zdsm['z_1'].speed
+
+        zones = speed.aggregated_zones
+        vnf_names = speed.registry.vnfs.names
+
+        for key, data in speed.aggregated_data.items():
+            costs = [d.cost for k, d in speed.aggregated_data.items() if zones[k] == zones[key] and d.vnf == data.vnf]
+
+            self.assertEqual(min(costs), speed.zone_vnf_cost[zones[key]][data.vnf])
+            self.assertIn(zones[key], speed.vnf_zones[data.vnf])
+            self.assertIn(data.vnf, speed.zone_vnfs[zones[key]])
+            self.assertLessEqual(speed.min_cost(vnf_names[data.vnf]), data.cost)
+
+        cost = speed.compute_child_zone_vnf_segment_execution_cost(
+            vnf_segment={'vnfs': ['vnf_1', 'vnf_2']},
+            zone_name='z_2'
+        )
+
+        z_2 = speed.registry.zones.ids['z_2']
+        vnf_1 = speed.registry.vnfs.ids['vnf_1']
+        vnf_2 = speed.registry.vnfs.ids['vnf_2']
+        self.assertEqual(speed.zone_vnf_cost[z_2][vnf_1] + speed.zone_vnf_cost[z_2][vnf_2], cost)
+
     def test_compute_zone_data_collect_resource_restriction(self):
         """
         After build the topology create a new VNF Instance and verify if the cpu available changes.
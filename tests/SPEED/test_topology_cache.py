@@ -0,0 +1,54 @@
+import unittest
+
+from SPEED.topology_cache import TopologyCache
+
+
+class TopologyCacheTest(unittest.TestCase):
+
+    def test_fingerprint(self):
+        """
+        A value cached for one topology is not returned for other topology.
+        """
+        cache = TopologyCache()
+
+        cache.put("topo_1", "n_1", {"n_2": 10})
+
+        self.assertEqual({"n_2": 10}, cache.get("topo_1", "n_1"))
+        self.assertIsNone(cache.get("topo_2", "n_1"))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_lru_eviction(self):
+        """
+        The least recently used values are evicted when the memory budget is exceeded.
+        """
+        size = TopologyCache.estimate_size({"n_2": 10})
+        cache = TopologyCache(max_bytes=2 * size)
+
+        cache.put("topo_1", "n_1", {"n_2": 10})
+        cache.put("topo_1", "n_3", {"n_2": 10})
+
+        # n_1 becomes the most recently used
+        cache.get("topo_1", "n_1")
+
+        cache.put("topo_1", "n_4", {"n_2": 10})
+
+        self.assertIsNone(cache.get("topo_1", "n_3"))
+        self.assertIsNotNone(cache.get("topo_1", "n_1"))
+        self.assertEqual(1, cache.evictions)
+        self.assertLessEqual(cache.used_bytes, cache.max_bytes)
+
+    def test_copy(self):
+        """
+        The values changed by the callers do not change the cached values.
+        """
+        cache = TopologyCache()
+
+        value = {"n_2": 10}
+        cache.put("topo_1", "n_1", value)
+        value["n_3"] = 20
+
+        aux = cache.get("topo_1", "n_1")
+        aux["n_4"] = 30
+
+        self.assertEqual({"n_2": 10}, cache.get("topo_1", "n_1"))
@@ -14,6 +14,7 @@ from SimPlacement.setup import Setup
 from SPEED.entities.zone import Zone
 from SPEED.helpers.simulation import SimulationHelper
 from SPEED.helpers.zone import ZoneHelper
+from SPEED.zone_tree import ZoneTree
 
 
 class ZoneTest(unittest.TestCase):
@@ -163,7 +164,7 @@ class ZoneTest(unittest.TestCase):
             environment=environment
         )
 
-        zt = ZoneHelper.build_zone_tree(zones)
+        zt = ZoneTree(zones)
 
         cz = ZoneHelper.get_random_compute_zone(
             mother_zone=zones['z_3'],
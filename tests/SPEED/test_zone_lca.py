@@ -0,0 +1,78 @@
+import random
+import unittest
+from typing import Dict
+
+import networkx as nx
+
+from SPEED.entities.zone import Zone
+from SPEED.helpers.zone import ZoneHelper
+from SPEED.zone_lca import ZoneLCAIndex
+from SPEED.zone_tree import ZoneTree
+
+
+class ZoneLCAIndexTest(unittest.TestCase):
+
+    @staticmethod
+    def zones(parents: Dict[str, str]) -> Dict[str, Zone]:
+        """
+        Create the zones, the zones without parent are compute zones.
+        """
+        zones: Dict[str, Zone] = dict()
+        for zone_name, parent_zone_name in parents.items():
+            zones[zone_name] = Zone(
+                name=zone_name,
+                zone_type=Zone.TYPE_AGGREGATION,
+                child_zone_names=[],
+                parent_zone_name=parent_zone_name
+            )
+
+        for zone_name, zone in zones.items():
+            if zone.parent_zone_name:
+                zones[zone.parent_zone_name].add_child_zone_name(zone_name)
+
+        return zones
+
+    def test_lowest_common_ancestor(self):
+        """
+        The index finds the same lowest common ancestor of networkx for all the pairs of zones.
+        """
+        rnd = random.Random(7)
+
+        for amount_zones in [1, 2, 5, 17, 40]:
+            parents = {"z_0": None}
+            for i in range(1, amount_zones):
+                parents["z_{}".format(i)] = "z_{}".format(rnd.randrange(i))
+
+            zones = self.zones(parents)
+            graph = ZoneHelper.build_zone_tree(zones)
+            index = ZoneLCAIndex(ZoneTree(zones))
+
+            for zone_name_1 in graph.nodes():
+                for zone_name_2 in graph.nodes():
+                    self.assertEqual(
+                        nx.lowest_common_ancestor(graph, zone_name_1, zone_name_2),
+                        index.lowest_common_ancestor(zone_name_1, zone_name_2)
+                    )
+
+    def test_refresh(self):
+        """
+        The index is only built again when the zones change.
+        """
+        zones = self.zones({"z_0": None, "z_1": "z_0", "z_2": "z_0"})
+
+        index = ZoneLCAIndex(ZoneTree(zones))
+        self.assertFalse(index.refresh())
+
+        zones.update(self.zones({"z_3": None}))
+        zones["z_3"].parent_zone_name = "z_2"
+        zones["z_2"].add_child_zone_name("z_3")
+        self.assertTrue(index.refresh())
+        self.assertEqual("z_0", index.lowest_common_ancestor("z_1", "z_3"))
+
+        # zones of different trees
+        zones.update(self.zones({"z_4": None, "z_5": "z_4"}))
+        index.refresh()
+        self.assertIsNone(index.lowest_common_ancestor("z_1", "z_5"))
+
+        with self.assertRaises(TypeError):
+            index.lowest_common_ancestor("z_1", "z_9")
@@ -0,0 +1,57 @@
+import unittest
+
+from SPEED.entities.zone import Zone
+from SPEED.zone_tree import ZoneTree
+
+
+class ZoneTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Create the zone tree z_0 -> (z_1 -> (z_3, z_4), z_2), the z_2, z_3 and z_4 are compute zones.
+        """
+        parents = {"z_0": None, "z_1": "z_0", "z_2": "z_0", "z_3": "z_1", "z_4": "z_1"}
+
+        self.zones = dict()
+        for zone_name, parent_zone_name in parents.items():
+            zone_type = Zone.TYPE_AGGREGATION if zone_name in ["z_0", "z_1"] else Zone.TYPE_COMPUTE
+            self.zones[zone_name] = Zone(
+                name=zone_name,
+                zone_type=zone_type,
+                child_zone_names=[],
+                parent_zone_name=parent_zone_name
+            )
+
+        for zone_name, zone in self.zones.items():
+            if zone.parent_zone_name:
+                self.zones[zone.parent_zone_name].add_child_zone_name(zone_name)
+
+    def test_build(self):
+        zone_tree = ZoneTree(self.zones)
+
+        self.assertEqual([-1, 0, 0, 1, 1], zone_tree.parent.tolist())
+        self.assertEqual([0, 1, 1, 2, 2], zone_tree.depth.tolist())
+        self.assertEqual([1, 2], zone_tree.child_zone_ids(0).tolist())
+        self.assertEqual([3, 4], zone_tree.child_zone_ids(1).tolist())
+        self.assertEqual([], zone_tree.child_zone_ids(2).tolist())
+
+        self.assertEqual(['z_3', 'z_4', 'z_1', 'z_2', 'z_0'], zone_tree.zone_names_bottom_up())
+
+    def test_is_descendant(self):
+        zone_tree = ZoneTree(self.zones)
+
+        self.assertTrue(zone_tree.is_descendant('z_3', 'z_0'))
+        self.assertTrue(zone_tree.is_descendant('z_4', 'z_1'))
+        self.assertFalse(zone_tree.is_descendant('z_2', 'z_1'))
+        self.assertFalse(zone_tree.is_descendant('z_1', 'z_1'))
+        self.assertFalse(zone_tree.is_descendant('z_0', 'z_3'))
+
+    def test_compute_descendants(self):
+        zone_tree = ZoneTree(self.zones)
+
+        self.assertEqual(['z_3', 'z_4', 'z_2'], zone_tree.compute_descendants('z_0'))
+        self.assertEqual(['z_3', 'z_4'], zone_tree.compute_descendants('z_1'))
+        self.assertEqual([], zone_tree.compute_descendants('z_3'))
+
+        with self.assertRaises(TypeError):
+            zone_tree.compute_descendants('z_9')